@@ -0,0 +1,100 @@
+"""Memory footprint of a result set held in memory, per hop.
+
+    python benchmarks/bench_memory.py --hops 1000000
+
+Builds the same synthetic traces three ways and reports the memory each
+retains (tracemalloc) and the time to build it:
+
+  dataclass   a list of plain dataclass hops, as before TraceResult.hops was compact
+  slotted     a list of HopResult (slotted dataclass)
+  columns     TraceResult.hops (the array-backed Hops container)
+
+Field values are fresh strings per hop, as a parser or a probe loop makes them.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from traceroute.results import HopResult, TraceResult
+
+PROTOCOLS = ("ICMP", "UDP", "TCP")
+
+
+@dataclass
+class DictHop:
+    ttl: int
+    ip: str
+    rtt: float
+    hostname: Optional[str] = None
+    protocol: str = "ICMP"
+    loss: bool = False
+    inferred: bool = False
+    rtt_source: Optional[str] = None
+
+
+def fresh(value):
+    """An equal but separate string object, like one sliced out of a parsed line."""
+    return value[:1] + value[1:]
+
+
+def hop_values(n_hops, hops_per_trace, routers):
+    """(trace number, field values) of n_hops synthetic hops; about one in ten is a lost probe."""
+    for i in range(n_hops):
+        trace, pos = divmod(i, hops_per_trace)
+        ttl = pos // 3 + 1
+        protocol = fresh(PROTOCOLS[pos % 3])
+        if (trace + pos) % 10 == 0:
+            yield trace, (ttl, fresh("*"), 0.0, None, protocol, True, False, None)
+            continue
+        router = (trace * 7 + ttl * 131) % routers
+        ip = f"10.{router >> 16 & 255}.{router >> 8 & 255}.{router & 255}"
+        hostname = f"r{router}.example.net" if router % 4 == 0 else None
+        yield trace, (ttl, ip, ttl * 1.7 + pos * 0.01, hostname, protocol, False, False, fresh("packet"))
+
+
+def build(kind, n_hops, hops_per_trace, routers):
+    cls = DictHop if kind == "dataclass" else HopResult
+    traces = []
+    for trace, values in hop_values(n_hops, hops_per_trace, routers):
+        if trace == len(traces):
+            traces.append(TraceResult(destination=f"192.0.{trace >> 8 & 255}.{trace & 255}") if kind == "columns" else [])
+        if kind == "columns":
+            traces[-1].hops.add(*values)
+        else:
+            traces[-1].append(cls(*values))
+    return traces
+
+
+def measure(kind, n_hops, hops_per_trace, routers):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    traces = build(kind, n_hops, hops_per_trace, routers)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traces
+    print(f"{kind:>10}: {current / n_hops:>7.1f} bytes/hop  {current / (1 << 20):>8.1f} MB retained  {peak / (1 << 20):>8.1f} MB peak  built in {elapsed:.2f}s")
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory size of trace results")
+    parser.add_argument("--hops", type=int, default=1_000_000, help="Hops to build")
+    parser.add_argument("--hops-per-trace", type=int, default=45, help="15 TTLs x 3 protocols by default")
+    parser.add_argument("--routers", type=int, default=50_000, help="Distinct router addresses")
+    args = parser.parse_args()
+
+    sizes = {kind: measure(kind, args.hops, args.hops_per_trace, args.routers) for kind in ("dataclass", "slotted", "columns")}
+    print(f"columns use {sizes['columns'] / sizes['dataclass']:.1%} of the dataclass footprint")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Throughput benchmark for traceroute.trace_parser on a synthetic results file.
+
+    python benchmarks/bench_parser.py --size-mb 4096 --workers 8
+
+Generates (or reuses, with --path) a results file in the cli.py text format
+and reports lines/sec for the streaming parser and the process-pool parser.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from traceroute.trace_parser import iter_traces, parse_parallel
+
+PROTOCOLS = ("ICMP", "UDP", "TCP")
+
+
+def generate(path, size_mb, max_ttl=15, series=3):
+    """Write synthetic traces until the file reaches ``size_mb``; return the line count."""
+    target = size_mb << 20
+    lines = 0
+    with open(path, "w") as f:
+        i = 0
+        while f.tell() < target:
+            block = [f"Trace to 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:\n"]
+            for ttl in range(1, max_ttl + 1):
+                for s in range(series):
+                    for proto in PROTOCOLS:
+                        if (i + ttl + s) % 11 == 0:
+                            block.append(f"TTL {ttl}: * () [{proto}] RTT=0.00ms LOSS\n")
+                        else:
+                            block.append(f"TTL {ttl}: 172.16.{ttl}.{i % 200} (r{ttl}.example.net) [{proto}] RTT={ttl * 1.7 + s:.2f}ms \n")
+            block.append("\n")
+            f.write("".join(block))
+            lines += len(block)
+            i += 1
+    return lines
+
+
+def measure(name, traces, lines, size):
+    start = time.perf_counter()
+    hops = sum(len(t.hops) for t in traces)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {lines / elapsed:>12,.0f} lines/s  {size / elapsed / (1 << 20):>8.1f} MB/s  ({hops:,} hops in {elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trace result parser")
+    parser.add_argument("--size-mb", type=int, default=512, help="Size of the synthetic file")
+    parser.add_argument("--path", help="Existing results file to parse instead of generating one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Process pool size")
+    args = parser.parse_args()
+
+    path = args.path
+    tmp = None
+    if path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix="_trace_results.txt", delete=False)
+        tmp.close()
+        path = tmp.name
+        print(f"Generating {args.size_mb} MB synthetic results in {path}...")
+        lines = generate(path, args.size_mb)
+    else:
+        with open(path, "rb") as f:
+            lines = sum(1 for _ in f)
+    size = os.path.getsize(path)
+    print(f"{lines:,} lines, {size / (1 << 20):.0f} MB")
+
+    try:
+        measure("streaming", iter_traces(path), lines, size)
+        measure("parallel", parse_parallel(path, workers=args.workers), lines, size)
+    finally:
+        if tmp is not None:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""End-to-end performance suite on the simulated network (no root or internet needed).
+
+    python benchmarks/suite.py                          # 10, 1k and 100k traces
+    python benchmarks/suite.py --scales 10,1000 -o run.json --baseline baseline.json
+
+Each benchmark runs once per scale and reports a rate (items/s). Results are
+written as JSON; given --baseline, any rate more than --threshold below the
+baseline's is reported as a regression and the exit status is 1. Use
+--save-baseline to record the current run as the new baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import cli
+from traceroute import simnet
+from traceroute.runner import run_traceroute
+from traceroute.simnet import SimNetwork
+from traceroute.writer import format_text
+
+DEFAULT_SCALES = (10, 1000, 100_000)
+
+
+def network(seed=0):
+    return SimNetwork(seed=seed, loss=0.02, silent=0.05, unreachable=0.05)
+
+
+def targets(n):
+    return [f"192.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(n)]
+
+
+def synthetic_traces(n):
+    net = network()
+    return [net.trace(dst) for dst in targets(n)]
+
+
+def bench_trace(n, workdir):
+    """run_traceroute against the simulated network; rate is probes/s."""
+    net = network()
+    backend = net.backend()
+    start = time.perf_counter()
+    for dst in targets(n):
+        run_traceroute(dst, wait=0, gap_limit=5, backend=backend)
+    return time.perf_counter() - start, net.probes_sent, "probes"
+
+
+def bench_batch(n, workdir):
+    """cli.py end to end: load targets, trace concurrently, stream results to disk."""
+    path = os.path.join(workdir, "targets.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(targets(n)) + "\n")
+    net = network()
+    argv = ["cli.py", "-i", path, "-o", os.path.join(workdir, "batch.txt"), "-n", "--wait", "0", "--backend", "sim", "--concurrency", "8", "--gap-limit", "5"]
+    start = time.perf_counter()
+    with patch.object(sys, "argv", argv), patch.object(simnet, "_default_network", net), redirect_stdout(StringIO()):
+        cli.main()
+    return time.perf_counter() - start, n, "traces"
+
+
+def bench_sharded(n, workdir):
+    """bench_batch split over one process per core (--processes) and merged; compare with batch for scaling."""
+    path = os.path.join(workdir, "targets.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(targets(n)) + "\n")
+    net = network()
+    argv = ["cli.py", "-i", path, "-o", os.path.join(workdir, "sharded.jsonl"), "-n", "--wait", "0", "--backend", "sim", "--concurrency", "8", "--gap-limit", "5", "--processes", str(os.cpu_count() or 1)]
+    start = time.perf_counter()
+    # Shard processes are forked, so they inherit the patched network
+    with patch.object(sys, "argv", argv), patch.object(simnet, "_default_network", net), redirect_stdout(StringIO()):
+        cli.main()
+    return time.perf_counter() - start, n, "traces"
+
+
+def bench_parse(n, workdir):
+    """visualizer.parse_trace on a results file of n traces; rate is lines/s."""
+    from visualizer.visualizer import parse_trace
+
+    path = os.path.join(workdir, "parse.txt")
+    with open(path, "w") as f:
+        for trace in synthetic_traces(n):
+            f.write(format_text(trace))
+    with open(path, "rb") as f:
+        lines = sum(1 for _ in f)
+    start = time.perf_counter()
+    parse_trace(path)
+    return time.perf_counter() - start, lines, "lines"
+
+
+def bench_graph(n, workdir):
+    """build_topology over n traces; rate is hops/s."""
+    from visualizer.graph import build_topology
+
+    traces = synthetic_traces(n)
+    hops = sum(len(t.hops) for t in traces)
+    start = time.perf_counter()
+    build_topology(traces)
+    return time.perf_counter() - start, hops, "hops"
+
+
+def bench_layout(n, workdir):
+    """Layered layout of the topology of n traces; rate is nodes/s."""
+    from visualizer.graph import build_topology
+    from visualizer.layout import compute_layout
+
+    G = build_topology(synthetic_traces(n))
+    start = time.perf_counter()
+    compute_layout(G)
+    return time.perf_counter() - start, G.number_of_nodes(), "nodes"
+
+
+BENCHMARKS = {
+    "trace": bench_trace,
+    "batch": bench_batch,
+    "sharded": bench_sharded,
+    "parse": bench_parse,
+    "graph": bench_graph,
+    "layout": bench_layout,
+}
+
+
+def run(names, scales):
+    results = []
+    for name in names:
+        for n in scales:
+            with tempfile.TemporaryDirectory() as workdir:
+                seconds, items, unit = BENCHMARKS[name](n, workdir)
+            rate = items / seconds if seconds else float("inf")
+            results.append({"benchmark": name, "scale": n, "seconds": seconds, "items": items, "unit": unit, "rate": rate})
+            print(f"{name:>8} {n:>8,} traces: {rate:>14,.0f} {unit}/s  ({items:,} {unit} in {seconds:.3f}s)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a message for every result whose rate fell more than ``threshold`` below the baseline."""
+    before = {(r["benchmark"], r["scale"]): r["rate"] for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = before.get((r["benchmark"], r["scale"]))
+        if old and r["rate"] < old * (1 - threshold):
+            regressions.append(f"{r['benchmark']} @ {r['scale']:,}: {r['rate']:,.0f} {r['unit']}/s vs {old:,.0f} baseline ({r['rate'] / old - 1:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance suite on the simulated network")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="Comma-separated trace counts")
+    parser.add_argument("--only", help="Comma-separated benchmarks to run (default: all of %s)" % ", ".join(BENCHMARKS))
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Where to write this run's results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to --baseline")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    scales = [int(s) for s in args.scales.split(",")]
+
+    results = run(names, scales)
+    report = {
+        "meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    status = 0
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        status = 1 if regressions else 0
+    elif args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
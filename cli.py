@@ -1,49 +1,267 @@
+import copy
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from traceroute import parser
-from traceroute.runner import run_traceroute
+from traceroute.dns import ForwardResolver, ReverseResolver
+from traceroute.metrics import Metrics, MetricsReporter
+from traceroute.runner import PROTOCOLS, run_batch, run_traceroute
+from traceroute.stopsets import StopSets
+from traceroute.results import TraceResult
+from traceroute.targets import iter_names, load_targets
+from traceroute.writer import open_writer
 import os
 
 
 def main():
     arg_parser = parser.get_arg_parser()
     args = arg_parser.parse_args()
+    if not args.profile:
+        sys.exit(run(args, arg_parser))
+
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        status = profiler.runcall(run, args, arg_parser)
+    finally:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+        print(f"Profile written to {args.profile}", file=sys.stderr)
+    sys.exit(status)
 
-    # Read IP addresses from input file
-    with open(args.input) as f:
-        ips = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-    if not ips:
-        print("No IP addresses found in input file.", file=sys.stderr)
-        sys.exit(1)
 
-    print(f"Loaded {len(ips)} IP addresses.")
+def run(args, arg_parser):
+    """Trace the targets of ``args``; returns the exit status."""
+    # Engines that need scapy, NumPy etc. are imported only when selected, so --help stays fast
+    if args.sweep:
+        from traceroute.sweep import SWEEP_PROTOCOLS, run_sweep
+        if (args.P or "ICMP") not in SWEEP_PROTOCOLS:
+            arg_parser.error(f"--sweep supports only {', '.join(SWEEP_PROTOCOLS)} probes")
+    if args.doubletree and (args.sweep or args.engine == "parallel"):
+        arg_parser.error("--doubletree requires the sequential engine")
+    if args.backend != "scapy" and (args.sweep or args.engine == "parallel"):
+        arg_parser.error(f"--backend {args.backend} requires the sequential engine")
+    if args.monitor and (args.sweep or args.doubletree):
+        arg_parser.error("--monitor cannot be combined with --sweep or --doubletree")
+    if args.retrace_changed and (args.sweep or args.doubletree or args.monitor):
+        arg_parser.error("--retrace-changed cannot be combined with --sweep, --doubletree or --monitor")
+    if args.processes > 1 and (args.shard or args.monitor or args.resume):
+        arg_parser.error("--processes cannot be combined with --shard, --monitor or --resume")
 
     output_file = os.path.splitext(args.input)[0] + "_trace_results.txt"
-    if hasattr(args, 'output') and args.output:
+    if args.output:
         output_file = args.output
 
-    all_results = []
-    for ip in ips:
-        print(f"Tracing {ip}...")
-        result = run_traceroute(
-            ip,
-            max_ttl=args.m,
-            init_ttl=args.M,
-            series=args.series,
-            dport=args.p or 33434,
-            wait=args.wait,
-            resolve_host=not args.n
-        )
-        all_results.append(result)
-
-    # Write raw results to text file
-    with open(output_file, "w") as f:
-        for trace in all_results:
-            f.write(f"Trace to {trace.destination}:\n")
-            for hop in trace.hops:
-                f.write(f"TTL {hop.ttl}: {hop.ip} ({hop.hostname or ''}) [{hop.protocol}] RTT={hop.rtt:.2f}ms {'LOSS' if hop.loss else ''}\n")
-            f.write("\n")
+    if args.processes > 1:
+        return run_processes(args, output_file)
+
+    # Names (plain lists or rank,domain CSVs) are resolved concurrently and each address is traced once
+    names = iter_names(args.input)
+    if args.shard:
+        # Shard by name: vantage hosts may resolve a name to different addresses
+        from traceroute.sharding import select
+        k, n = args.shard
+        names = select(list(names), k, n, args.shard_by)
+        print(f"Shard {k}/{n}: {len(names)} targets.")
+    with ForwardResolver(workers=args.dns_workers, timeout=args.dns_timeout) as forward:
+        targets = load_targets(names, forward)
+    for name in targets.unresolved:
+        print(f"Could not resolve {name}, skipping.", file=sys.stderr)
+    ips = targets.ips
+    if not ips:
+        print("No IP addresses found in input file.", file=sys.stderr)
+        return 1
+
+    print(f"Loaded {targets.n_names} targets ({len(ips)} unique IP addresses).")
+
+    # Results are streamed to disk as each trace finishes
+    meta = {"input": args.input, "max_ttl": args.m, "series": args.series}
+    if args.shard:
+        meta["shard"] = "%d/%d" % args.shard
+    if args.vantage:
+        meta["vantage"] = args.vantage
+    writer = open_writer(output_file, fmt=args.format, resume=args.resume, meta=meta)
+    done = set(writer.completed)
+    if done:
+        ips = [ip for ip in ips if any(name not in done for name in targets.names_for(ip))]
+        print(f"Resuming: {len(done)} destinations already in {output_file}, {len(ips)} left.")
+
+    metrics = Metrics()
+    reporter = MetricsReporter(metrics, args.metrics_file, args.metrics_interval) if args.metrics_file else None
+
+    protocols = [args.P] if args.P else list(PROTOCOLS)
+    if args.engine == "parallel":
+        from traceroute.parallel import run_parallel_traceroute
+        trace_fn = run_parallel_traceroute
+        trace_kwargs = {"timeout": args.timeout, "protocols": protocols}
+    else:
+        trace_fn = run_traceroute
+        trace_kwargs = {"wait": args.wait, "timeout": args.timeout, "adaptive_timeout": args.adaptive_timeout, "gap_limit": args.gap_limit, "protocols": protocols, "adaptive_series": args.adaptive, "backend": args.backend}
+        if args.doubletree:
+            trace_kwargs["stop_sets"] = StopSets(start_ttl=args.start_ttl)
+
+    # Reverse DNS runs beside the probes; the tracers only queue lookups
+    resolver = None
+    if not args.n:
+        resolver = ReverseResolver(workers=args.dns_workers, timeout=args.dns_timeout, cache_file=args.dns_cache)
+        metrics.resolver = resolver
+        if trace_fn is run_traceroute:
+            trace_kwargs["resolver"] = resolver
+
+    if args.retrace_changed:
+        from traceroute.fingerprint import load_traces, make_retracer
+        # Earlier results are keyed by name; the tracers work on addresses
+        previous = (TraceResult(targets.address.get(t.destination, t.destination), t.hops, t.raw) for t in load_traces(args.retrace_changed))
+        trace_fn = make_retracer(previous, trace_fn, spot_checks=args.spot_checks)
+
+    store = None
+    if args.store:
+        from traceroute.store import StoreWriter
+        store = StoreWriter(args.store, append=args.resume)
+
+    def save(trace):
+        if resolver is not None:
+            with metrics.time("dns"):
+                resolver.annotate(trace)
+        with metrics.time("write"):
+            for named in targets.expand(trace):
+                if named.destination in done:
+                    continue
+                writer.write(named)
+                if store is not None:
+                    store.write(named)
+
+    try:
+        if args.sweep:
+            print(f"Sweeping {len(ips)} targets x TTL {args.M}-{args.m}...")
+            for trace in run_sweep(
+                ips,
+                max_ttl=args.m,
+                init_ttl=args.M,
+                pps=args.pps or 1000,
+                protocol=args.P or "ICMP",
+                dport=args.p or 80,
+                timeout=args.timeout,
+                metrics=metrics
+            ):
+                metrics.inc("traces_completed")
+                save(trace)
+        elif args.monitor:
+            from traceroute.monitor import Monitor
+            monitor = Monitor(
+                ips,
+                trace_fn=trace_fn,
+                history=args.history,
+                concurrency=args.concurrency,
+                resolver=resolver,
+                on_snapshot=save,
+                snapshot_interval=args.snapshot_interval,
+                metrics=metrics,
+                pps=args.pps,
+                per_dest_pps=args.per_dest_pps,
+                max_outstanding=args.max_outstanding,
+                max_ttl=args.m,
+                init_ttl=args.M,
+                series=args.series,
+                dport=args.p or 33434,
+                **trace_kwargs
+            )
+            print(f"Monitoring {len(monitor.targets)} targets, Ctrl-C to stop...")
+            try:
+                monitor.run(cycles=args.cycles, interval=args.interval, on_cycle=lambda m: print(f"\n--- cycle {m.cycles} ---\n{m.report()}"))
+            except KeyboardInterrupt:
+                pass
+            finally:
+                monitor.snapshot()
+                monitor.close()
+        else:
+            results = run_batch(
+                ips,
+                trace_fn=trace_fn,
+                concurrency=args.concurrency,
+                pps=args.pps,
+                per_dest_pps=args.per_dest_pps,
+                max_outstanding=args.max_outstanding,
+                metrics=metrics,
+                max_ttl=args.m,
+                init_ttl=args.M,
+                series=args.series,
+                dport=args.p or 33434,
+                **trace_kwargs
+            )
+            for i, result in enumerate(results, 1):
+                print(f"[{i}/{len(ips)}] Traced {result.destination}")
+                save(result)
+    finally:
+        writer.close()
+        if store is not None:
+            store.close()
+        if resolver is not None:
+            resolver.close()
+        if reporter is not None:
+            reporter.stop()
 
     print(f"Results written to {output_file}")
+    print(metrics.summary())
+    return 0
+
+
+def run_shard(args):
+    return run(args, parser.get_arg_parser())
+
+
+def run_processes(args, output_file):
+    """Trace every shard in its own process (own probe sockets, no shared GIL), then merge the outputs.
+
+    Shards also get their own trace store and DNS cache, seeded from the
+    shared cache, so no two processes write the same file.
+    """
+    from traceroute.sharding import merge, merge_stores, shard_path, split
+    # No process for a shard without targets
+    names = list(iter_names(args.input))
+    n = max(1, min(args.processes, len(names)))
+    shards = []
+    for k, targets in enumerate(split(names, n, args.shard_by), 1):
+        if not targets:
+            continue
+        shard = copy.copy(args)
+        shard.processes = 1
+        shard.shard = (k, n)
+        shard.output = shard_path(output_file, k)
+        shard.format = "jsonl"
+        shard.profile = None
+        shard.metrics_file = f"{args.metrics_file}.shard{k}" if args.metrics_file else None
+        shard.store = f"{args.store}.shard{k}" if args.store else None
+        shard.dns_cache = f"{args.dns_cache}.shard{k}" if args.dns_cache else None
+        if args.dns_cache and not args.n and os.path.exists(args.dns_cache):
+            shutil.copyfile(args.dns_cache, shard.dns_cache)
+        shards.append(shard)
+
+    if not shards:
+        print("No IP addresses found in input file.", file=sys.stderr)
+        return 1
+
+    print(f"Tracing {len(shards)} shards in {len(shards)} processes...")
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        # Surface the first failing shard; a shard with nothing to trace only reports it
+        statuses = list(pool.map(run_shard, shards))
+    if args.dns_cache and not args.n:
+        cache = ReverseResolver(cache_file=args.dns_cache)
+        for shard in shards:
+            if os.path.exists(shard.dns_cache):
+                cache.load(shard.dns_cache)
+                os.remove(shard.dns_cache)
+        cache.close()
+    traced = [shard for shard, status in zip(shards, statuses) if status == 0]
+    if not traced:
+        return 1
+    counts = merge([shard.output for shard in traced], output_file, fmt=args.format)
+    print(f"Merged {counts['traces']} traces from {len(traced)} shards into {output_file}")
+    if args.store:
+        n_traces = merge_stores([shard.store for shard in traced], args.store)
+        print(f"Merged {n_traces} traces from {len(traced)} shard stores into {args.store}")
+    return 0
 
 if __name__ == "__main__":
     main()
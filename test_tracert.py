@@ -1,10 +1,11 @@
 import argparse
-import csv
 import os
-import subprocess
 import sys
 from datetime import datetime
 
+from traceroute.targets import iter_names
+from traceroute.validate import compare, run_system_trace, run_system_traces
+
 
 def run_windows_tracert(target, max_hops=30, timeout_ms=4000, resolve_names=True):
     """
@@ -19,37 +20,21 @@ def run_windows_tracert(target, max_hops=30, timeout_ms=4000, resolve_names=True
     Returns:
         str: Output of the tracert command
     """
-    cmd = ["tracert"]
-    
-    if not resolve_names:
-        cmd.append("-d")
-    
-    cmd.extend(["-h", str(max_hops)])
-    cmd.extend(["-w", str(timeout_ms)])
-    cmd.append(target)
-    
-    try:
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            check=False
-        )
-        return result.stdout
-    except Exception as e:
-        print(f"Error running tracert for {target}: {str(e)}", file=sys.stderr)
-        return f"ERROR: {str(e)}"
+    return run_system_trace(target, max_hops=max_hops, timeout=timeout_ms / 1000, resolve_names=resolve_names, platform="win32")
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Windows Tracert Tool for TopologyAnalyzer")
+    parser = argparse.ArgumentParser(description="System traceroute/tracert validation tool for TopologyAnalyzer")
     
-    parser.add_argument("-i", "--input", required=True, help="Input CSV file with URLs (Cisco format)")
+    parser.add_argument("-i", "--input", required=True, help="Input file with targets (plain list or Cisco rank,domain CSV)")
     parser.add_argument("-o", "--output", help="Output file for results (default: input_tracert_results.txt)")
     parser.add_argument("-m", "--max-hops", type=int, default=30, help="Maximum number of hops")
     parser.add_argument("-w", "--timeout", type=int, default=4000, help="Wait timeout in milliseconds")
     parser.add_argument("-n", "--no-resolve", action="store_true", help="Do not resolve hostnames")
     parser.add_argument("-l", "--limit", type=int, help="Limit number of URLs to process")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent traceroute processes")
+    parser.add_argument("-P", "--protocol", choices=["UDP", "ICMP", "TCP"], default="UDP", help="Probe protocol of the system traceroute (tracert is always ICMP)")
+    parser.add_argument("--compare", metavar="RESULTS", help="Our results for the same targets (text, .jsonl or trace store) to check hop agreement and RTTs against")
     
     args = parser.parse_args()
     
@@ -57,13 +42,8 @@ def main():
     if not output_file:
         output_file = os.path.splitext(args.input)[0] + "_tracert_results.txt"
     
-    urls = []
     try:
-        with open(args.input, 'r') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) >= 2:
-                    urls.append(row[1])
+        urls = list(iter_names(args.input))
     except Exception as e:
         print(f"Error reading input file: {str(e)}", file=sys.stderr)
         return
@@ -73,31 +53,39 @@ def main():
     
     print(f"Loaded {len(urls)} URLs from {args.input}")
     
+    system_traces = []
     with open(output_file, 'w') as f:
-        f.write(f"# Windows Tracert Results\n")
+        f.write(f"# System Traceroute Results\n")
         f.write(f"# Generated: {datetime.now()}\n")
         f.write(f"# Input: {args.input}\n")
         f.write(f"# Max Hops: {args.max_hops}\n")
         f.write(f"# Timeout: {args.timeout}ms\n")
         f.write(f"# Resolve Names: {not args.no_resolve}\n\n")
         
-        for i, url in enumerate(urls, 1):
-            print(f"[{i}/{len(urls)}] Tracing route to {url}...")
-            
-            result = run_windows_tracert(
-                url,
-                max_hops=args.max_hops,
-                timeout_ms=args.timeout,
-                resolve_names=not args.no_resolve
-            )
+        results = run_system_traces(
+            urls,
+            workers=args.workers,
+            protocol=args.protocol,
+            max_hops=args.max_hops,
+            timeout=args.timeout / 1000,
+            resolve_names=not args.no_resolve
+        )
+        for i, (url, trace) in enumerate(results, 1):
+            print(f"[{i}/{len(urls)}] Traced route to {url}")
+            system_traces.append(trace)
             
             f.write(f"{'='*80}\n")
             f.write(f"URL #{i}: {url}\n")
             f.write(f"{'='*80}\n\n")
-            f.write(result)
+            f.write(trace.raw)
             f.write("\n\n")
     
     print(f"Results written to {output_file}")
+    
+    if args.compare:
+        from traceroute.fingerprint import load_traces
+        protocol = "ICMP" if sys.platform.startswith("win") else args.protocol
+        print(compare(load_traces(args.compare), system_traces, protocol=protocol).summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import pytest
+from traceroute.base import Probe
+
+
+def test_rtt_from_packet_timestamps():
+    resp = SimpleNamespace(sent_time=100.0, time=Decimal('100.0005'))
+    rtt, source = Probe.rtt(resp, 5.0, 5.010)
+    assert rtt == pytest.approx(0.5)
+    assert source == 'packet'
+
+
+def test_rtt_keeps_declared_source():
+    resp = SimpleNamespace(sent_time=100.0, time=100.001, time_source='kernel')
+    assert Probe.rtt(resp, 5.0, 5.010) == (pytest.approx(1.0), 'kernel')
+
+
+@pytest.mark.parametrize('resp', [
+    SimpleNamespace(time=100.0),                    # no send stamp
+    SimpleNamespace(sent_time=100.0, time=99.0),    # clock stepped backwards
+    SimpleNamespace(sent_time=100.0, time=160.0),   # longer than the call itself
+    MagicMock(),
+])
+def test_rtt_falls_back_to_monotonic(resp):
+    rtt, source = Probe.rtt(resp, 5.0, 5.010)
+    assert rtt == pytest.approx(10.0)
+    assert source == 'monotonic'
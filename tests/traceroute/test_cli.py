@@ -0,0 +1,29 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import cli
+from traceroute import parser
+from traceroute.writer import read_traces
+
+
+def test_more_processes_than_targets_still_merge(tmp_path, capsys):
+    targets = tmp_path / 'in.txt'
+    targets.write_text('192.0.2.1\n192.0.2.2\n')
+    out = str(tmp_path / 'out.jsonl')
+    args = parser.get_arg_parser().parse_args(['-i', str(targets), '--processes', '4', '--shard-by', 'range', '--backend', 'sim', '-n', '-m', '3', '--wait', '0', '--series', '1', '-o', out])
+
+    assert cli.run(args, None) == 0
+    assert sorted(t.destination for t in read_traces(out)) == ['192.0.2.1', '192.0.2.2']
+    # At most one process per target
+    assert 'Tracing 2 shards in 2 processes' in capsys.readouterr().out
+
+
+def test_processes_skip_empty_hash_shards(tmp_path, capsys):
+    targets = tmp_path / 'in.txt'
+    # Both names hash to the same of two shards
+    targets.write_text('192.0.2.1\n192.0.2.2\n')
+    out = str(tmp_path / 'out.jsonl')
+    args = parser.get_arg_parser().parse_args(['-i', str(targets), '--processes', '4', '--backend', 'sim', '-n', '-m', '3', '--wait', '0', '--series', '1', '-o', out])
+
+    assert cli.run(args, None) == 0
+    assert len(list(read_traces(out))) == 2
+    assert 'Tracing 1 shards in 1 processes' in capsys.readouterr().out
@@ -0,0 +1,109 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import threading
+import time
+import pytest
+from traceroute.dns import ReverseResolver
+from traceroute.results import HopResult, TraceResult
+
+NAMES = {'1.1.1.1': 'one.one.one.one', '8.8.8.8': 'dns.google'}
+
+
+class FakeLookup:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, ip):
+        with self.lock:
+            self.calls.append(ip)
+        time.sleep(self.delay)
+        return NAMES.get(ip)
+
+
+class FakeClock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_annotate_deduplicates_lookups():
+    lookup = FakeLookup()
+    trace = TraceResult(destination='8.8.8.8', hops=[
+        HopResult(ttl=1, ip='1.1.1.1', rtt=1, protocol=proto) for proto in ('ICMP', 'UDP', 'TCP')
+    ] + [HopResult(ttl=2, ip='*', rtt=0, loss=True), HopResult(ttl=3, ip='8.8.8.8', rtt=3)])
+
+    with ReverseResolver(lookup=lookup) as resolver:
+        resolver.annotate(trace)
+        resolver.annotate(TraceResult(destination='x', hops=[HopResult(ttl=1, ip='1.1.1.1', rtt=1)]))
+
+    assert sorted(lookup.calls) == ['1.1.1.1', '8.8.8.8']
+    assert [h.hostname for h in trace.hops] == ['one.one.one.one'] * 3 + [None, 'dns.google']
+    assert resolver.misses == 2
+    assert resolver.hits == 1
+
+
+def test_prefetched_lookups_are_counted_once():
+    lookup = FakeLookup()
+    ips = list(NAMES)
+    trace = TraceResult(destination='8.8.8.8', hops=[HopResult(ttl=i, ip=ip, rtt=i) for i, ip in enumerate(ips, 1)])
+
+    with ReverseResolver(lookup=lookup) as resolver:
+        resolver.prefetch(ips)
+        resolver.prefetch(ips)
+        resolver.annotate(trace)
+        assert (resolver.hits, resolver.misses) == (0, 2)
+        # Already named: nothing to look up or count
+        resolver.annotate(trace)
+        assert (resolver.hits, resolver.misses) == (0, 2)
+        resolver.annotate(TraceResult(destination='x', hops=[HopResult(ttl=1, ip=ips[0], rtt=1)]))
+
+    assert (resolver.hits, resolver.misses) == (1, 2)
+
+
+def test_negative_answers_are_cached_and_expire():
+    lookup, clock = FakeLookup(), FakeClock()
+    with ReverseResolver(lookup=lookup, negative_ttl=60, clock=clock) as resolver:
+        assert resolver.resolve('10.0.0.1') is None
+        assert resolver.resolve('10.0.0.1') is None
+        assert lookup.calls == ['10.0.0.1']
+
+        clock.now += 61
+        resolver.resolve('10.0.0.1')
+        assert lookup.calls == ['10.0.0.1', '10.0.0.1']
+
+
+def test_lookup_timeout_does_not_block():
+    with ReverseResolver(lookup=FakeLookup(delay=0.5), timeout=0.05) as resolver:
+        start = time.time()
+        assert resolver.resolve('1.1.1.1') is None
+        assert time.time() - start < 0.4
+
+
+def test_lookups_run_concurrently():
+    lookup = FakeLookup(delay=0.2)
+    with ReverseResolver(lookup=lookup, workers=8) as resolver:
+        start = time.time()
+        resolver.resolve_all([f'10.0.0.{i}' for i in range(8)])
+        assert time.time() - start < 1.0
+
+
+def test_disk_cache_round_trip(tmp_path):
+    path = str(tmp_path / 'rdns.json')
+    clock = FakeClock()
+    with ReverseResolver(lookup=FakeLookup(), cache_file=path, ttl=100, clock=clock) as resolver:
+        resolver.resolve_all(['1.1.1.1', '8.8.8.8'])
+
+    lookup = FakeLookup()
+    with ReverseResolver(lookup=lookup, cache_file=path, clock=clock) as resolver:
+        assert resolver.resolve('1.1.1.1') == 'one.one.one.one'
+    assert lookup.calls == []
+
+    # Expired entries are dropped on load
+    clock.now += 101
+    lookup = FakeLookup()
+    with ReverseResolver(lookup=lookup, cache_file=path, clock=clock) as resolver:
+        resolver.resolve('1.1.1.1')
+    assert lookup.calls == ['1.1.1.1']
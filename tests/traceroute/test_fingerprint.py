@@ -0,0 +1,91 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from unittest.mock import MagicMock
+from traceroute.fingerprint import FingerprintIndex, PathChange, compare, divergence, fingerprints, load_traces, main, make_retracer, spot_ttls, trace_paths
+from traceroute.results import HopResult, TraceResult
+from traceroute.writer import open_writer
+
+
+def trace(dst, *ips, protocol='ICMP'):
+    hops = [HopResult(ttl=ttl, ip=ip, rtt=1.0, protocol=protocol, loss=ip == '*') for ttl, ip in enumerate(ips, 1)]
+    return TraceResult(destination=dst, hops=hops)
+
+
+def test_trace_paths_per_protocol():
+    t = TraceResult('d', [
+        HopResult(1, '*', 0, protocol='ICMP', loss=True),
+        HopResult(1, 'a', 1.0, protocol='ICMP'),
+        HopResult(1, 'x', 1.0, protocol='UDP'),
+        HopResult(3, 'c', 1.0, protocol='ICMP'),
+        HopResult(3, 'd', 1.0, protocol='ICMP'),
+    ])
+    assert trace_paths(t) == {'ICMP': ('a', '*', 'c'), 'UDP': ('x',)}
+
+
+def test_fingerprints_are_stable_and_path_sensitive():
+    a = trace('d', 'r1', 'r2', 'd')
+    assert a.fingerprint() == fingerprints(trace('d', 'r1', 'r2', 'd'))
+    assert a.fingerprint() != trace('d', 'r1', 'r3', 'd').fingerprint()
+    assert a.fingerprint()['ICMP'] != trace('d', 'r1', 'r2', 'd', protocol='UDP').fingerprint().get('ICMP')
+    assert 0 <= a.fingerprint()['ICMP'] < 2 ** 64
+
+
+def test_divergence():
+    assert divergence(('a', 'b'), ('a', 'b')) is None
+    assert divergence(('a', 'b', 'c'), ('a', 'x', 'c')) == 2
+    assert divergence(('a', 'b'), ('a', 'b', 'c')) == 3
+
+
+def test_compare_lists_changed_destinations():
+    old = [trace('d1', 'a', 'b', 'd1'), trace('d2', 'a', 'c', 'd2'), trace('gone', 'a')]
+    new = [trace('d2', 'a', 'x', 'y', 'd2'), trace('d1', 'a', 'b', 'd1'), trace('new', 'a')]
+    assert list(compare(old, new)) == [PathChange('d2', 'ICMP', 2, 'c', 'x')]
+
+
+def test_spot_ttls():
+    assert spot_ttls(('a', '*', 'c', 'd', 'e'), 3) == [1, 3, 5]
+    assert spot_ttls(('a', 'b'), 3) == [1, 2]
+    assert spot_ttls(('a', 'b', 'c'), 1) == [3]
+    assert spot_ttls(('*',), 2) == []
+
+
+def test_retracer_reuses_unchanged_and_retraces_changed():
+    previous = [trace('same', 'a', 'b', 'c', 'same'), trace('moved', 'a', 'b', 'c', 'moved')]
+    current = {'same': ['a', 'b', 'c', 'same'], 'moved': ['a', 'z', 'c', 'moved'], 'fresh': ['a', 'fresh']}
+
+    def trace_fn(target, init_ttl=1, max_ttl=30, series=3, **kw):
+        ips = current[target][init_ttl - 1:max_ttl]
+        return TraceResult(target, [HopResult(ttl, ip, 1.0) for ttl, ip in enumerate(ips, init_ttl)])
+
+    trace_fn = MagicMock(side_effect=trace_fn)
+    retrace = make_retracer(previous, trace_fn, spot_checks=3)
+
+    assert retrace('same') is previous[0]
+    assert all(call.kwargs['series'] == 1 for call in trace_fn.call_args_list)
+    assert trace_fn.call_count == 3
+
+    trace_fn.reset_mock()
+    moved = retrace('moved')
+    assert [hop.ip for hop in moved.hops] == current['moved']
+    assert trace_fn.call_args_list[-1].kwargs == {}
+
+    trace_fn.reset_mock()
+    assert [hop.ip for hop in retrace('fresh').hops] == current['fresh']
+    assert trace_fn.call_count == 1
+
+
+def test_compare_tool(tmp_path, capsys):
+    old, new = str(tmp_path / 'old.jsonl'), str(tmp_path / 'new.txt')
+    with open_writer(old) as w:
+        w.write(trace('d1', 'a', 'b', 'd1'))
+        w.write(trace('d2', 'a', 'b', 'd2'))
+    with open_writer(new) as w:
+        w.write(trace('d1', 'a', 'c', 'd1'))
+        w.write(trace('d2', 'a', 'b', 'd2'))
+    assert [t.destination for t in load_traces(new)] == ['d1', 'd2']
+    assert main([old, new]) == 1
+    out, err = capsys.readouterr()
+    assert out == 'd1 [ICMP] TTL 2: b -> c\n'
+    assert '1 of 2 destinations changed path' in err
+    assert main([old, old]) == 0
@@ -0,0 +1,54 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import re
+import subprocess
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+HEAVY = ('scapy', 'numpy', 'networkx', 'plotly', 'pandas')
+# Cumulative import time budgets (microseconds) of the project's own top-level imports
+CLI_HELP_BUDGET_US = 300_000
+RESULTS_BUDGET_US = 50_000
+
+TOP_LEVEL_RE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)$")
+
+
+def import_times(*args):
+    """Run python -X importtime and return {top-level module: cumulative us}, all imported names."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    top, names = {}, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        names.add(line.rsplit('|', 1)[1].strip())
+        m = TOP_LEVEL_RE.match(line)
+        if m:
+            top[m.group(2)] = int(m.group(1))
+    return top, names
+
+
+def own(top):
+    return sum(us for name, us in top.items() if name.split('.')[0] in ('traceroute', 'visualizer'))
+
+
+def heavy(names):
+    return sorted(name for name in names if name.split('.')[0] in HEAVY)
+
+
+def test_cli_help_skips_heavy_dependencies():
+    top, names = import_times('cli.py', '--help')
+    assert heavy(names) == []
+    assert own(top) < CLI_HELP_BUDGET_US
+
+
+def test_results_import_is_light():
+    top, names = import_times('-c', 'from traceroute.results import TraceResult')
+    assert heavy(names) == []
+    assert own(top) < RESULTS_BUDGET_US
+
+
+@pytest.mark.parametrize('module', ['traceroute.runner', 'traceroute.writer', 'traceroute.trace_parser', 'visualizer.visualizer'])
+def test_modules_load_heavy_dependencies_lazily(module):
+    _, names = import_times('-c', f'import {module}')
+    assert heavy(names) == []
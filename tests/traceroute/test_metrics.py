@@ -0,0 +1,87 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import time
+import pytest
+from unittest.mock import MagicMock
+from traceroute.metrics import Histogram, Metrics, MetricsReporter
+from traceroute.runner import run_batch, run_traceroute
+from traceroute.simnet import SimNetwork
+
+
+def test_histogram_buckets_and_quantile():
+    hist = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+        hist.observe(value)
+    assert hist.counts == [1, 2, 1, 1]
+    assert list(hist.cumulative()) == [('0.01', 1), ('0.1', 3), ('1.0', 4), ('+Inf', 5)]
+    assert hist.mean == pytest.approx(5.605 / 5)
+    assert hist.quantile(0.5) == 0.1
+    assert hist.quantile(1.0) == 5.0
+
+
+def test_render_prometheus_text():
+    metrics = Metrics()
+    metrics.inc('probes_sent', 3)
+    metrics.inc('probe_replies', 2)
+    metrics.observe('receive', 0.02)
+    metrics.resolver = MagicMock(hits=3, misses=1)
+    text = metrics.render()
+    assert '# TYPE topology_probes_sent_total counter\ntopology_probes_sent_total 3\n' in text
+    assert 'topology_probe_replies_total 2\n' in text
+    assert 'topology_stage_seconds_bucket{stage="receive",le="0.025"} 1\n' in text
+    assert 'topology_stage_seconds_bucket{stage="receive",le="+Inf"} 1\n' in text
+    assert 'topology_stage_seconds_count{stage="receive"} 1\n' in text
+    assert 'topology_dns_cache_hit_ratio 0.7500\n' in text
+    assert 'topology_probes_per_second ' in text
+
+
+def test_summary_mentions_counts_and_dns():
+    metrics = Metrics()
+    metrics.inc('traces_completed')
+    metrics.observe('write', 0.001)
+    metrics.resolver = MagicMock(hits=1, misses=1)
+    summary = metrics.summary()
+    assert '1 traces (0 failed)' in summary
+    assert 'write' in summary
+    assert 'DNS cache hit rate 50%' in summary
+
+
+def test_reporter_writes_snapshots(tmp_path):
+    path = str(tmp_path / 'metrics.prom')
+    metrics = Metrics()
+    reporter = MetricsReporter(metrics, path, interval=0.01)
+    metrics.inc('probes_sent')
+    time.sleep(0.05)
+    assert os.path.exists(path)
+    metrics.inc('probes_sent')
+    reporter.stop()
+    with open(path) as f:
+        assert 'topology_probes_sent_total 2\n' in f.read()
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_run_traceroute_records_probes():
+    net = SimNetwork(seed=1, loss=0.2)
+    metrics = Metrics()
+    trace = run_traceroute('192.0.2.1', wait=0, series=2, backend=net.backend(), metrics=metrics)
+    counters = metrics.counters
+    assert counters['probes_sent'] == len(trace.hops) == net.probes_sent
+    assert counters['probe_replies'] == sum(not hop.loss for hop in trace.hops)
+    assert counters['probe_timeouts'] == sum(hop.loss for hop in trace.hops)
+    assert metrics.stages['receive'].count == len(trace.hops)
+    assert metrics.stages['send'].count == len(trace.hops)
+    assert 'wait' not in metrics.stages
+
+
+def test_run_batch_records_traces_and_errors():
+    def trace_fn(target, **kw):
+        if target == 'bad':
+            raise RuntimeError('boom')
+        return MagicMock(destination=target)
+
+    metrics = Metrics()
+    results = list(run_batch(['a', 'bad', 'b'], trace_fn=trace_fn, concurrency=2, metrics=metrics))
+    assert len(results) == 2
+    assert metrics.counters['traces_completed'] == 2
+    assert metrics.counters['trace_errors'] == 1
+    assert metrics.stages['trace'].count == 3
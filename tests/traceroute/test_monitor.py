@@ -0,0 +1,114 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import math
+import pytest
+from unittest.mock import MagicMock, patch
+from traceroute.monitor import HopStats, Monitor, PathStats, RingBuffer, reuse_probes
+from traceroute.results import HopResult, TraceResult
+from traceroute.simnet import SimNetwork
+
+
+def hop(ttl, ip, rtt=1.0):
+    return HopResult(ttl=ttl, ip=ip, rtt=rtt, loss=ip == '*')
+
+
+def test_ring_buffer_keeps_last_values():
+    ring = RingBuffer(3)
+    assert ring.values() == []
+    for value in (1, 2):
+        ring.append(value)
+    assert ring.values() == [1, 2]
+    for value in (3, 4, 5):
+        ring.append(value)
+    assert len(ring) == 3
+    assert ring.values() == [3, 4, 5]
+
+
+def test_hop_stats():
+    stats = HopStats(history=2)
+    for rtt in (10.0, 20.0, 30.0):
+        stats.add(hop(1, '10.0.0.1', rtt))
+    stats.add(hop(1, '*'))
+    assert stats.sent == 4
+    assert stats.received == 3
+    assert stats.loss == 25.0
+    assert (stats.last, stats.best, stats.worst) == (30.0, 10.0, 30.0)
+    assert stats.avg == pytest.approx(20.0)
+    assert stats.stddev == pytest.approx(10.0)
+    values = stats.recent.values()
+    assert values[0] == 30.0 and math.isnan(values[1])
+
+
+def test_path_stats_detects_changes():
+    path = PathStats('1.1.1.1')
+    assert path.update(TraceResult('1.1.1.1', [hop(1, 'a'), hop(2, 'b')]), now=1) == []
+    # A silent TTL is loss, not a change
+    assert path.update(TraceResult('1.1.1.1', [hop(1, 'a'), hop(2, '*')]), now=2) == []
+    assert path.update(TraceResult('1.1.1.1', [hop(1, 'a'), hop(2, 'c')]), now=3) == [(2, 'b', 'c')]
+    assert path.n_changes == 1
+    assert list(path.changes) == [(3, 2, 'b', 'c')]
+    assert path.hops[2].loss == pytest.approx(100 / 3)
+    report = path.report()
+    assert '1.1.1.1  (3 cycles, 1 path changes)' in report
+    assert '   2  c' in report
+
+
+def test_reuse_probes_builds_each_probe_once():
+    factory = MagicMock(side_effect=lambda: object())
+    probes = reuse_probes({'ICMP': factory})
+    assert probes['ICMP']() is probes['ICMP']()
+    assert factory.call_count == 1
+
+
+def test_reuse_probes_hold_one_scapy_socket_per_thread():
+    pytest.importorskip('scapy')
+    from scapy.all import IP
+    with patch('scapy.all.conf') as conf:
+        conf.L3socket.side_effect = lambda: MagicMock()
+        probes = reuse_probes('scapy')
+        icmp, udp = probes['ICMP'](), probes['UDP']()
+        assert icmp.l3socket is udp.l3socket
+        assert conf.L3socket.call_count == 1
+        sock = icmp.l3socket
+        sock.sr1.return_value = None
+        assert icmp.receive(IP(dst='9.9.9.9'), timeout=0.5) is None
+        sock.sr1.assert_called_once()
+        probes.close()
+        sock.close.assert_called_once()
+
+
+def test_monitor_cycles_and_snapshots():
+    net = SimNetwork(seed=2)
+    snapshots = []
+    clock = iter(range(0, 1000, 5)).__next__  # every reading is 5s later
+    sleep = MagicMock()
+    monitor = Monitor(['192.0.2.1', '192.0.2.2', '192.0.2.1'], history=5, on_snapshot=snapshots.append, snapshot_interval=20, clock=clock, sleep=sleep, backend=net.backend(), wait=0, series=1)
+    assert monitor.targets == ['192.0.2.1', '192.0.2.2']
+    monitor.run(cycles=3, interval=30)
+
+    assert monitor.cycles == 3
+    # Snapshots after the first cycle and once 20s have passed again, in the third
+    assert len(snapshots) == 4
+    assert [c.args[0] for c in sleep.call_args_list] == [15, 20]
+    stats = monitor.paths['192.0.2.1']
+    assert stats.cycles == 3
+    assert all(h.sent == 3 * 3 for h in stats.hops.values())
+    assert all(len(h.recent) == 5 for h in stats.hops.values())
+    assert '192.0.2.2  (3 cycles' in monitor.report()
+
+
+def test_monitor_keeps_its_sockets_across_cycles():
+    pytest.importorskip('scapy')
+    opened = []
+
+    def trace_fn(target, backend, **kwargs):
+        backend['ICMP']()
+        return TraceResult(destination=target, hops=[HopResult(ttl=1, ip=target, rtt=1.0)])
+
+    with patch('scapy.all.conf') as conf:
+        conf.L3socket.side_effect = lambda: opened.append(MagicMock()) or opened[-1]
+        monitor = Monitor([f'192.0.2.{i}' for i in range(1, 9)], trace_fn=trace_fn, concurrency=4, sleep=MagicMock(), backend='scapy')
+        monitor.run(cycles=50, interval=0)
+        assert 1 <= len(opened) <= 4
+        monitor.close()
+    assert all(sock.close.call_count == 1 for sock in opened)
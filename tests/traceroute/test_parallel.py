@@ -0,0 +1,117 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from scapy.all import IP, ICMP, TCP, UDP
+from traceroute.parallel import BASE_SPORT, match_reply, run_parallel_traceroute, tag_probe
+
+PATH = ['10.0.0.1', '10.0.0.2', '9.9.9.9']
+
+
+def error_reply(router, probe, icmp_type=11, code=0):
+    # Rebuild from bytes so the quoted header is dissected like a real capture
+    return IP(bytes(IP(src=router, dst='192.0.2.1') / ICMP(type=icmp_type, code=code) / bytes(probe)[:28]))
+
+
+class FakeTransport:
+    """Answers every probe as if the path were PATH, one hop per TTL."""
+
+    def __init__(self, drop=()):
+        self.drop = set(drop)
+        self.sent = []
+
+    def exchange(self, pkts, dst_ip, timeout, pace=None):
+        replies = []
+        for pkt in pkts:
+            if pace is not None:
+                pace()
+            pkt.sent_time = 100.0
+            self.sent.append(pkt)
+            ttl = pkt[IP].ttl
+            if (ttl, pkt[IP].proto) in self.drop:
+                continue
+            if ttl < len(PATH):
+                resp = error_reply(PATH[ttl - 1], pkt)
+            elif ICMP in pkt:
+                resp = IP(bytes(IP(src=dst_ip, dst='192.0.2.1') / ICMP(type=0, id=pkt[ICMP].id, seq=pkt[ICMP].seq)))
+            elif UDP in pkt:
+                resp = error_reply(dst_ip, pkt, icmp_type=3, code=3)
+            else:
+                resp = IP(bytes(IP(src=dst_ip, dst='192.0.2.1') / TCP(sport=pkt[TCP].dport, dport=pkt[TCP].sport, flags='SA')))
+            resp.time = 100.0 + ttl / 1000
+            replies.append(resp)
+        # Replies arrive in arbitrary order
+        return list(reversed(replies))
+
+
+@pytest.mark.parametrize('probe', [
+    IP(dst='9.9.9.9', ttl=2) / ICMP(),
+    IP(dst='9.9.9.9', ttl=2) / UDP(dport=33434),
+    IP(dst='9.9.9.9', ttl=2) / TCP(dport=80, flags='S'),
+])
+def test_match_reply_uses_quoted_header(probe):
+    tag_probe(probe, 17, ident=4242)
+    assert match_reply(error_reply('10.0.0.2', probe), '9.9.9.9', 4242) == 17
+    # Quoted destination belongs to another trace
+    assert match_reply(error_reply('10.0.0.2', probe), '8.8.8.8', 4242) is None
+
+
+def test_match_reply_ignores_foreign_echo_reply():
+    resp = IP(bytes(IP(src='9.9.9.9') / ICMP(type=0, id=1, seq=3)))
+    assert match_reply(resp, '9.9.9.9', 4242) is None
+
+
+def test_match_reply_tcp_from_destination():
+    resp = IP(bytes(IP(src='9.9.9.9') / TCP(sport=80, dport=BASE_SPORT + 5, flags='RA')))
+    assert match_reply(resp, '9.9.9.9', 4242) == 5
+
+
+def test_run_parallel_traceroute_orders_hops_and_stops_at_destination():
+    transport = FakeTransport(drop={(2, 17)})
+    result = run_parallel_traceroute('9.9.9.9', max_ttl=6, series=2, transport=transport)
+
+    # Every TTL is probed in a single burst
+    assert len(transport.sent) == 6 * 2 * 3
+
+    # Hops past the destination TTL are discarded
+    assert len(result.hops) == 3 * 2 * 3
+    assert [h.protocol for h in result.hops[:3]] == ['ICMP', 'UDP', 'TCP']
+    assert {h.ip for h in result.hops if h.ttl == 1} == {'10.0.0.1'}
+    assert {h.ip for h in result.hops if h.ttl == 3} == {'9.9.9.9'}
+
+    lost = [h for h in result.hops if h.loss]
+    assert len(lost) == 2
+    assert all(h.ttl == 2 and h.protocol == 'UDP' and h.ip == '*' for h in lost)
+    assert result.hops[0].rtt == pytest.approx(1.0)
+
+
+def test_run_parallel_traceroute_selected_protocols():
+    transport = FakeTransport()
+    result = run_parallel_traceroute('9.9.9.9', max_ttl=3, series=2, transport=transport, protocols=['TCP'])
+    assert len(transport.sent) == 3 * 2
+    assert {h.protocol for h in result.hops} == {'TCP'}
+
+
+def test_burst_transport_listens_until_timeout_after_last_send():
+    from unittest.mock import MagicMock, patch
+    from traceroute.parallel import BurstTransport
+
+    events = []
+    sniffer = MagicMock(results=[IP(src='10.0.0.1') / ICMP(type=11)])
+    sniffer.start.side_effect = lambda: sniffer_kwargs['started_callback']()
+    sniffer.join.side_effect = lambda timeout: events.append(('join', timeout))
+    sniffer.stop.side_effect = lambda: events.append(('stop',))
+    sock = MagicMock()
+    sock.send.side_effect = lambda pkt: events.append(('send',))
+    sniffer_kwargs = {}
+
+    def make_sniffer(**kwargs):
+        sniffer_kwargs.update(kwargs)
+        return sniffer
+
+    with patch('traceroute.parallel.AsyncSniffer', side_effect=make_sniffer), patch('traceroute.parallel.conf') as conf:
+        conf.L3socket.return_value = sock
+        replies = BurstTransport().exchange([IP(dst='9.9.9.9')] * 2, '9.9.9.9', timeout=2.0)
+
+    assert 'timeout' not in sniffer_kwargs
+    assert events == [('send',), ('send',), ('join', 2.0), ('stop',)]
+    assert len(replies) == 1
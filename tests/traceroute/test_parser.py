@@ -73,3 +73,100 @@ def test_arg_parser_protocol_TCP(arg_parser):
     args = arg_parser.parse_args(['-i', 'ips.txt', '-P', 'TCP', '-p', '33434'])
     assert args.P == 'TCP'
     assert args.p == 33434
+
+def test_arg_parser_engine(arg_parser):
+    assert arg_parser.parse_args(['-i', 'ips.txt']).engine == 'sequential'
+    assert arg_parser.parse_args(['-i', 'ips.txt', '--engine', 'parallel']).engine == 'parallel'
+    with pytest.raises(SystemExit):
+        arg_parser.parse_args(['-i', 'ips.txt', '--engine', 'foo'])
+
+def test_arg_parser_scheduler_options(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert args.concurrency == 1
+    assert args.pps == 0
+    assert args.per_dest_pps == 0
+    assert args.max_outstanding == 0
+
+    args = arg_parser.parse_args(['-i', 'ips.txt', '--concurrency', '64', '--pps', '500', '--per-dest-pps', '10', '--max-outstanding', '200'])
+    assert args.concurrency == 64
+    assert args.pps == 500
+    assert args.per_dest_pps == 10
+    assert args.max_outstanding == 200
+
+def test_arg_parser_sweep(arg_parser):
+    assert arg_parser.parse_args(['-i', 'ips.txt']).sweep is False
+    assert arg_parser.parse_args(['-i', 'ips.txt', '--sweep']).sweep is True
+
+def test_arg_parser_doubletree(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert args.doubletree is False
+    assert args.start_ttl == 5
+    args = arg_parser.parse_args(['-i', 'ips.txt', '--doubletree', '--start-ttl', '8'])
+    assert args.doubletree is True
+    assert args.start_ttl == 8
+
+def test_arg_parser_output_options(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert args.output is None
+    assert args.format is None
+    assert args.resume is False
+    args = arg_parser.parse_args(['-i', 'ips.txt', '-o', 'out.jsonl', '--format', 'jsonl', '--resume'])
+    assert args.output == 'out.jsonl'
+    assert args.format == 'jsonl'
+    assert args.resume is True
+
+def test_arg_parser_timing(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert args.timeout == 2.0
+    assert args.adaptive_timeout is False
+    assert args.gap_limit == 0
+    args = arg_parser.parse_args(['-i', 'ips.txt', '--timeout', '3', '--adaptive-timeout', '--gap-limit', '5'])
+    assert args.timeout == 3.0
+    assert args.adaptive_timeout is True
+    assert args.gap_limit == 5
+
+def test_arg_parser_adaptive_series(arg_parser):
+    assert arg_parser.parse_args(['-i', 'ips.txt']).adaptive is False
+    assert arg_parser.parse_args(['-i', 'ips.txt', '--adaptive']).adaptive is True
+
+def test_arg_parser_backend(arg_parser):
+    assert arg_parser.parse_args(['-i', 'ips.txt']).backend == 'scapy'
+    assert arg_parser.parse_args(['-i', 'ips.txt', '--backend', 'raw']).backend == 'raw'
+    with pytest.raises(SystemExit):
+        arg_parser.parse_args(['-i', 'ips.txt', '--backend', 'dpdk'])
+
+def test_arg_parser_metrics(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert args.metrics_file is None
+    assert args.metrics_interval == 10.0
+    assert args.profile is None
+    args = arg_parser.parse_args(['-i', 'ips.txt', '--metrics-file', 'm.prom', '--metrics-interval', '1', '--profile'])
+    assert args.metrics_file == 'm.prom'
+    assert args.metrics_interval == 1.0
+    assert args.profile == 'trace.prof'
+    assert arg_parser.parse_args(['-i', 'ips.txt', '--profile', 'run.prof']).profile == 'run.prof'
+
+def test_arg_parser_monitor(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert args.monitor is False
+    assert (args.cycles, args.interval, args.history, args.snapshot_interval) == (0, 10.0, 100, 300.0)
+    args = arg_parser.parse_args(['-i', 'ips.txt', '--monitor', '--cycles', '5', '--interval', '2', '--history', '20', '--snapshot-interval', '60'])
+    assert args.monitor is True
+    assert (args.cycles, args.interval, args.history, args.snapshot_interval) == (5, 2.0, 20, 60.0)
+
+def test_arg_parser_retrace_changed(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert args.retrace_changed is None
+    assert args.spot_checks == 3
+    args = arg_parser.parse_args(['-i', 'ips.txt', '--retrace-changed', 'old.jsonl', '--spot-checks', '2'])
+    assert args.retrace_changed == 'old.jsonl'
+    assert args.spot_checks == 2
+
+def test_arg_parser_sharding(arg_parser):
+    args = arg_parser.parse_args(['-i', 'ips.txt'])
+    assert (args.processes, args.shard, args.shard_by, args.vantage) == (1, None, 'hash', None)
+    args = arg_parser.parse_args(['-i', 'ips.txt', '--shard', '2/3', '--shard-by', 'range', '--vantage', 'east'])
+    assert (args.shard, args.shard_by, args.vantage) == ((2, 3), 'range', 'east')
+    assert arg_parser.parse_args(['-i', 'ips.txt', '--processes', '4']).processes == 4
+    with pytest.raises(SystemExit):
+        arg_parser.parse_args(['-i', 'ips.txt', '--shard', '4/3'])
@@ -0,0 +1,65 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import threading
+import pytest
+from traceroute.ratelimit import ProbeThrottle, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_unlimited():
+    bucket = TokenBucket(0)
+    assert all(bucket.acquire() == 0 for _ in range(1000))
+
+
+def test_token_bucket_paces_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(10, burst=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == []
+
+    # Third token has to wait for one refill interval
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.1)]
+
+    # 20 probes at 10 pps take ~2 s of wall time
+    for _ in range(20):
+        bucket.acquire()
+    assert clock.now == pytest.approx(2.1)
+
+
+def test_throttle_caps_outstanding_probes():
+    throttle = ProbeThrottle(max_outstanding=2)
+    throttle.acquire('a')
+    throttle.acquire('b')
+    assert throttle.outstanding == 2
+
+    acquired = threading.Event()
+    worker = threading.Thread(target=lambda: (throttle.acquire('c'), acquired.set()))
+    worker.start()
+    assert not acquired.wait(0.05)
+
+    throttle.release('a')
+    assert acquired.wait(1)
+    worker.join()
+    assert throttle.outstanding == 2
+
+
+def test_throttle_lets_oversized_burst_through_alone():
+    throttle = ProbeThrottle(max_outstanding=4)
+    throttle.reserve(10)
+    assert throttle.outstanding == 10
+    throttle.release('a', 10)
+    assert throttle.outstanding == 0
@@ -0,0 +1,135 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from scapy.all import IP, ICMP, TCP, UDP
+from traceroute.raw import RAW_BASE_SPORT, RawChannel, RawICMPProbe, RawTCPProbe, RawUDPProbe, adjust_checksum, checksum
+from traceroute.runner import run_traceroute
+
+PATH = ['10.0.0.1', '10.0.0.2', '9.9.9.9']
+
+
+class FakeSocket:
+    """Answers every probe as if the path were PATH, straight into the channel."""
+
+    def __init__(self):
+        self.sent = []
+        self.channel = None
+
+    def sendto(self, data, addr):
+        self.sent.append(data)
+        pkt = IP(data)
+        if pkt.ttl < len(PATH):
+            reply = IP(src=PATH[pkt.ttl - 1], dst=pkt.src) / ICMP(type=11) / data[:28]
+        elif ICMP in pkt:
+            reply = IP(src=pkt.dst, dst=pkt.src) / ICMP(type=0, id=pkt[ICMP].id, seq=pkt[ICMP].seq)
+        elif UDP in pkt:
+            reply = IP(src=pkt.dst, dst=pkt.src) / ICMP(type=3, code=3) / data[:28]
+        else:
+            reply = IP(src=pkt.dst, dst=pkt.src) / TCP(sport=pkt[TCP].dport, dport=pkt[TCP].sport, flags='SA')
+        self.channel.dispatch(bytes(reply))
+
+
+@pytest.fixture
+def channel():
+    sock = FakeSocket()
+    channel = RawChannel(ident=4242, sockets=(sock, []))
+    sock.channel = channel
+    return channel
+
+
+def valid_checksums(data):
+    # Let scapy recompute every checksum and compare
+    pkt = IP(data)
+    rebuilt = pkt.copy()
+    del rebuilt[IP].chksum
+    del rebuilt[IP].payload.chksum
+    return bytes(rebuilt) == data
+
+
+def test_adjust_checksum_matches_full_recompute():
+    data = bytearray(b"\x12\x34\x00\x00\xab\xcd\x00\x10")
+    csum = checksum(bytes(data))
+    data[4:6] = b"\x00\x11"
+    assert adjust_checksum(csum, 0xABCD, 0x0011) == checksum(bytes(data))
+
+
+@pytest.mark.parametrize('probe_cls', [RawICMPProbe, RawUDPProbe, RawTCPProbe])
+def test_templates_patch_ttl_tag_and_checksums(channel, probe_cls):
+    probe = probe_cls(channel)
+    for ttl in (1, 7, 64):
+        pkt = probe.send('9.9.9.9', ttl)
+        parsed = IP(pkt.data)
+        assert parsed.ttl == ttl
+        assert parsed.dst == '9.9.9.9'
+        assert valid_checksums(pkt.data)
+        if ICMP in parsed:
+            assert (parsed[ICMP].id, parsed[ICMP].seq) == (4242, pkt.tag)
+        else:
+            assert parsed.payload.sport == RAW_BASE_SPORT + pkt.tag
+    # Serialized once per destination and port
+    assert len(probe._templates) == 1
+
+
+def test_tags_are_unique_across_probes(channel):
+    a, b = RawICMPProbe(channel), RawUDPProbe(channel)
+    tags = [a.send('9.9.9.9', 1).tag, b.send('9.9.9.9', 1).tag, a.send('9.9.9.9', 2).tag]
+    assert len(set(tags)) == 3
+
+
+@pytest.mark.parametrize('probe_cls', [RawICMPProbe, RawUDPProbe, RawTCPProbe])
+def test_receive_matches_reply_to_probe(channel, probe_cls):
+    probe = probe_cls(channel)
+    assert probe.receive(probe.send('9.9.9.9', 2), timeout=1).src == '10.0.0.2'
+    assert probe.receive(probe.send('9.9.9.9', 5), timeout=1).src == '9.9.9.9'
+
+
+def test_dispatch_ignores_unrelated_packets(channel):
+    assert not channel.dispatch(bytes(IP(src='1.2.3.4') / ICMP(type=8)))
+    assert not channel.dispatch(bytes(IP(src='1.2.3.4') / TCP(dport=22)))
+    # Nobody is waiting for this one
+    assert not channel.dispatch(bytes(IP(src='9.9.9.9') / ICMP(type=0, id=4242, seq=1)))
+
+
+def test_runner_uses_raw_backend(channel, monkeypatch):
+    monkeypatch.setattr('traceroute.raw.get_channel', lambda: channel)
+    result = run_traceroute('9.9.9.9', max_ttl=5, series=1, wait=0, backend='raw')
+    assert [h.ip for h in result.hops] == ['10.0.0.1'] * 3 + ['10.0.0.2'] * 3 + ['9.9.9.9'] * 3
+
+
+def test_runner_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        run_traceroute('9.9.9.9', backend='dpdk')
+
+
+def test_kernel_timestamp_from_ancillary_data():
+    import socket, struct
+    from traceroute.raw import SO_TIMESTAMPNS, kernel_timestamp
+    if SO_TIMESTAMPNS is None:
+        pytest.skip('no SO_TIMESTAMPNS on this platform')
+    payload = struct.pack('@ll', 1700000000, 250000000)
+    assert kernel_timestamp([(socket.SOL_SOCKET, SO_TIMESTAMPNS, payload)]) == pytest.approx(1700000000.25)
+    assert kernel_timestamp([]) is None
+
+
+def test_raw_replies_carry_send_and_receive_stamps(channel):
+    probe = RawICMPProbe(channel)
+    resp = probe.receive(probe.send('9.9.9.9', 5), timeout=1)
+    assert resp.time >= resp.sent_time
+    assert resp.time_source == 'packet'
+
+
+def test_hostname_targets_are_keyed_on_their_address(channel, monkeypatch):
+    lookups = []
+    monkeypatch.setattr('traceroute.raw._resolve', lambda name: lookups.append(name) or '9.9.9.9')
+    probe = RawICMPProbe(channel)
+    pkt = probe.send('dns.example', 5)
+    assert pkt.dst == '9.9.9.9'
+    assert probe.receive(pkt, timeout=1).src == '9.9.9.9'
+    probe.send('dns.example', 6)
+    assert lookups == ['dns.example']
+
+
+def test_raw_probe_build_is_abstract():
+    from traceroute.raw import RawProbe
+    with pytest.raises(TypeError):
+        RawProbe()
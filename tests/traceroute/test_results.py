@@ -1,7 +1,9 @@
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pickle
+from dataclasses import asdict, fields, replace
 import pytest
-from traceroute.results import HopResult, TraceResult
+from traceroute.results import IP_TEXT, IP_V4, HopResult, Hops, TraceResult, pack_ip
 
 @pytest.fixture
 def hop():
@@ -23,3 +25,78 @@ def test_trace_result_fields(trace):
     assert trace.destination == "8.8.8.8"
     assert trace.hops == []
     assert trace.raw == ""
+
+@pytest.fixture
+def hops():
+    return [
+        HopResult(ttl=1, ip="10.0.0.1", rtt=1.5, hostname="gw.example", protocol="UDP", rtt_source="packet"),
+        HopResult(ttl=2, ip="*", rtt=0, protocol="ICMP", loss=True),
+        HopResult(ttl=3, ip="2001:db8::1", rtt=2.5, inferred=True),
+        HopResult(ttl=4, ip="hop-a", rtt=3.0, protocol="TCP"),
+    ]
+
+def test_hops_round_trip(hops):
+    trace = TraceResult(destination="8.8.8.8", hops=hops)
+    assert isinstance(trace.hops, Hops)
+    assert trace.hops == hops
+    assert list(trace.hops) == hops
+    assert trace.hops[-1] == hops[-1]
+    assert trace.hops[1:3] == hops[1:3]
+    assert [hop.ip for hop in trace.hops] == ["10.0.0.1", "*", "2001:db8::1", "hop-a"]
+
+def test_pack_ip_keeps_non_canonical_text():
+    assert pack_ip("10.0.0.1") == (IP_V4, 0x0A000001)
+    assert pack_ip("2001:DB8::1")[0] == IP_TEXT
+    assert pack_ip("010.0.0.1")[0] == IP_TEXT
+
+def test_hop_views_write_through(hops):
+    trace = TraceResult(destination="8.8.8.8", hops=hops)
+    for hop in trace.hops:
+        hop.hostname = "r.example"
+    view = trace.hops[1]
+    view.ip = "192.0.2.1"
+    view.loss = False
+    assert trace.hops[1] == HopResult(ttl=2, ip="192.0.2.1", rtt=0, hostname="r.example", protocol="ICMP")
+    assert all(hop.hostname == "r.example" for hop in trace.hops)
+    with pytest.raises(AttributeError):
+        view.colour = "red"
+
+def test_hop_views_are_hop_results(hops):
+    view = Hops(hops)[0]
+    assert isinstance(view, HopResult)
+    assert asdict(view) == asdict(hops[0])
+    copy = replace(view, ttl=9)
+    assert type(copy) is HopResult and copy.ttl == 9 and view.ttl == 1
+    assert pickle.loads(pickle.dumps(view)) == hops[0]
+
+def test_hops_list_operations(hops):
+    stored = Hops(hops)
+    stored.sort(key=lambda hop: -hop.ttl)
+    assert [hop.ttl for hop in stored] == [4, 3, 2, 1]
+    del stored[0]
+    stored.insert(0, hops[0])
+    stored[1] = hops[1]
+    stored.extend(stored)
+    assert [hop.ttl for hop in stored] == [1, 2, 2, 1] * 2
+    assert stored[5].ip == "*" and stored[6].ip == "*"
+    del stored[-1]
+    assert len(stored) == 7
+    stored.clear()
+    assert stored == []
+
+def test_trace_shares_hops_and_pickles(hops):
+    trace = TraceResult("8.8.8.8", hops)
+    alias = TraceResult("dns.google", trace.hops)
+    assert alias.hops is trace.hops
+    restored = pickle.loads(pickle.dumps(trace))
+    assert restored == trace
+    assert restored != alias
+
+def test_trace_result_is_a_dataclass(hops):
+    trace = TraceResult("8.8.8.8", hops, raw="text")
+    assert [f.name for f in fields(trace)] == ["destination", "hops", "raw"]
+    assert asdict(trace) == {"destination": "8.8.8.8", "hops": hops, "raw": "text"}
+    moved = replace(trace, destination="dns.google")
+    assert moved.hops is trace.hops and moved.raw == "text"
+    trace.hops = hops[:1]
+    assert isinstance(trace.hops, Hops) and trace.hops == hops[:1]
@@ -1,5 +1,6 @@
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
 from unittest.mock import patch, MagicMock
 from traceroute.runner import run_traceroute
 
@@ -40,3 +41,222 @@ def test_run_traceroute_mocks(MockTCP, MockUDP, MockICMP):
         assert hop.ip == '2.2.2.2'
         assert not hop.loss
         assert hop.rtt >= 0
+
+def test_run_batch_yields_in_completion_order():
+    import threading
+    from traceroute.runner import run_batch
+    from traceroute.results import TraceResult
+
+    slow_started = threading.Event()
+    release_slow = threading.Event()
+    seen_throttles = set()
+
+    def fake_trace(dst, throttle=None, **kwargs):
+        seen_throttles.add(id(throttle))
+        if dst == 'slow':
+            slow_started.set()
+            release_slow.wait(5)
+        return TraceResult(destination=dst, raw=str(kwargs['max_ttl']))
+
+    results = run_batch(['slow', 'a', 'b', 'c'], trace_fn=fake_trace, concurrency=2, max_ttl=5)
+
+    # The unresponsive target does not hold up the others
+    first = [next(results).destination for _ in range(3)]
+    assert sorted(first) == ['a', 'b', 'c']
+    release_slow.set()
+    last = list(results)
+    assert [r.destination for r in last] == ['slow']
+    assert last[0].raw == '5'
+
+    # One shared throttle enforces the global budget
+    assert len(seen_throttles) == 1
+
+
+def test_run_batch_skips_failed_targets(capsys):
+    from traceroute.runner import run_batch
+    from traceroute.results import TraceResult
+
+    def fake_trace(dst, throttle=None, **kwargs):
+        if dst == 'bad':
+            raise OSError('boom')
+        return TraceResult(destination=dst)
+
+    results = list(run_batch(['ok', 'bad'], trace_fn=fake_trace, concurrency=1))
+    assert [r.destination for r in results] == ['ok']
+    assert 'Error tracing bad: boom' in capsys.readouterr().err
+
+
+@patch('traceroute.runner.time.sleep')
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_doubletree_skips_known_segments(MockTCP, MockUDP, MockICMP, _sleep):
+    from traceroute.results import HopResult, TraceResult
+    from traceroute.stopsets import StopSets
+
+    path = {1: '10.0.0.1', 2: '10.0.0.2', 3: '10.0.0.3', 4: '10.0.0.4', 5: '9.9.9.9'}
+    probed = []
+
+    def make_probe():
+        probe = MagicMock()
+        probe.send.side_effect = lambda dst, ttl, **kw: ttl
+        probe.receive.side_effect = lambda ttl, **kw: probed.append(ttl) or MagicMock(src=path[ttl])
+        return probe
+
+    MockICMP.side_effect = MockUDP.side_effect = MockTCP.side_effect = lambda: make_probe()
+
+    stop_sets = StopSets(start_ttl=3)
+    stop_sets.learn(TraceResult(destination='9.9.9.8', hops=[
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1),
+        HopResult(ttl=2, ip='10.0.0.2', rtt=2),
+        HopResult(ttl=3, ip='10.0.0.3', rtt=3),
+        HopResult(ttl=4, ip='10.0.0.4', rtt=4),
+        HopResult(ttl=5, ip='9.9.9.8', rtt=5),
+    ]))
+
+    result = run_traceroute('9.9.9.9', max_ttl=10, series=1, wait=0, stop_sets=stop_sets)
+
+    # TTL 3 hits the global stop set, which fills in TTL 4 but not the other
+    # trace's destination; TTL 5 is probed and reaches ours. TTL 2 hits the local set
+    assert sorted(set(probed)) == [2, 3, 5]
+    assert [h.ttl for h in result.hops] == sorted(h.ttl for h in result.hops)
+    inferred = [(h.ttl, h.ip) for h in result.hops if h.inferred]
+    assert inferred == [(1, '10.0.0.1'), (4, '10.0.0.4')]
+    assert {h.ip for h in result.hops if h.ttl == 5} == {'9.9.9.9'}
+    assert '9.9.9.8' not in {h.ip for h in result.hops}
+
+    # The new trace is learned for the next destinations
+    assert ('10.0.0.3', '9.9.9.0/24') in stop_sets.global_
+
+
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_resolves_each_ip_once(MockTCP, MockUDP, MockICMP):
+    for mock in (MockICMP, MockUDP, MockTCP):
+        mock.return_value.receive.return_value = MagicMock(src='1.1.1.1')
+    resolver = MagicMock()
+    resolver.annotate.side_effect = lambda trace: trace
+
+    result = run_traceroute('1.1.1.1', max_ttl=3, series=3, wait=0, resolve_host=True, resolver=resolver)
+
+    # Lookups are queued per TTL and attached once, after probing
+    assert resolver.prefetch.call_count == 1
+    resolver.annotate.assert_called_once_with(result)
+
+
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_stops_after_gap_limit(MockTCP, MockUDP, MockICMP):
+    for mock in (MockICMP, MockUDP, MockTCP):
+        mock.return_value.receive.side_effect = lambda pkt, timeout: MagicMock(src='1.1.1.1') if pkt == 1 else None
+        mock.return_value.send.side_effect = lambda dst, ttl, **kw: ttl
+
+    result = run_traceroute('9.9.9.9', max_ttl=30, series=1, wait=0, gap_limit=3)
+
+    # TTL 1 answers, then three silent TTLs end the trace
+    assert max(h.ttl for h in result.hops) == 4
+    assert all(h.loss for h in result.hops if h.ttl > 1)
+
+
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_adaptive_timeout(MockTCP, MockUDP, MockICMP):
+    timeouts = []
+    for mock in (MockICMP, MockUDP, MockTCP):
+        mock.return_value.receive.side_effect = lambda pkt, timeout: timeouts.append(timeout) or MagicMock(src='1.1.1.1')
+
+    run_traceroute('9.9.9.9', max_ttl=3, series=1, wait=0, timeout=2.0, adaptive_timeout=True)
+
+    # The first probe waits the full timeout, later ones follow the (tiny) measured RTTs
+    assert timeouts[0] == 2.0
+    assert timeouts[-1] < 2.0
+
+
+@patch('traceroute.runner.ICMPProbe')
+def test_run_traceroute_adaptive_timeout_retries_rtt_jump(MockICMP):
+    from types import SimpleNamespace
+    # 10ms for three hops, then 300ms to the destination
+    rtts = {1: 0.01, 2: 0.01, 3: 0.01, 4: 0.3}
+    waits = []
+
+    def receive(ttl, timeout):
+        waits.append((ttl, timeout))
+        if timeout < rtts[ttl]:
+            return None
+        src = '9.9.9.9' if ttl == 4 else f'10.0.0.{ttl}'
+        return SimpleNamespace(src=src, sent_time=0.0, time=rtts[ttl], time_source='simulated')
+
+    MockICMP.return_value.send.side_effect = lambda dst, ttl, **kwargs: ttl
+    MockICMP.return_value.receive.side_effect = receive
+    result = run_traceroute('9.9.9.9', max_ttl=4, series=1, wait=0, timeout=2.0, adaptive_timeout=True, gap_limit=1, protocols=['ICMP'])
+
+    assert [t for ttl, t in waits if ttl == 4] == [pytest.approx(0.1), 2.0]
+    assert [(h.ttl, h.ip, h.loss) for h in result.hops][-1] == (4, '9.9.9.9', False)
+
+
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_selected_protocols(MockTCP, MockUDP, MockICMP):
+    MockUDP.return_value.receive.return_value = MagicMock(src='2.2.2.2')
+
+    result = run_traceroute('2.2.2.2', max_ttl=5, series=3, wait=0, protocols=['UDP'])
+
+    MockICMP.assert_not_called()
+    MockTCP.assert_not_called()
+    assert [h.protocol for h in result.hops] == ['UDP'] * 3
+
+
+def test_run_traceroute_rejects_unknown_protocol():
+    with pytest.raises(ValueError):
+        run_traceroute('2.2.2.2', protocols=['SCTP'])
+
+
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_adaptive_series_stops_when_consistent(MockTCP, MockUDP, MockICMP):
+    for mock in (MockICMP, MockUDP, MockTCP):
+        mock.return_value.receive.return_value = MagicMock(src='1.1.1.1')
+
+    result = run_traceroute('1.1.1.1', max_ttl=3, series=3, wait=0, adaptive_series=True)
+
+    # One round of three agreeing replies is enough instead of 3 x series probes
+    assert len(result.hops) == 3
+
+
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_adaptive_series_retries_only_lost(MockTCP, MockUDP, MockICMP):
+    MockICMP.return_value.receive.return_value = MagicMock(src='1.1.1.1')
+    MockUDP.return_value.receive.side_effect = [None, MagicMock(src='1.1.1.1')]
+    MockTCP.return_value.receive.return_value = None
+
+    result = run_traceroute('1.1.1.1', max_ttl=1, series=3, wait=0, adaptive_series=True)
+
+    # Round 1: all three, ICMP answers. Round 2: UDP and TCP retried, UDP agrees -> settled
+    assert [(h.protocol, h.loss) for h in result.hops] == [
+        ('ICMP', False), ('UDP', True), ('TCP', True), ('UDP', False), ('TCP', True),
+    ]
+    assert MockICMP.return_value.receive.call_count == 1
+
+
+@patch('traceroute.runner.ICMPProbe')
+@patch('traceroute.runner.UDPProbe')
+@patch('traceroute.runner.TCPProbe')
+def test_run_traceroute_records_rtt_source(MockTCP, MockUDP, MockICMP):
+    import time
+    from types import SimpleNamespace
+    # The packet stamps must fit inside the receive call to be trusted
+    MockICMP.return_value.receive.side_effect = lambda pkt, timeout: time.sleep(0.005) or SimpleNamespace(src='1.1.1.1', sent_time=10.0, time=10.002)
+    MockUDP.return_value.receive.return_value = MagicMock(src='1.1.1.1')
+
+    result = run_traceroute('1.1.1.1', max_ttl=1, series=1, wait=0, protocols=['ICMP', 'UDP'])
+
+    icmp, udp = result.hops
+    assert icmp.rtt_source == 'packet' and icmp.rtt == pytest.approx(2.0)
+    assert udp.rtt_source == 'monotonic'
@@ -0,0 +1,92 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import argparse
+import pytest
+from traceroute.results import HopResult, TraceResult
+from traceroute.sharding import main, merge, merge_stores, parse_shard, select, shard_of, shard_path, split
+from traceroute.writer import JsonlResultWriter, read_records, read_traces
+
+TARGETS = [f'10.0.{i}.1' for i in range(100)]
+
+
+def make_trace(dest, ip='10.9.9.9'):
+    return TraceResult(destination=dest, hops=[HopResult(ttl=1, ip=ip, rtt=1.0)])
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    for spec in ('0/4', '5/4', '2', 'a/b'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(spec)
+
+
+@pytest.mark.parametrize('method', ['hash', 'range'])
+def test_split_partitions_targets(method):
+    shards = split(TARGETS, 4, method)
+    assert len(shards) == 4
+    assert sorted(t for shard in shards for t in shard) == sorted(TARGETS)
+    assert all(shard for shard in shards)
+    assert [select(TARGETS, k, 4, method) for k in range(1, 5)] == shards
+
+
+def test_range_shards_are_contiguous_and_balanced():
+    shards = split(TARGETS[:10], 3, 'range')
+    assert shards == [TARGETS[0:4], TARGETS[4:7], TARGETS[7:10]]
+
+
+def test_hash_shards_are_stable():
+    assert all(1 <= shard_of(t, 4) <= 4 for t in TARGETS)
+    assert shard_of('192.0.2.1', 4) == shard_of('192.0.2.1', 4)
+    with pytest.raises(ValueError):
+        split(TARGETS, 2, 'random')
+
+
+def test_shard_path():
+    assert shard_path('out.jsonl', 2) == 'out.shard2.jsonl'
+    assert shard_path('out.txt', 1) == 'out.txt.shard1.jsonl'
+
+
+def write_shard(path, meta, traces):
+    with JsonlResultWriter(path, meta=meta) as writer:
+        for trace in traces:
+            writer.write(trace)
+
+
+def test_merge_dedupes_and_records_shard_and_vantage(tmp_path):
+    a, b, c = (str(tmp_path / f'{name}.jsonl') for name in 'abc')
+    write_shard(a, {'shard': '1/2', 'vantage': 'east'}, [make_trace('d1'), make_trace('d2')])
+    write_shard(b, {'shard': '2/2', 'vantage': 'east'}, [make_trace('d3'), make_trace('d1', ip='10.8.8.8')])
+    write_shard(c, {'vantage': 'west'}, [make_trace('d1')])
+
+    out = str(tmp_path / 'merged.jsonl')
+    assert merge([a, b, c], out) == {'traces': 4, 'duplicates': 1}
+    records = list(read_records(out))
+    assert records[0]['merged_from'] == [a, b, c]
+    tags = [(r['destination'], r['shard'], r['vantage']) for r in records[1:]]
+    assert tags == [('d1', '1/2', 'east'), ('d2', '1/2', 'east'), ('d3', '2/2', 'east'), ('d1', None, 'west')]
+    assert list(read_traces(out))[0] == make_trace('d1')
+
+    # Merging a merge keeps the per-trace tags
+    again = str(tmp_path / 'again.jsonl')
+    assert merge([out, out], again) == {'traces': 4, 'duplicates': 4}
+    assert [r.get('vantage') for r in read_records(again)][1:] == ['east', 'east', 'east', 'west']
+
+
+def test_merge_tool_writes_text(tmp_path, capsys):
+    a = str(tmp_path / 'a.jsonl')
+    write_shard(a, {}, [make_trace('d1'), make_trace('d1')])
+    out = str(tmp_path / 'merged.txt')
+    assert main([a, '-o', out]) == 0
+    assert 'Merged 1 traces from 1 files' in capsys.readouterr().out
+    with open(out) as f:
+        assert f.read().startswith('Trace to d1:')
+
+
+def test_merge_stores_concatenates_shards(tmp_path):
+    from traceroute.store import load_store, write_store
+    a, b, out = (str(tmp_path / name) for name in ('a', 'b', 'merged'))
+    write_store(a, [make_trace('d1'), make_trace('d2')])
+    write_store(b, [make_trace('d3')])
+    write_store(out, [make_trace('stale')])
+    assert merge_stores([a, b], out) == 3
+    assert load_store(out).to_traces() == [make_trace('d1'), make_trace('d2'), make_trace('d3')]
@@ -0,0 +1,69 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import time
+import pytest
+from traceroute.runner import run_batch, run_traceroute
+from traceroute.simnet import ECHO_REPLY, PORT_UNREACHABLE, TIME_EXCEEDED, SimNetwork, SimPacket
+
+
+def test_paths_are_deterministic_and_share_the_core():
+    a, b = SimNetwork(seed=1), SimNetwork(seed=1)
+    assert a.path('192.0.2.1') == b.path('192.0.2.1')
+    (p1, _), (p2, _) = a.path('192.0.2.1'), a.path('198.51.100.7')
+    assert p1[:2] == p2[:2] == ['10.0.1.1', '10.0.2.1']
+
+
+def test_replies_by_ttl_and_protocol():
+    net = SimNetwork(depth=(5, 5))
+    routers, _ = net.path('192.0.2.1')
+    assert len(routers) == 4
+    assert net.respond(SimPacket('192.0.2.1', 2, 'ICMP', None))[:2] == (routers[1], TIME_EXCEEDED)
+    assert net.respond(SimPacket('192.0.2.1', 5, 'ICMP', None))[:2] == ('192.0.2.1', ECHO_REPLY)
+    assert net.respond(SimPacket('192.0.2.1', 9, 'UDP', None))[:2] == ('192.0.2.1', PORT_UNREACHABLE)
+
+
+def test_run_traceroute_against_simulated_network():
+    net = SimNetwork(depth=(6, 6))
+    result = run_traceroute('192.0.2.1', series=1, wait=0, backend=net.backend())
+    routers, _ = net.path('192.0.2.1')
+    assert [h.ip for h in result.hops if h.protocol == 'ICMP'] == routers + ['192.0.2.1']
+    assert all(h.rtt_source == 'simulated' and h.rtt > 0 for h in result.hops)
+    # RTT grows with the hop count
+    assert result.hops[0].rtt < result.hops[-1].rtt
+    assert net.probes_sent == len(result.hops) == 18
+
+
+def test_unreachable_destination_stops_at_gap_limit():
+    net = SimNetwork(depth=(4, 4), unreachable=1.0)
+    result = run_traceroute('192.0.2.1', series=1, wait=0, gap_limit=3, backend=net.backend())
+    assert max(h.ttl for h in result.hops) == 3 + 3
+    assert all(h.loss for h in result.hops if h.ttl > 3)
+
+
+def test_loss_and_silent_routers():
+    net = SimNetwork(seed=3, loss=1.0)
+    assert net.respond(SimPacket('192.0.2.1', 1, 'ICMP', None))[0] is None
+    net = SimNetwork(seed=3, silent=1.0)
+    routers, _ = net.path('192.0.2.1')
+    assert set(routers) == {None}
+
+
+def test_time_scale_waits_for_the_timeout():
+    net = SimNetwork(loss=1.0, time_scale=1.0)
+    start = time.monotonic()
+    assert net.exchange(SimPacket('192.0.2.1', 1, 'ICMP', None), timeout=0.05) is None
+    assert time.monotonic() - start >= 0.05
+
+
+def test_trace_matches_runner_shape():
+    net = SimNetwork(depth=(6, 6))
+    trace = net.trace('192.0.2.1', series=2)
+    assert len(trace.hops) == 6 * 2 * 3
+    assert trace.hops[-1].ip == '192.0.2.1'
+
+
+def test_batch_against_simulated_network():
+    net = SimNetwork(loss=0.05, silent=0.05)
+    targets = [f'192.0.2.{i}' for i in range(20)]
+    results = list(run_batch(targets, concurrency=4, wait=0, gap_limit=5, backend=net.backend()))
+    assert sorted(r.destination for r in results) == sorted(targets)
@@ -0,0 +1,46 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from traceroute.results import HopResult, TraceResult
+from traceroute.stopsets import StopSets
+
+
+@pytest.fixture
+def stop_sets():
+    sets = StopSets()
+    sets.learn(TraceResult(destination='9.9.9.9', hops=[
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1),
+        HopResult(ttl=2, ip='*', rtt=0, loss=True),
+        HopResult(ttl=3, ip='10.0.2.1', rtt=3),
+        HopResult(ttl=4, ip='9.9.9.9', rtt=4),
+    ]))
+    return sets
+
+
+def test_prefix(stop_sets):
+    assert stop_sets.prefix('9.9.9.77') == '9.9.9.0/24'
+    assert stop_sets.prefix('example.com') == 'example.com'
+
+
+def test_learn_skips_lost_hops(stop_sets):
+    assert set(stop_sets.local) == {'10.0.0.1', '10.0.2.1', '9.9.9.9'}
+    assert ('10.0.2.1', '9.9.9.0/24') in stop_sets.global_
+    assert ('10.0.2.1', '8.8.8.0/24') not in stop_sets.global_
+
+
+def test_before_fills_and_renumbers(stop_sets):
+    # Same interface seen one hop further away on a new path
+    hit = stop_sets.hits_local([HopResult(ttl=4, ip='10.0.2.1', rtt=3)])
+    filled = stop_sets.before(hit)
+    assert [(h.ttl, h.ip) for h in filled] == [(2, '10.0.0.1'), (3, '*')]
+    assert all(h.inferred for h in filled)
+
+
+def test_after_only_for_same_prefix(stop_sets):
+    probed = [HopResult(ttl=3, ip='10.0.2.1', rtt=3)]
+    assert stop_sets.hits_global(probed, '8.8.8.8') is None
+    hit = stop_sets.hits_global(probed, '9.9.9.10')
+    # 9.9.9.9 was the teaching trace's destination, not a hop towards 9.9.9.10
+    assert stop_sets.after(hit, '9.9.9.10') == []
+    hit = stop_sets.hits_global([HopResult(ttl=1, ip='10.0.0.1', rtt=1)], '9.9.9.10')
+    assert [(h.ttl, h.ip, h.inferred) for h in stop_sets.after(hit, '9.9.9.10')] == [(2, '*', True), (3, '10.0.2.1', True)]
@@ -0,0 +1,98 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import numpy as np
+import pytest
+from traceroute.results import HopResult, TraceResult
+from traceroute.store import FLAG_INFERRED, FLAG_IP_TEXT, FLAG_LOSS, StringTable, TraceStore, decode_ip, encode_ip, load_store, write_store
+
+
+@pytest.fixture
+def traces():
+    return [
+        TraceResult(destination='google.com', hops=[
+            HopResult(ttl=1, ip='10.209.64.1', rtt=5.5, protocol='ICMP'),
+            HopResult(ttl=1, ip='*', rtt=0, protocol='UDP', loss=True),
+            HopResult(ttl=2, ip='203.85.128.94', rtt=35.25, hostname='203-85-128-94.static.hk.net', protocol='TCP', inferred=True),
+        ]),
+        TraceResult(destination='8.8.8.8', hops=[]),
+        TraceResult(destination='1.1.1.1', hops=[HopResult(ttl=1, ip='1.1.1.1', rtt=1.0, hostname='one.one.one.one')]),
+    ]
+
+
+def test_ip_round_trip():
+    strings = StringTable()
+    assert encode_ip('10.0.0.1', False, strings) == (0x0A000001, 0)
+    assert decode_ip(0x0A000001, 0, strings) == '10.0.0.1'
+    assert encode_ip('*', True, strings) == (0, 0) and decode_ip(0, FLAG_LOSS, strings) == '*'
+    # 0.0.0.0 is an address, not "no reply"
+    assert decode_ip(*encode_ip('0.0.0.0', False, strings), strings) == '0.0.0.0'
+    for ip, loss in (('2001:db8::1', False), ('0.0.0.0', True), ('*', False)):
+        value, flags = encode_ip(ip, loss, strings)
+        assert flags == FLAG_IP_TEXT
+        assert decode_ip(value, flags | (FLAG_LOSS if loss else 0), strings) == ip
+
+
+def test_non_ipv4_hops_round_trip(tmp_path):
+    traces = [TraceResult(destination='2001:db8::9', hops=[
+        HopResult(ttl=1, ip='0.0.0.0', rtt=1.0),
+        HopResult(ttl=2, ip='2001:db8::1', rtt=2.0, hostname='v6.example'),
+        HopResult(ttl=3, ip='*', rtt=0, loss=True),
+    ])]
+    path = str(tmp_path / 'store')
+    write_store(path, traces)
+    assert load_store(path).to_traces() == traces
+
+
+def test_from_traces_columns(traces):
+    store = TraceStore.from_traces(traces)
+    assert len(store) == 4
+    assert store.n_traces == 3
+    assert store['ttl'].tolist() == [1, 1, 2, 1]
+    assert store['flags'].tolist() == [0, FLAG_LOSS, FLAG_INFERRED, 0]
+    assert store['rtt'].dtype == np.float32
+    assert store.strings[int(store['dest'][3])] == '1.1.1.1'
+    assert store.to_traces() == traces
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_write_and_load(tmp_path, traces, mmap):
+    path = str(tmp_path / 'store')
+    write_store(path, traces)
+    store = load_store(path, mmap=mmap)
+    if mmap:
+        assert isinstance(store['ip'], np.memmap)
+    assert store.to_traces() == traces
+
+
+def test_append_shares_string_table(tmp_path, traces):
+    path = str(tmp_path / 'store')
+    write_store(path, traces[:1])
+    write_store(path, traces[1:], append=True)
+    write_store(path, traces[:1], append=True)
+    store = load_store(path)
+    assert store.n_traces == 4
+    assert store.to_traces() == traces + traces[:1]
+    assert store.strings.strings.count('google.com') == 1
+
+
+def test_append_ignores_uncommitted_rows(tmp_path, traces):
+    path = str(tmp_path / 'store')
+    write_store(path, traces[:1])
+    # Simulate a crash after the column write but before the metadata update
+    with open(os.path.join(path, 'ttl.bin'), 'ab') as f:
+        f.write(b'\x07' * 5)
+    write_store(path, traces[2:], append=True)
+    assert load_store(path).to_traces() == [traces[0], traces[2]]
+
+
+def test_rtt_source_round_trip(tmp_path):
+    traces = [TraceResult(destination='9.9.9.9', hops=[
+        HopResult(ttl=1, ip='10.0.0.1', rtt=0.25, rtt_source='kernel'),
+        HopResult(ttl=2, ip='10.0.0.2', rtt=3.5, rtt_source='monotonic', inferred=True),
+        HopResult(ttl=3, ip='*', rtt=0, loss=True),
+    ])]
+    path = str(tmp_path / 'store')
+    write_store(path, traces)
+    store = load_store(path)
+    assert store['flags'].tolist()[2] == FLAG_LOSS
+    assert [h.rtt_source for h in store.to_traces()[0].hops] == ['kernel', 'monotonic', None]
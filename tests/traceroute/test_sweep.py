@@ -0,0 +1,126 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from unittest.mock import MagicMock, patch
+from scapy.all import IP, ICMP, TCP
+from traceroute.sweep import SweepTransport, build_probe, decode_reply, permutation, run_sweep
+
+PATHS = {
+    '9.9.9.9': ['10.0.0.1', '10.0.1.1', '9.9.9.9'],
+    '8.8.8.8': ['10.0.0.1', '8.8.8.8'],
+}
+
+
+def time_exceeded(router, probe):
+    return IP(bytes(IP(src=router, dst='192.0.2.1') / ICMP(type=11) / bytes(probe)[:28]))
+
+
+@pytest.mark.parametrize('n', [1, 7, 64, 1000])
+def test_permutation_covers_every_index_once(n):
+    order = list(permutation(n, seed=1))
+    assert sorted(order) == list(range(n))
+
+
+def test_permutation_is_shuffled_and_seeded():
+    assert list(permutation(100, seed=3)) == list(permutation(100, seed=3))
+    assert list(permutation(100, seed=3)) != list(range(100))
+
+
+@pytest.mark.parametrize('protocol', ['ICMP', 'TCP'])
+def test_decode_time_exceeded(protocol):
+    probe = build_probe('9.9.9.9', 4, sent_ms=1000, protocol=protocol)
+    reply = decode_reply(time_exceeded('10.0.1.1', probe), recv_ms=1025)
+    assert reply.target == '9.9.9.9'
+    assert reply.ttl == 4
+    assert reply.ip == '10.0.1.1'
+    assert reply.rtt == 25
+
+
+def test_decode_direct_replies():
+    probe = build_probe('9.9.9.9', 7, sent_ms=0x12345, protocol='ICMP')
+    echo = IP(bytes(IP(src='9.9.9.9') / ICMP(type=0, id=probe[ICMP].id, seq=probe[ICMP].seq) / bytes([7])))
+    assert decode_reply(echo, recv_ms=0x12345 + 3) == ('9.9.9.9', 7, '9.9.9.9', 3.0)
+
+    probe = build_probe('9.9.9.9', 5, sent_ms=500, protocol='TCP')
+    synack = IP(bytes(IP(src='9.9.9.9') / TCP(sport=80, dport=probe[TCP].sport, flags='SA', ack=501)))
+    assert decode_reply(synack, recv_ms=510) == ('9.9.9.9', 5, '9.9.9.9', 10.0)
+
+
+def test_decode_ignores_foreign_traffic():
+    other = IP(dst='9.9.9.9', ttl=3, id=1) / ICMP()
+    assert decode_reply(time_exceeded('10.0.0.1', other), recv_ms=0) is None
+
+
+class FakeSweepTransport:
+    def __init__(self):
+        self.sent = []
+
+    def start(self):
+        pass
+
+    def send(self, pkt):
+        self.sent.append(pkt)
+
+    def stop(self, timeout):
+        replies = []
+        for pkt in self.sent:
+            path = PATHS[pkt[IP].dst]
+            ttl = pkt[IP].ttl
+            if ttl > len(path):
+                continue
+            router = path[ttl - 1]
+            if router == pkt[IP].dst:
+                resp = IP(bytes(IP(src=router) / ICMP(type=0, id=pkt[ICMP].id, seq=pkt[ICMP].seq) / bytes(pkt[ICMP].payload)))
+            else:
+                resp = time_exceeded(router, pkt)
+            resp.time = 0
+            replies.append(resp)
+        return replies
+
+
+def test_run_sweep_rebuilds_traces():
+    transport = FakeSweepTransport()
+    traces = run_sweep(['9.9.9.9', '8.8.8.8'], max_ttl=5, pps=0, seed=7, transport=transport)
+
+    # Every (target, TTL) pair is probed exactly once, in shuffled order
+    pairs = [(p[IP].dst, p[IP].ttl) for p in transport.sent]
+    assert sorted(pairs) == sorted((d, t) for d in PATHS for t in range(1, 6))
+
+    by_dest = {t.destination: t for t in traces}
+    assert [h.ip for h in by_dest['9.9.9.9'].hops] == PATHS['9.9.9.9']
+    assert [h.ip for h in by_dest['8.8.8.8'].hops] == PATHS['8.8.8.8']
+    assert all(h.ttl == i for i, h in enumerate(by_dest['9.9.9.9'].hops, 1))
+
+
+def test_run_sweep_records_probe_metrics():
+    from traceroute.metrics import Metrics
+    metrics = Metrics()
+    run_sweep(['9.9.9.9', '8.8.8.8'], max_ttl=5, pps=0, seed=7, transport=FakeSweepTransport(), metrics=metrics)
+    # 10 probes; 9.9.9.9 answers TTL 1-3 and 8.8.8.8 TTL 1-2
+    assert metrics.counters['probes_sent'] == 10
+    assert metrics.counters['probe_replies'] == 5
+    assert metrics.counters['probe_timeouts'] == 5
+    assert metrics.pps > 0
+
+
+def test_run_sweep_rejects_udp():
+    with pytest.raises(ValueError):
+        run_sweep(['9.9.9.9'], protocol='UDP', transport=FakeSweepTransport())
+
+
+def test_sweep_transport_stop_after_failed_start():
+    sniffer = MagicMock(results=[])
+    sniffer.start.side_effect = lambda: sniffer_kwargs['started_callback']()
+    sniffer_kwargs = {}
+
+    def make_sniffer(**kwargs):
+        sniffer_kwargs.update(kwargs)
+        return sniffer
+
+    with patch('traceroute.sweep.AsyncSniffer', side_effect=make_sniffer), patch('traceroute.sweep.conf') as conf:
+        conf.L3socket.side_effect = PermissionError('raw sockets need root')
+        # The real error surfaces, not one from cleaning up
+        with pytest.raises(PermissionError):
+            run_sweep(['9.9.9.9'], max_ttl=2, pps=0, transport=SweepTransport())
+    sniffer.stop.assert_called_once()
+    assert SweepTransport().stop(timeout=0) == []
@@ -0,0 +1,63 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from unittest.mock import MagicMock
+from traceroute.dns import ForwardResolver
+from traceroute.results import HopResult, TraceResult
+from traceroute.targets import TargetSet, is_address, iter_names, load_targets, resolve_names
+
+ADDRESSES = {'google.com': '142.250.0.1', 'www.google.com': '142.250.0.1', 'microsoft.com': '20.0.0.1'}
+
+
+@pytest.fixture
+def resolver():
+    lookup = MagicMock(side_effect=ADDRESSES.get)
+    with ForwardResolver(workers=4, lookup=lookup) as resolver:
+        yield resolver
+
+
+def test_iter_names_reads_cisco_csv(tmp_path):
+    path = tmp_path / 'top.csv'
+    path.write_text('rank,domain\n1,google.com\n2,microsoft.com\n\n3,www.google.com\n')
+    assert list(iter_names(str(path))) == ['google.com', 'microsoft.com', 'www.google.com']
+
+
+def test_iter_names_reads_plain_lists(tmp_path):
+    path = tmp_path / 'ips.txt'
+    path.write_text('# targets\n8.8.8.8\n google.com \n\n')
+    assert list(iter_names(str(path))) == ['8.8.8.8', 'google.com']
+
+
+def test_is_address():
+    assert is_address('8.8.8.8')
+    assert is_address('2001:db8::1')
+    assert not is_address('google.com')
+
+
+def test_resolve_names_caches_and_skips_literals(resolver):
+    names = ['google.com', '8.8.8.8', 'google.com', 'nope.invalid']
+    assert list(resolve_names(names, resolver, window=2)) == [('google.com', '142.250.0.1'), ('8.8.8.8', '8.8.8.8'), ('google.com', '142.250.0.1'), ('nope.invalid', None)]
+    looked_up = [c.args[0] for c in resolver._lookup.call_args_list]
+    assert sorted(looked_up) == ['google.com', 'nope.invalid']
+
+
+def test_load_targets_dedupes_addresses(resolver):
+    targets = load_targets(['google.com', 'microsoft.com', 'www.google.com', '142.250.0.1', 'google.com', 'nope.invalid'], resolver)
+    assert targets.ips == ['142.250.0.1', '20.0.0.1']
+    assert len(targets) == 2
+    assert targets.n_names == 4
+    assert targets.names_for('142.250.0.1') == ['google.com', 'www.google.com', '142.250.0.1']
+    assert targets.unresolved == ['nope.invalid']
+    assert targets.address['www.google.com'] == '142.250.0.1'
+
+
+def test_expand_maps_trace_back_to_names():
+    targets = TargetSet()
+    targets.add('a.example', '192.0.2.1')
+    targets.add('b.example', '192.0.2.1')
+    trace = TraceResult('192.0.2.1', [HopResult(1, '192.0.2.1', 1.0)])
+    copies = list(targets.expand(trace))
+    assert [t.destination for t in copies] == ['a.example', 'b.example']
+    assert all(t.hops is trace.hops for t in copies)
+    # Addresses that were not in the input stand for themselves
+    assert list(targets.expand(TraceResult('192.0.2.9'))) == [TraceResult('192.0.2.9')]
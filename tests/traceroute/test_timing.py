@@ -0,0 +1,73 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from traceroute.results import HopResult
+from traceroute.timing import TimingController
+
+
+def hops(*rtts):
+    return [HopResult(ttl=1, ip='*', rtt=0, loss=True) if rtt is None else HopResult(ttl=1, ip='1.1.1.1', rtt=rtt) for rtt in rtts]
+
+
+def test_fixed_timeout_by_default():
+    timing = TimingController(timeout=2.0)
+    timing.observe(hops(10, 12))
+    assert timing.timeout == 2.0
+
+
+def test_adaptive_timeout_follows_rtt():
+    timing = TimingController(timeout=2.0, adaptive=True, min_timeout=0.01)
+    assert timing.timeout == 2.0
+    timing.observe(hops(20))
+    # First sample: srtt = 20ms, rttvar = 10ms -> 60ms
+    assert timing.timeout == pytest.approx(0.06)
+    for _ in range(20):
+        timing.observe(hops(20, 20, 20))
+    assert timing.srtt == pytest.approx(0.02)
+    assert 0.02 <= timing.timeout < 0.06
+
+
+def test_adaptive_timeout_is_clamped():
+    timing = TimingController(timeout=1.0, adaptive=True, min_timeout=0.1)
+    timing.observe(hops(1))
+    assert timing.timeout == 0.1
+    timing.observe(hops(5000))
+    assert timing.timeout == 1.0
+
+
+def test_silent_ttls_back_off_and_reach_gap_limit():
+    timing = TimingController(timeout=2.0, adaptive=True, min_timeout=0.01, gap_limit=2)
+    timing.observe(hops(20))
+    base = timing.timeout
+    timing.observe(hops(None, None))
+    assert timing.timeout == pytest.approx(2 * base)
+    assert not timing.gap_reached
+    timing.observe(hops(None))
+    assert timing.gap_reached
+    # Any reply resets both
+    timing.observe(hops(None, 20))
+    assert not timing.gap_reached and timing.backoff == 1
+
+
+def test_gap_limit_zero_never_stops():
+    timing = TimingController()
+    for _ in range(50):
+        timing.observe(hops(None))
+    assert not timing.gap_reached
+
+
+def test_timeout_covers_the_largest_rtt_so_far():
+    timing = TimingController(timeout=2.0, adaptive=True, min_timeout=0.01)
+    timing.observe(hops(300))
+    for _ in range(30):
+        timing.observe(hops(10))
+    # The smoothed RTT is back near 10ms, but a 300ms hop was seen
+    assert timing.timeout == pytest.approx(0.6)
+
+
+def test_retry_timeout_only_below_the_full_timeout():
+    timing = TimingController(timeout=2.0, adaptive=True)
+    assert timing.retry_timeout is None
+    timing.observe(hops(10))
+    assert timing.retry_timeout == 2.0
+    assert TimingController(timeout=2.0).retry_timeout is None
@@ -0,0 +1,122 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import io
+import pytest
+from traceroute.results import HopResult, TraceResult
+from traceroute.trace_parser import find_chunks, iter_traces, iter_tracert, parse_chunk, parse_parallel, parse_system_trace, traceroute_hops
+from traceroute.writer import format_text
+
+SAMPLE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../ips_trace_results.txt'))
+
+
+def make_traces(n):
+    return [TraceResult(destination=f'10.1.{i // 256}.{i % 256}', hops=[
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1.25, protocol='ICMP'),
+        HopResult(ttl=2, ip='*', rtt=0, protocol='UDP', loss=True),
+        HopResult(ttl=3, ip='203.85.128.94', rtt=35.5, hostname='static.hk.net', protocol='TCP', inferred=True),
+    ]) for i in range(n)]
+
+
+def test_iter_traces_round_trips_writer_output():
+    traces = make_traces(3)
+    text = ''.join(format_text(t) for t in traces)
+    assert list(iter_traces(io.StringIO(text))) == traces
+
+
+def test_iter_traces_sample_file_keeps_lossy_lines():
+    traces = list(iter_traces(SAMPLE))
+    assert [t.destination for t in traces] == ['google.com', '142.250.71.238', '8.8.8.8', '1.1.1.1']
+    google = traces[0]
+    assert google.hops[0] == HopResult(ttl=1, ip='10.209.64.1', rtt=12.18, protocol='ICMP')
+    assert any(h.loss and h.ip == '*' for h in google.hops)
+
+
+def test_iter_traces_is_lazy():
+    def lines():
+        yield 'Trace to a:\n'
+        yield 'TTL 1: 1.1.1.1 () [ICMP] RTT=1.00ms \n'
+        yield 'Trace to b:\n'
+        raise AssertionError('read past the first trace')
+
+    assert next(iter_traces(lines())).destination == 'a'
+
+
+@pytest.mark.parametrize('n_chunks', [1, 2, 7, 50])
+def test_chunks_start_on_trace_boundaries(tmp_path, n_chunks):
+    path = str(tmp_path / 'big.txt')
+    traces = make_traces(40)
+    with open(path, 'w') as f:
+        f.writelines(format_text(t) for t in traces)
+
+    chunks = find_chunks(path, n_chunks)
+    assert chunks[0][0] == 0 and chunks[-1][1] == os.path.getsize(path)
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert [t for start, end in chunks for t in parse_chunk(path, start, end)] == traces
+
+
+def test_parse_parallel_matches_streaming(tmp_path):
+    path = str(tmp_path / 'big.txt')
+    traces = make_traces(200)
+    with open(path, 'w') as f:
+        f.writelines(format_text(t) for t in traces)
+    assert list(parse_parallel(path, workers=2, chunk_size=2048)) == traces
+
+
+def test_iter_tracert():
+    text = (
+        "# Windows Tracert Results\n\n"
+        "================================================================================\n"
+        "URL #1: google.com\n"
+        "================================================================================\n\n"
+        "Tracing route to google.com [142.250.71.238]\n"
+        "over a maximum of 30 hops:\n\n"
+        "  1    <1 ms    <1 ms     1 ms  192.168.1.1\n"
+        "  2     *        *        *     Request timed out.\n"
+        "  3     5 ms     4 ms     *     hk-gw.example.net [10.0.0.3]\n\n"
+        "Trace complete.\n\n"
+        "URL #2: 8.8.8.8\n"
+        "  1     2 ms     2 ms     2 ms  8.8.8.8\n"
+    )
+    traces = list(iter_tracert(io.StringIO(text)))
+    assert [t.destination for t in traces] == ['google.com', '8.8.8.8']
+
+    hops = traces[0].hops
+    assert len(hops) == 9
+    assert (hops[0].ip, hops[0].rtt, hops[2].rtt) == ('192.168.1.1', 1.0, 1.0)
+    assert all(h.loss and h.ip == '*' for h in hops[3:6])
+    assert (hops[6].ip, hops[6].hostname, hops[6].rtt) == ('10.0.0.3', 'hk-gw.example.net', 5.0)
+    assert hops[8].loss
+
+
+LINUX_TRACEROUTE = (
+    "traceroute to google.com (142.250.71.238), 30 hops max, 60 byte packets\n"
+    " 1  _gateway (192.168.1.1)  0.512 ms  0.478 ms  0.455 ms\n"
+    " 2  * * *\n"
+    " 3  10.0.0.1 (10.0.0.1)  5.100 ms 10.0.0.2 (10.0.0.2)  5.300 ms *\n"
+    " 4  142.250.71.238  9.1 ms !H  9.0 ms  8.9 ms\n"
+)
+
+
+def test_traceroute_hops():
+    assert traceroute_hops("traceroute to google.com (142.250.71.238), 30 hops max") == []
+    hops = traceroute_hops(" 3  10.0.0.1 (10.0.0.1)  5.100 ms 10.0.0.2 (10.0.0.2)  5.300 ms *")
+    assert [(h.ttl, h.ip, h.hostname, h.rtt, h.loss) for h in hops] == [(3, '10.0.0.1', None, 5.1, False), (3, '10.0.0.2', None, 5.3, False), (3, '*', None, 0, True)]
+    hops = traceroute_hops(" 1  _gateway (192.168.1.1)  0.512 ms  0.478 ms  0.455 ms")
+    assert {h.hostname for h in hops} == {'_gateway'}
+    assert all(h.protocol == 'UDP' for h in hops)
+
+
+def test_parse_system_trace():
+    trace = parse_system_trace(LINUX_TRACEROUTE)
+    assert trace.destination == 'google.com'
+    assert trace.raw == LINUX_TRACEROUTE
+    assert len(trace.hops) == 12
+    assert [h.ip for h in trace.hops if h.ttl == 4] == ['142.250.71.238'] * 3
+    assert parse_system_trace("  1    <1 ms    <1 ms     1 ms  192.168.1.1\n", '8.8.8.8').hops[0].protocol == 'ICMP'
+
+
+def test_iter_tracert_reads_linux_output():
+    text = "URL #1: google.com\n" + LINUX_TRACEROUTE
+    traces = list(iter_tracert(io.StringIO(text)))
+    assert [t.destination for t in traces] == ['google.com']
+    assert len(traces[0].hops) == 12
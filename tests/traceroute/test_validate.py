@@ -0,0 +1,75 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import subprocess
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from traceroute.results import HopResult, TraceResult
+from traceroute.validate import compare, run_system_trace, run_system_traces, system_command
+
+
+def trace(dest, *hops, protocol='UDP'):
+    """hops: (ttl, ip, rtt) with ip '*' for a lost probe."""
+    return TraceResult(dest, [HopResult(ttl, ip, rtt, protocol=protocol, loss=ip == '*') for ttl, ip, rtt in hops])
+
+
+def test_system_command():
+    assert system_command('8.8.8.8', max_hops=20, timeout=2, platform='linux') == ['traceroute', '-n', '-m', '20', '-w', '2', '-q', '3', '8.8.8.8']
+    assert system_command('8.8.8.8', protocol='ICMP', resolve_names=True, platform='linux')[:2] == ['traceroute', '-I']
+    assert system_command('8.8.8.8', max_hops=20, timeout=2, platform='win32') == ['tracert', '-d', '-h', '20', '-w', '2000', '8.8.8.8']
+
+
+def test_run_system_trace_reports_errors():
+    with patch('traceroute.validate.subprocess.run', side_effect=FileNotFoundError('traceroute')):
+        assert run_system_trace('8.8.8.8').startswith('ERROR:')
+    with patch('traceroute.validate.subprocess.run', side_effect=subprocess.TimeoutExpired('traceroute', 1)):
+        assert run_system_trace('8.8.8.8').startswith('ERROR:')
+
+
+def test_run_system_traces_parses_in_order():
+    def fake_run(cmd, **kwargs):
+        target = cmd[-1]
+        return MagicMock(stdout=f"traceroute to {target} ({target}), 30 hops max\n 1  10.0.0.1  1.0 ms  1.5 ms *\n 2  {target}  2.0 ms  2.0 ms  2.0 ms\n")
+
+    with patch('traceroute.validate.subprocess.run', side_effect=fake_run), patch.object(sys, 'platform', 'linux'):
+        results = list(run_system_traces(['192.0.2.1', '192.0.2.2'], workers=2, protocol='ICMP'))
+    assert [target for target, _ in results] == ['192.0.2.1', '192.0.2.2']
+    t = results[1][1]
+    assert t.destination == '192.0.2.2'
+    assert [(h.ttl, h.ip) for h in t.hops] == [(1, '10.0.0.1'), (1, '10.0.0.1'), (1, '*'), (2, '192.0.2.2'), (2, '192.0.2.2'), (2, '192.0.2.2')]
+    assert {h.protocol for h in t.hops} == {'ICMP'}
+
+
+def test_compare_agreement_and_rtt_deltas():
+    ours = [
+        trace('a', (1, 'r1', 2.0), (1, 'r1', 1.0), (2, 'r2', 5.0), (2, 'r2b', 6.0), (3, '*', 0)),
+        trace('b', (1, 'r1', 1.0), (2, 'x', 4.0)),
+        trace('only-ours', (1, 'r1', 1.0)),
+        trace('a-icmp', (1, 'r9', 1.0), protocol='ICMP'),
+    ]
+    theirs = [
+        trace('a', (1, 'r1', 1.5), (2, 'r2b', 4.0), (3, 'r3', 9.0)),
+        trace('b', (1, 'r1', 1.0), (2, 'y', 3.0), (3, '*', 0)),
+    ]
+    result = compare(ours, theirs)
+    assert result.destinations == ['a', 'b']
+    assert result.ttl.tolist() == [1, 2, 3, 1, 2, 3]
+    assert result.ours_answered.tolist() == [True, True, False, True, True, False]
+    assert result.theirs_answered.tolist() == [True, True, True, True, True, False]
+    assert result.agree.tolist() == [True, True, False, True, False, False]
+    assert result.agreement == pytest.approx(0.75)
+    # Fastest reply per hop on each side
+    assert result.rtt_delta.tolist() == pytest.approx([-0.5, 1.0, 0.0, 1.0])
+    assert result.agreement_by_ttl() == {1: 1.0, 2: 0.5}
+    assert result.agreement_by_destination() == {'a': 1.0, 'b': 0.5}
+    summary = result.summary()
+    assert 'Hop agreement: 75.0%' in summary
+    assert 'b: 50%' in summary
+
+
+def test_compare_filters_our_protocol():
+    ours = [TraceResult('a', [HopResult(1, 'r1', 1.0, protocol='UDP'), HopResult(1, 'r9', 1.0, protocol='ICMP')])]
+    theirs = [trace('a', (1, 'r9', 1.0), protocol='ICMP')]
+    assert compare(ours, theirs, protocol='ICMP').agree.tolist() == [True]
+    assert compare(ours, theirs, protocol='UDP').agree.tolist() == [False]
+    assert np.isnan(compare([], theirs).agreement)
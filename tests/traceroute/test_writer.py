@@ -0,0 +1,85 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import json
+import threading
+import pytest
+from traceroute.results import HopResult, TraceResult
+from traceroute.writer import JsonlResultWriter, TextResultWriter, open_writer, read_records, read_traces
+
+
+def make_trace(dest, n=2):
+    hops = [HopResult(ttl=i, ip=f'10.0.0.{i}', rtt=float(i), hostname='r' if i == 1 else None, protocol='UDP') for i in range(1, n + 1)]
+    hops.append(HopResult(ttl=n + 1, ip='*', rtt=0, loss=True))
+    return TraceResult(destination=dest, hops=hops)
+
+
+def test_jsonl_round_trip(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    with JsonlResultWriter(path, meta={'input': 'ips.txt'}) as writer:
+        writer.write(make_trace('a'))
+        writer.write(make_trace('b', n=5))
+
+    records = list(read_records(path))
+    assert records[0]['type'] == 'header'
+    assert records[0]['input'] == 'ips.txt'
+    traces = list(read_traces(path))
+    assert traces == [make_trace('a'), make_trace('b', n=5)]
+
+
+def test_jsonl_resume_skips_done_and_drops_partial_tail(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    with JsonlResultWriter(path) as writer:
+        writer.write(make_trace('a'))
+    # A run killed halfway through a line
+    with open(path, 'a') as f:
+        f.write(json.dumps({'type': 'trace', 'destination': 'b'})[:20])
+
+    with JsonlResultWriter(path, resume=True) as writer:
+        assert writer.completed == {'a'}
+        writer.write(make_trace('b'))
+
+    assert [t.destination for t in read_traces(path)] == ['a', 'b']
+    assert sum(1 for r in read_records(path) if r['type'] == 'header') == 1
+
+
+def test_without_resume_output_is_replaced(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    with JsonlResultWriter(path) as writer:
+        writer.write(make_trace('a'))
+    with JsonlResultWriter(path) as writer:
+        assert writer.completed == set()
+    assert list(read_traces(path)) == []
+
+
+def test_text_writer_matches_format_and_resumes(tmp_path):
+    path = str(tmp_path / 'out.txt')
+    with TextResultWriter(path) as writer:
+        writer.write(make_trace('a', n=1))
+    with open(path) as f:
+        content = f.read()
+    assert content == (
+        "Trace to a:\n"
+        "TTL 1: 10.0.0.1 (r) [UDP] RTT=1.00ms \n"
+        "TTL 2: * () [ICMP] RTT=0.00ms LOSS\n"
+        "\n"
+    )
+
+    with open(path, 'a') as f:
+        f.write("Trace to b:\nTTL 1: 10.0.0.1 () [UDP] RTT=1.00ms \n")
+    with TextResultWriter(path, resume=True) as writer:
+        assert writer.completed == {'a'}
+    with open(path) as f:
+        assert f.read() == content
+
+
+def test_concurrent_writers_do_not_interleave(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    writer = open_writer(path)
+    assert isinstance(writer, JsonlResultWriter)
+    threads = [threading.Thread(target=lambda i=i: [writer.write(make_trace(f'{i}-{j}', n=20)) for j in range(20)]) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.close()
+    assert len(list(read_traces(path))) == 80
@@ -0,0 +1,97 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from traceroute.results import HopResult, TraceResult
+from traceroute.store import TraceStore, write_store
+from traceroute.writer import open_writer
+from visualizer.dataset import HopIndex, load, signature
+import pytest
+
+@pytest.fixture
+def traces():
+    return [
+        TraceResult(destination='a.example', hops=[
+            HopResult(ttl=1, ip='10.0.0.1', rtt=1.0, protocol='ICMP'),
+            HopResult(ttl=2, ip='*', rtt=0.0, protocol='ICMP', loss=True),
+            HopResult(ttl=2, ip='10.0.0.2', rtt=50.0, protocol='UDP'),
+        ]),
+        TraceResult(destination='b.example', hops=[
+            HopResult(ttl=1, ip='10.0.0.1', rtt=3.0, protocol='TCP'),
+        ]),
+        TraceResult(destination='a.example', hops=[
+            HopResult(ttl=1, ip='10.0.0.1', rtt=2.0, protocol='ICMP'),
+        ]),
+    ]
+
+@pytest.fixture
+def index(traces):
+    return HopIndex(TraceStore.from_traces(traces))
+
+def test_index_destinations(index):
+    assert index.destinations == ['a.example', 'b.example']
+    assert index.trace_ids('a.example').tolist() == [0, 2]
+    assert index.trace_ids('missing').tolist() == []
+    assert index.rtt_bounds() == (1.0, 50.0)
+
+def test_mask_filters(index):
+    assert index.mask().all()
+    assert index.mask(destinations=['b.example']).tolist() == [False, False, False, True, False]
+    assert index.mask(protocols=['ICMP']).tolist() == [True, True, False, False, True]
+    # lost probes are kept by the RTT filter
+    assert index.mask(rtt_range=(0.5, 2.5)).tolist() == [True, True, False, False, True]
+
+def test_traces_are_complete(index, traces):
+    assert index.traces() == traces
+    selected = index.traces(index.mask(protocols=['UDP']))
+    assert selected == traces[:1]
+
+def test_topology_filters_edges_not_paths():
+    index = HopIndex(TraceStore.from_traces([TraceResult(destination='d', hops=[
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1.0),
+        HopResult(ttl=2, ip='10.0.0.2', rtt=90.0),
+        HopResult(ttl=3, ip='10.0.0.3', rtt=3.0),
+    ])]))
+    assert set(index.topology().edges()) == {('10.0.0.1', '10.0.0.2'), ('10.0.0.2', '10.0.0.3')}
+    # Only the RTT of TTL 2 is out of range; TTL 1 and 3 were never adjacent
+    G = index.topology(index.mask(rtt_range=(0.0, 10.0)))
+    assert set(G.edges()) == {('10.0.0.2', '10.0.0.3')}
+
+def test_destination_summary(index):
+    summary = index.destination_summary()
+    assert summary['destination'] == ['a.example', 'b.example']
+    assert summary['hops'] == [4, 1]
+    assert summary['loss %'] == [25.0, 0.0]
+    assert summary['mean RTT (ms)'] == [pytest.approx(53 / 3, abs=0.01), 3.0]
+    assert summary['max TTL'] == [2, 1]
+
+def test_load_and_signature(tmp_path, traces):
+    store_path = str(tmp_path / 'store')
+    write_store(store_path, traces)
+    jsonl_path = str(tmp_path / 'results.jsonl')
+    with open_writer(jsonl_path) as writer:
+        for trace in traces:
+            writer.write(trace)
+    assert load(store_path).to_traces() == traces
+    assert load(jsonl_path).n_traces == 3
+
+    v6 = [TraceResult(destination='2001:db8::9', hops=[HopResult(ttl=1, ip='2001:db8::1', rtt=1.0)])]
+    v6_path = str(tmp_path / 'v6.jsonl')
+    with open_writer(v6_path) as writer:
+        writer.write(v6[0])
+    assert load(v6_path).to_traces() == v6
+
+    before = signature(store_path)
+    write_store(store_path, traces[:1], append=True)
+    assert signature(store_path) != before
+
+def test_dashboard_renders(tmp_path, traces):
+    testing = pytest.importorskip('streamlit.testing.v1')
+    path = str(tmp_path / 'store')
+    write_store(path, traces)
+    script = os.path.join(os.path.dirname(__file__), '../../visualizer/dashboard.py')
+    app = testing.AppTest.from_file(script, default_timeout=60)
+    app.run()
+    app.sidebar.text_input[0].set_value(path).run()
+    assert not app.exception
+    assert len(app.dataframe) == 1
+    app.sidebar.radio[0].set_value('Destination path').run()
+    assert not app.exception
@@ -56,3 +56,101 @@ def test_build_topology_hostname_attribute():
     
     assert G.nodes['1.1.1.1']['hostname'] == 'h1'
     assert 'hostname' in G.nodes['2.2.2.2'] and G.nodes['2.2.2.2']['hostname'] is None
+
+def test_build_topology_follows_probe_lanes():
+    # ICMP and UDP take different paths through a load balancer at TTL 2
+    hops = []
+    for ttl, icmp_ip, udp_ip in [(1, '10.0.0.1', '10.0.0.1'), (2, '10.0.1.1', '10.0.1.2'), (3, '9.9.9.9', '9.9.9.9')]:
+        for _ in range(2):
+            hops.append(HopResult(ttl=ttl, ip=icmp_ip, rtt=ttl, protocol='ICMP'))
+            hops.append(HopResult(ttl=ttl, ip=udp_ip, rtt=ttl, protocol='UDP'))
+    G = build_topology([TraceResult(destination='9.9.9.9', hops=hops)])
+
+    assert set(G.edges()) == {
+        ('10.0.0.1', '10.0.1.1'), ('10.0.0.1', '10.0.1.2'),
+        ('10.0.1.1', '9.9.9.9'), ('10.0.1.2', '9.9.9.9'),
+    }
+    # No cross-protocol edges between the two balanced interfaces
+    assert G.edges['10.0.1.1', '9.9.9.9']['protocols'] == {'ICMP'}
+    assert G.edges['10.0.1.1', '9.9.9.9']['stats'].count == 2
+
+
+def test_build_topology_bridges_silent_hops():
+    hops = [
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1, protocol='ICMP'),
+        HopResult(ttl=2, ip='*', rtt=0, protocol='ICMP', loss=True),
+        HopResult(ttl=3, ip='9.9.9.9', rtt=3, protocol='ICMP'),
+    ]
+    G = build_topology([TraceResult(destination='9.9.9.9', hops=hops)])
+    assert set(G.edges()) == {('10.0.0.1', '9.9.9.9')}
+    assert '*' not in G
+    # The lost TTL 2 probe is charged to the edge its lane crossed
+    stats = G.edges['10.0.0.1', '9.9.9.9']['stats']
+    assert (stats.count, stats.losses, stats.mean) == (2, 1, 3)
+    assert stats.loss_rate == pytest.approx(0.5)
+
+
+def test_lost_probes_stay_in_their_lane():
+    hops = [
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1, protocol='ICMP'),
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1, protocol='UDP'),
+        HopResult(ttl=2, ip='*', rtt=0, protocol='UDP', loss=True),
+        HopResult(ttl=2, ip='10.0.1.1', rtt=2, protocol='ICMP'),
+        HopResult(ttl=3, ip='10.0.2.2', rtt=3, protocol='UDP'),
+        HopResult(ttl=3, ip='*', rtt=0, protocol='ICMP', loss=True),
+    ]
+    G = build_topology([TraceResult(destination='d', hops=hops)])
+    assert G.edges['10.0.0.1', '10.0.1.1']['stats'].losses == 0
+    assert G.edges['10.0.0.1', '10.0.2.2']['stats'].losses == 1
+    # A trailing loss has no next hop to charge
+    assert sum(d['stats'].losses for _, _, d in G.edges(data=True)) == 1
+
+
+def test_add_trace_keeps_only_edges_into_selected_hops():
+    from visualizer.graph import TopologyBuilder
+    hops = [
+        HopResult(ttl=3, ip='10.0.0.3', rtt=30, protocol='ICMP'),
+        HopResult(ttl=1, ip='10.0.0.1', rtt=1, protocol='ICMP'),
+        HopResult(ttl=2, ip='10.0.0.2', rtt=90, protocol='ICMP'),
+    ]
+    # Dropping TTL 2 must not join TTL 1 to TTL 3
+    G = TopologyBuilder().add_trace(TraceResult(destination='d', hops=hops), keep=[True, True, False])
+    assert set(G.edges()) == {('10.0.0.2', '10.0.0.3')}
+    assert G.nodes['10.0.0.2']['ttl'] == 2
+    assert G.edges['10.0.0.2', '10.0.0.3']['stats'].mean == 30
+
+
+def test_build_topology_running_stats_and_incremental_merge():
+    def trace(rtt, loss=False):
+        return TraceResult(destination='d', hops=[
+            HopResult(ttl=1, ip='1.1.1.1', rtt=1, protocol='ICMP'),
+            HopResult(ttl=2, ip='2.2.2.2', rtt=rtt, protocol='ICMP', loss=loss),
+        ])
+
+    G = build_topology([trace(10), trace(20)])
+    G2 = build_topology([trace(30), trace(0, loss=True)], graph=G)
+    assert G2 is G
+
+    stats = G.edges['1.1.1.1', '2.2.2.2']['stats']
+    assert stats.count == 4
+    assert stats.mean == pytest.approx(20)
+    assert stats.variance == pytest.approx(100)
+    assert (stats.min, stats.max) == (10, 30)
+    assert stats.loss_rate == pytest.approx(0.25)
+
+
+def test_running_stats_merge():
+    from visualizer.graph import RunningStats
+    a, b, both = RunningStats(), RunningStats(), RunningStats()
+    for x in [1, 2, 3]:
+        a.update(x)
+        both.update(x)
+    for x in [10, 20]:
+        b.update(x)
+        both.update(x)
+    b.update(0, loss=True)
+    both.update(0, loss=True)
+    a.merge(b)
+    assert (a.count, a.losses, a.min, a.max) == (both.count, both.losses, both.min, both.max)
+    assert a.mean == pytest.approx(both.mean)
+    assert a.variance == pytest.approx(both.variance)
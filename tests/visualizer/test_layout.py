@@ -0,0 +1,65 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import pytest
+from traceroute.results import HopResult, TraceResult
+from visualizer.graph import build_topology
+from visualizer.layout import LayoutCache, compute_layout, incremental_layout, layered_layout
+
+
+def path_trace(dest, ips):
+    return TraceResult(destination=dest, hops=[HopResult(ttl=i, ip=ip, rtt=i) for i, ip in enumerate(ips, 1)])
+
+
+@pytest.fixture
+def graph():
+    return build_topology([
+        path_trace('a', ['10.0.0.1', '10.0.1.1', '10.0.2.1']),
+        path_trace('b', ['10.0.0.1', '10.0.1.2', '10.0.2.2']),
+        path_trace('c', ['10.0.0.1', '10.0.1.1', '10.0.2.3']),
+    ])
+
+
+def test_layered_layout_columns_by_ttl(graph):
+    pos = layered_layout(graph)
+    assert set(pos) == set(graph.nodes())
+    assert pos['10.0.0.1'][0] == 1
+    assert {pos[n][0] for n in ('10.0.1.1', '10.0.1.2')} == {2}
+    assert {pos[n][0] for n in ('10.0.2.1', '10.0.2.2', '10.0.2.3')} == {3}
+    # No two nodes share a slot
+    assert len(set(pos.values())) == len(pos)
+
+
+def test_layered_layout_keeps_children_near_parents(graph):
+    pos = layered_layout(graph)
+    # 10.0.2.2 is the only child of 10.0.1.2 and sits on its side of the column
+    above = pos['10.0.1.2'][1] > pos['10.0.1.1'][1]
+    assert (pos['10.0.2.2'][1] > max(pos['10.0.2.1'][1], pos['10.0.2.3'][1])) == above
+
+
+def test_layered_layout_scales_linearly():
+    traces = [path_trace(f'd{i}', [f'10.{i % 50}.0.1', f'10.{i % 50}.{i % 7}.2', f'10.{i}.1.3', f'172.16.{i // 256}.{i % 256}']) for i in range(5000)]
+    G = build_topology(traces)
+    pos = layered_layout(G)
+    assert len(pos) == G.number_of_nodes()
+
+
+def test_incremental_layout_keeps_existing_positions(graph):
+    before = layered_layout(graph)
+    build_topology([path_trace('d', ['10.0.0.1', '10.0.1.2', '10.0.2.9', '10.0.3.9'])], graph=graph)
+    after = incremental_layout(graph, before)
+
+    assert all(after[n] == xy for n, xy in before.items())
+    assert after['10.0.2.9'][0] == 3 and after['10.0.3.9'][0] == 4
+    assert len(set(after.values())) == len(after)
+
+
+def test_layout_cache_persists(tmp_path, graph):
+    path = str(tmp_path / 'layout.json')
+    first = compute_layout(graph, cache_path=path)
+    build_topology([path_trace('d', ['10.0.0.1', '10.0.1.7'])], graph=graph)
+
+    cache = LayoutCache(path)
+    assert cache.positions == first
+    second = cache.layout(graph)
+    assert '10.0.1.7' in second
+    assert LayoutCache(path).positions == second
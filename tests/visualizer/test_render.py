@@ -0,0 +1,116 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import math
+import numpy as np
+import pytest
+from traceroute.results import HopResult, TraceResult
+from visualizer.graph import build_topology
+from visualizer.layout import compute_layout
+from visualizer.render import MAX_DESTINATION_TRACES, auto_collapse, build_figure, collapse, edge_segments
+
+
+def path_trace(dest, ips):
+    return TraceResult(destination=dest, hops=[HopResult(ttl=i, ip=ip, rtt=i) for i, ip in enumerate(ips, 1)])
+
+
+@pytest.fixture
+def graph():
+    return build_topology([
+        path_trace('a', ['10.0.0.1', '10.0.1.1', '10.0.2.1', '10.0.3.1']),
+        path_trace('b', ['10.0.0.1', '10.0.1.2', '10.0.2.2', '10.0.3.1']),
+        path_trace('c', ['10.0.0.1', '10.0.1.1', '10.0.2.3', '10.0.9.1']),
+    ])
+
+
+def test_edge_segments_are_nan_separated():
+    xy = np.array([[0.0, 0.0], [1.0, 2.0], [2.0, 4.0]])
+    xs, ys = edge_segments(xy, np.array([0, 1]), np.array([1, 2]))
+    assert xs[:2].tolist() == [0.0, 1.0] and ys[3:5].tolist() == [2.0, 4.0]
+    assert math.isnan(xs[2]) and math.isnan(ys[5])
+
+
+def test_collapse_by_prefix(graph):
+    H = collapse(graph, 'prefix')
+    # Singleton clusters stay plain nodes
+    assert set(H.nodes()) == {'10.0.0.1', '10.0.1.0/24', '10.0.2.0/24', '10.0.3.1', '10.0.9.1'}
+    assert sorted(H.nodes['10.0.1.0/24']['members']) == ['10.0.1.1', '10.0.1.2']
+    # Stats of the merged edges are combined
+    stats = H['10.0.0.1']['10.0.1.0/24']['stats']
+    assert stats.count == 3
+    assert H['10.0.0.1']['10.0.1.0/24']['destinations'] == {'a', 'b', 'c'}
+    assert H['10.0.2.0/24']['10.0.3.1']['destinations'] == {'a', 'b'}
+
+
+def test_collapse_keeps_expanded_clusters(graph):
+    H = collapse(graph, 'prefix', expand={'10.0.1.0/24'})
+    assert {'10.0.1.1', '10.0.1.2'} <= set(H.nodes())
+    assert '10.0.1.0/24' not in H
+
+
+def test_collapse_by_ttl_band(graph):
+    H = collapse(graph, 'ttl')
+    assert list(H.nodes()) == ['TTL 1-4']
+
+
+def test_collapse_chains():
+    G = build_topology([
+        path_trace('a', ['10.0.0.1', '10.0.1.1', '10.0.2.1', '10.0.3.1', '10.0.4.1']),
+        path_trace('b', ['10.0.0.1', '10.0.5.1']),
+    ])
+    H = collapse(G, 'chains')
+    assert set(H.nodes()) == {'10.0.0.1', 'chain 10.0.1.1', '10.0.4.1', '10.0.5.1'}
+    assert H.nodes['chain 10.0.1.1']['members'] == ['10.0.1.1', '10.0.2.1', '10.0.3.1']
+    assert H.has_edge('10.0.0.1', 'chain 10.0.1.1') and H.has_edge('chain 10.0.1.1', '10.0.4.1')
+
+
+def test_collapse_rejects_unknown_mode(graph):
+    with pytest.raises(ValueError):
+        collapse(graph, 'asn')
+
+
+def test_auto_collapse_only_when_large(graph):
+    assert auto_collapse(graph, max_nodes=100) is graph
+    assert auto_collapse(graph, max_nodes=5).number_of_nodes() <= 5
+
+
+def test_auto_collapse_picks_finest_fitting_view_of_routers(graph):
+    H = auto_collapse(graph, max_nodes=5)
+    assert set(H.nodes()) == set(collapse(graph, 'prefix').nodes())
+    # Too many /24s: every router falls back to its /16, never to nested clusters
+    H = auto_collapse(graph, max_nodes=1)
+    assert list(H.nodes()) == ['10.0.0.0/16']
+    assert sorted(H.nodes['10.0.0.0/16']['members']) == sorted(graph.nodes())
+
+
+def test_build_figure_uses_webgl(graph):
+    fig = build_figure(graph, compute_layout(graph), lod=None)
+    assert {trace.type for trace in fig.data} == {'scattergl'}
+    nodes = fig.data[-1]
+    assert len(nodes.x) == graph.number_of_nodes()
+    edges = sum(len(trace.x) for trace in fig.data[:-1])
+    assert edges == 3 * graph.number_of_edges()
+
+
+def test_build_figure_groups_by_destination(graph):
+    fig = build_figure(graph, group_by='destination', lod=None)
+    assert {trace.name for trace in fig.data[:-1]} == {'a', 'b', 'c'}
+
+
+def test_build_figure_single_layer_for_many_destinations():
+    traces = [path_trace(f'd{i}', ['10.0.0.1', f'10.1.{i}.1']) for i in range(MAX_DESTINATION_TRACES + 1)]
+    fig = build_figure(build_topology(traces), group_by='destination', lod=None)
+    assert [trace.name for trace in fig.data[:-1]] == ['all destinations']
+    assert len(fig.data[0].x) == 3 * (MAX_DESTINATION_TRACES + 1)
+
+
+def test_build_figure_collapses_survey_scale_graph():
+    # Roughly the shape of a top-3k survey: shared core, per-destination tails
+    traces = [path_trace(f'd{i}', ['10.0.0.1', f'10.1.{i % 8}.1', f'10.2.{i % 64}.{i % 3}', f'10.3.{i // 250}.{i % 250}', f'172.16.{i // 250}.{i % 250}']) for i in range(3000)]
+    G = build_topology(traces)
+    pos = compute_layout(G)
+    fig = build_figure(G, pos, group_by='destination', max_nodes=2000)
+    assert len(fig.data[-1].x) <= 2000
+    assert any(' (' in label for label in fig.data[-1].text)
+    fig = build_figure(G, pos, lod=None)
+    assert len(fig.data[-1].x) == G.number_of_nodes() > 2000
+    assert fig.data[-1].mode == 'markers'
@@ -1,15 +1,60 @@
-from scapy.all import IP
-
 from abc import ABC, abstractmethod
-from typing import Optional
-from scapy.all import IP
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    # scapy takes seconds to import; probes load it when they build a packet
+    from scapy.all import IP
+
+# Where an RTT came from, most to least accurate:
+#   kernel    - receive timestamp from the kernel (SO_TIMESTAMPNS)
+#   packet    - send/receive timestamps stamped on the packets by the capture path
+#   monotonic - monotonic clock around the whole send/receive call
+#   simulated - made up by traceroute.simnet
+RTT_KERNEL = "kernel"
+RTT_PACKET = "packet"
+RTT_MONOTONIC = "monotonic"
+RTT_SIMULATED = "simulated"
+RTT_SOURCES = (RTT_KERNEL, RTT_PACKET, RTT_MONOTONIC, RTT_SIMULATED)
 
 
 class Probe(ABC):
-    @abstractmethod
-    def send(self, dst_ip: str, ttl: int, **kwargs) -> Optional[IP]:
-        pass
+    # Persistent scapy L3 socket the scapy probes exchange packets through; None opens one per probe
+    l3socket = None
 
     @abstractmethod
-    def receive(self, timeout: float = 2) -> Optional[IP]:
+    def send(self, dst_ip: str, ttl: int, **kwargs) -> Optional["IP"]:
         pass
+
+    def receive(self, pkt: "IP", timeout: float = 2) -> Optional["IP"]:
+        """Send ``pkt`` with scapy and wait for its reply."""
+        if self.l3socket is not None:
+            resp = self.l3socket.sr1(pkt, timeout=timeout, verbose=0)
+        else:
+            from scapy.all import sr1
+            resp = sr1(pkt, timeout=timeout, verbose=0)
+        if resp is not None:
+            # sr1 stamps the probe when it goes out and the reply when it is captured
+            resp.sent_time = pkt.sent_time
+        return resp
+
+    @staticmethod
+    def rtt(resp, start: float, end: float) -> Tuple[float, str]:
+        """RTT in ms of a reply, and its source.
+
+        ``start``/``end`` are monotonic readings around the receive call. A
+        reply carrying ``sent_time`` and ``time`` stamps (and optionally a
+        ``time_source``) is measured from those instead, unless they are
+        inconsistent with the call itself (e.g. the wall clock stepped).
+        """
+        elapsed = (end - start) * 1000
+        sent, received = getattr(resp, "sent_time", None), getattr(resp, "time", None)
+        if isinstance(sent, (int, float, Decimal)) and isinstance(received, (int, float, Decimal)):
+            rtt = (float(received) - float(sent)) * 1000
+            source = getattr(resp, "time_source", None)
+            if source not in RTT_SOURCES:
+                source = RTT_PACKET
+            # Simulated replies need not take as long as the RTT they report
+            if source == RTT_SIMULATED or 0 <= rtt <= elapsed + 1:
+                return rtt, source
+        return elapsed, RTT_MONOTONIC
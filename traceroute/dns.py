@@ -0,0 +1,177 @@
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from .results import TraceResult
+
+
+def _gethostbyaddr(ip: str) -> Optional[str]:
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except (OSError, UnicodeError):
+        return None
+
+
+def _gethostbyname(name: str) -> Optional[str]:
+    try:
+        return socket.gethostbyname(name)
+    except (OSError, UnicodeError):
+        return None
+
+
+class ReverseResolver:
+    """Deduplicating, cached reverse-DNS stage that runs beside the probes.
+
+    Lookups run on a bounded worker pool. Both names and failures are cached
+    (failures for ``negative_ttl`` seconds) and optionally persisted to
+    ``cache_file`` as JSON.
+    """
+
+    def __init__(self, workers: int = 16, timeout: float = 2.0, ttl: float = 86400, negative_ttl: float = 3600, cache_file: Optional[str] = None, lookup: Callable[[str], Optional[str]] = _gethostbyaddr, clock: Callable[[], float] = time.time):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_file = cache_file
+        self.hits = 0
+        self.misses = 0
+        self._lookup = lookup
+        self._clock = clock
+        self._cache: Dict[str, Tuple[Optional[str], float]] = {}
+        self._pending: Dict[str, Future] = {}
+        # Looked up by a prefetch and not yet counted as anyone's miss
+        self._unclaimed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rdns")
+        if cache_file:
+            self.load(cache_file)
+
+    def __enter__(self) -> "ReverseResolver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _cached(self, ip: str) -> Tuple[bool, Optional[str]]:
+        entry = self._cache.get(ip)
+        if entry is None:
+            return False, None
+        hostname, expires = entry
+        if expires < self._clock():
+            del self._cache[ip]
+            return False, None
+        return True, hostname
+
+    def _store(self, ip: str, hostname: Optional[str]) -> None:
+        ttl = self.ttl if hostname else self.negative_ttl
+        with self._lock:
+            self._cache[ip] = (hostname, self._clock() + ttl)
+            self._pending.pop(ip, None)
+
+    def _run(self, ip: str) -> Optional[str]:
+        hostname = self._lookup(ip)
+        self._store(ip, hostname)
+        return hostname
+
+    def _submit(self, ip: str, count: bool = True) -> Optional[Future]:
+        """Start a lookup unless one is cached or under way; None if cached.
+
+        A counted request is one cache hit or miss. Prefetches are not
+        counted: the lookup a prefetch starts is the miss of the first
+        counted request for that address.
+        """
+        with self._lock:
+            found, _ = self._cached(ip)
+            future = None if found else self._pending.get(ip)
+            if not found and future is None:
+                future = self._pending[ip] = self._pool.submit(self._run, ip)
+                self._unclaimed.add(ip)
+            if count:
+                if ip in self._unclaimed:
+                    self._unclaimed.discard(ip)
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            return future
+
+    def prefetch(self, ips: Iterable[str]) -> None:
+        """Queue lookups without waiting for them (or counting them)."""
+        for ip in set(ips):
+            if ip and ip != '*':
+                self._submit(ip, count=False)
+
+    def resolve(self, ip: str) -> Optional[str]:
+        if not ip or ip == '*':
+            return None
+        future = self._submit(ip)
+        if future is None:
+            with self._lock:
+                return self._cached(ip)[1]
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Give up on this answer; the worker stores whatever it gets later
+            return None
+
+    def resolve_all(self, ips: Iterable[str]) -> Dict[str, Optional[str]]:
+        ips = {ip for ip in ips if ip and ip != '*'}
+        self.prefetch(ips)
+        return {ip: self.resolve(ip) for ip in ips}
+
+    def annotate(self, trace: TraceResult) -> TraceResult:
+        # Hops named by an earlier pass are not looked up (or counted) again
+        names = self.resolve_all(hop.ip for hop in trace.hops if hop.hostname is None)
+        for hop in trace.hops:
+            if hop.hostname is None:
+                hop.hostname = names.get(hop.ip)
+        return trace
+
+    def load(self, path: str) -> None:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = self._clock()
+        with self._lock:
+            for ip, (hostname, expires) in data.items():
+                if expires >= now:
+                    self._cache[ip] = (hostname, expires)
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.cache_file
+        if not path:
+            return
+        now = self._clock()
+        with self._lock:
+            data = {ip: [hostname, expires] for ip, (hostname, expires) in self._cache.items() if expires >= now}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.save()
+
+
+_default_resolver: Optional[ReverseResolver] = None
+_default_lock = threading.Lock()
+
+
+def get_default_resolver() -> ReverseResolver:
+    global _default_resolver
+    with _default_lock:
+        if _default_resolver is None:
+            _default_resolver = ReverseResolver()
+        return _default_resolver
+
+
+class ForwardResolver(ReverseResolver):
+    """Name -> IPv4 address lookups for target lists, with the same pool and caches as ReverseResolver."""
+
+    def __init__(self, workers: int = 16, timeout: float = 5.0, ttl: float = 3600, negative_ttl: float = 300, cache_file: Optional[str] = None, lookup: Callable[[str], Optional[str]] = _gethostbyname, clock: Callable[[], float] = time.time):
+        super().__init__(workers=workers, timeout=timeout, ttl=ttl, negative_ttl=negative_ttl, cache_file=cache_file, lookup=lookup, clock=clock)
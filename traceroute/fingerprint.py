@@ -0,0 +1,182 @@
+"""Per-destination path fingerprints and run-to-run path comparison.
+
+    python -m traceroute.fingerprint yesterday.jsonl today.jsonl
+
+Results may be text or JSON Lines files or trace store directories.
+"""
+import argparse
+import hashlib
+import os
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .results import TraceResult
+
+# Hop IP per TTL from TTL 1 on, '*' where nothing answered
+Path = Tuple[str, ...]
+
+
+class PathChange(NamedTuple):
+    destination: str
+    protocol: str
+    ttl: int  # first TTL where the paths differ
+    old: str
+    new: str
+
+
+def trace_paths(trace: TraceResult) -> Dict[str, Path]:
+    """The hop-IP sequence of every protocol in ``trace``; a TTL's first reply wins."""
+    answered: Dict[str, Dict[int, str]] = {}
+    for hop in trace.hops:
+        ttls = answered.setdefault(hop.protocol, {})
+        if hop.loss:
+            ttls.setdefault(hop.ttl, "*")
+        elif ttls.get(hop.ttl, "*") == "*":
+            ttls[hop.ttl] = sys.intern(hop.ip)
+    return {proto: tuple(ttls.get(ttl, "*") for ttl in range(1, max(ttls) + 1)) for proto, ttls in answered.items() if ttls}
+
+
+def hash_path(path: Path) -> int:
+    return int.from_bytes(hashlib.blake2b("\0".join(path).encode(), digest_size=8).digest(), "big")
+
+
+def fingerprints(trace: TraceResult) -> Dict[str, int]:
+    """64-bit hash of the hop-IP sequence per protocol."""
+    return {proto: hash_path(path) for proto, path in trace_paths(trace).items()}
+
+
+def divergence(old: Path, new: Path) -> Optional[int]:
+    """First TTL where two paths differ, or None if they are the same."""
+    for i, (a, b) in enumerate(zip(old, new)):
+        if a != b:
+            return i + 1
+    if len(old) != len(new):
+        return min(len(old), len(new)) + 1
+    return None
+
+
+class FingerprintIndex:
+    """Destination -> (per-protocol fingerprints, paths) of one result set."""
+
+    def __init__(self, traces: Iterable[TraceResult] = ()):
+        self._entries: Dict[str, Tuple[Dict[str, int], Dict[str, Path]]] = {}
+        for trace in traces:
+            self.add(trace)
+
+    def add(self, trace: TraceResult) -> None:
+        paths = trace_paths(trace)
+        self._entries[trace.destination] = ({proto: hash_path(path) for proto, path in paths.items()}, paths)
+
+    def __contains__(self, destination: str) -> bool:
+        return destination in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def destinations(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def fingerprints(self, destination: str) -> Dict[str, int]:
+        return self._entries[destination][0]
+
+    def paths(self, destination: str) -> Dict[str, Path]:
+        return self._entries[destination][1]
+
+    def changes(self, trace: TraceResult) -> List[PathChange]:
+        """How ``trace`` differs from the indexed trace to the same destination."""
+        entry = self._entries.get(trace.destination)
+        if entry is None:
+            return []
+        old_fps, old_paths = entry
+        changes = []
+        for proto, path in trace_paths(trace).items():
+            old = old_paths.get(proto)
+            if old is None or old_fps[proto] == hash_path(path):
+                continue
+            ttl = divergence(old, path)
+            if ttl is not None:
+                changes.append(PathChange(trace.destination, proto, ttl, _at(old, ttl), _at(path, ttl)))
+        return changes
+
+
+def _at(path: Path, ttl: int) -> str:
+    return path[ttl - 1] if ttl <= len(path) else "-"
+
+
+def compare(old: Iterable[TraceResult], new: Iterable[TraceResult]) -> Iterator[PathChange]:
+    """Path changes between two result sets: one pass over each, a hash lookup per trace."""
+    index = FingerprintIndex(old)
+    for trace in new:
+        yield from index.changes(trace)
+
+
+def spot_ttls(path: Path, n: int) -> List[int]:
+    """Up to ``n`` answered TTLs spread along ``path``, always including the last one."""
+    answered = [ttl for ttl, ip in enumerate(path, 1) if ip != "*"]
+    if n <= 0 or not answered:
+        return []
+    if n >= len(answered):
+        return answered
+    step = (len(answered) - 1) / (n - 1) if n > 1 else 0
+    return sorted({answered[len(answered) - 1 - round(i * step)] for i in range(n)})
+
+
+def make_retracer(previous: Iterable[TraceResult], trace_fn: Callable[..., TraceResult], spot_checks: int = 3) -> Callable[..., TraceResult]:
+    """Wrap ``trace_fn`` so known destinations are only spot-checked.
+
+    A few TTLs of the previous path are probed with a single series; if
+    every reply matches the previous run, the previous trace is returned,
+    otherwise (or for destinations not seen before) the full trace is run.
+    """
+    traces = {trace.destination: trace for trace in previous}
+    index = FingerprintIndex(traces.values())
+
+    def retrace(target: str, **kwargs) -> TraceResult:
+        if target not in index:
+            return trace_fn(target, **kwargs)
+        paths = index.paths(target)
+        ttls = sorted({ttl for path in paths.values() for ttl in spot_ttls(path, spot_checks)})
+        for ttl in ttls:
+            check = trace_fn(target, **{**kwargs, "init_ttl": ttl, "max_ttl": ttl, "series": 1})
+            for hop in check.hops:
+                old = paths.get(hop.protocol)
+                if hop.loss or old is None or hop.ttl > len(old) or old[hop.ttl - 1] == "*":
+                    continue
+                if old[hop.ttl - 1] != hop.ip:
+                    return trace_fn(target, **kwargs)
+        return traces[target]
+
+    return retrace
+
+
+def load_traces(path: str) -> Iterator[TraceResult]:
+    """Stream the traces of a text or JSON Lines result file, or of a trace store directory."""
+    if os.path.isdir(path):
+        from .store import load_store
+        return load_store(path).iter_traces()
+    if path.endswith(".jsonl"):
+        from .writer import read_traces
+        return read_traces(path)
+    from .trace_parser import iter_traces
+    return iter_traces(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="List destinations whose paths changed between two result sets")
+    parser.add_argument("old", help="Earlier results (text, .jsonl or trace store directory)")
+    parser.add_argument("new", help="Later results")
+    args = parser.parse_args(argv)
+
+    index = FingerprintIndex(load_traces(args.old))
+    changed, compared = set(), 0
+    for trace in load_traces(args.new):
+        compared += trace.destination in index
+        for change in index.changes(trace):
+            changed.add(change.destination)
+            print(f"{change.destination} [{change.protocol}] TTL {change.ttl}: {change.old} -> {change.new}")
+    print(f"{len(changed)} of {compared} destinations changed path", file=sys.stderr)
+    return 1 if changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,13 @@
-from scapy.all import IP, ICMP, sr1
-from typing import Optional
+from typing import TYPE_CHECKING
 from .base import Probe
 
+if TYPE_CHECKING:
+    from scapy.all import IP
+
 
 class ICMPProbe(Probe):
-    def send(self, dst_ip: str, ttl: int, **kwargs) -> IP:
+    def send(self, dst_ip: str, ttl: int, **kwargs) -> "IP":
+        from scapy.all import IP, ICMP
+
         pkt = IP(dst=dst_ip, ttl=ttl) / ICMP()
         return pkt
-
-    def receive(self, pkt: IP, timeout: float = 2) -> Optional[IP]:
-        resp = sr1(pkt, timeout=timeout, verbose=0)
-        return resp
@@ -0,0 +1,182 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+PREFIX = "topology"
+
+# Seconds; fine at the bottom for per-probe stages, coarse at the top for whole traces
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTERS = {
+    "probes_sent": "Probes sent",
+    "probe_replies": "Probes that got a reply",
+    "probe_timeouts": "Probes that timed out",
+    "traces_completed": "Traces finished",
+    "trace_errors": "Traces that failed",
+}
+# Pipeline stages timed by Metrics.time()
+STAGES = ("send", "throttle", "receive", "wait", "trace", "dns", "write")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            yield repr(bound), seen
+        yield "+Inf", self.count
+
+
+class Metrics:
+    """Counters and per-stage latency histograms of one run, safe to share between threads."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.stages: Dict[str, Histogram] = {}
+        self.resolver = None
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(stage, self.clock() - start)
+
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    @property
+    def pps(self) -> float:
+        elapsed = self.elapsed
+        return self.counters["probes_sent"] / elapsed if elapsed > 0 else 0.0
+
+    def dns_stats(self) -> Optional[Tuple[int, int]]:
+        """(hits, misses) of the attached reverse-DNS cache, if any."""
+        if self.resolver is None:
+            return None
+        return self.resolver.hits, self.resolver.misses
+
+    def render(self) -> str:
+        """Snapshot in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self.counters)
+            stages = {name: (list(h.cumulative()), h.sum, h.count) for name, h in self.stages.items()}
+        lines: List[str] = []
+        for name, help_text in COUNTERS.items():
+            metric = f"{PREFIX}_{name}_total"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter", f"{metric} {counters[name]}"]
+
+        metric = f"{PREFIX}_stage_seconds"
+        lines += [f"# HELP {metric} Time spent per pipeline stage", f"# TYPE {metric} histogram"]
+        for stage, (buckets, total, count) in sorted(stages.items()):
+            for le, n in buckets:
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {n}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {count}')
+
+        metric = f"{PREFIX}_probes_per_second"
+        lines += [f"# HELP {metric} Probes sent per second since the start of the run", f"# TYPE {metric} gauge", f"{metric} {self.pps:.3f}"]
+
+        dns = self.dns_stats()
+        if dns is not None:
+            hits, misses = dns
+            for name, value in (("hits", hits), ("misses", misses)):
+                metric = f"{PREFIX}_dns_cache_{name}_total"
+                lines += [f"# HELP {metric} Reverse-DNS cache {name}", f"# TYPE {metric} counter", f"{metric} {value}"]
+            metric = f"{PREFIX}_dns_cache_hit_ratio"
+            ratio = hits / (hits + misses) if hits + misses else 0.0
+            lines += [f"# HELP {metric} Share of reverse-DNS lookups served from cache", f"# TYPE {metric} gauge", f"{metric} {ratio:.4f}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def summary(self) -> str:
+        c = self.counters
+        lines = [
+            f"Elapsed {self.elapsed:.1f}s: {c['traces_completed']} traces ({c['trace_errors']} failed), "
+            f"{c['probes_sent']} probes, {c['probe_replies']} replies, {c['probe_timeouts']} timeouts, {self.pps:.1f} probes/s",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: STAGES.index(item[0]) if item[0] in STAGES else len(STAGES))
+            for name, h in stages:
+                lines.append(f"  {name:<8} total {h.sum:9.2f}s  mean {h.mean * 1000:9.2f}ms  p95 <={h.quantile(0.95) * 1000:9.2f}ms  max {h.max * 1000:9.2f}ms  (n={h.count})")
+        dns = self.dns_stats()
+        if dns is not None and sum(dns):
+            hits, misses = dns
+            lines.append(f"  DNS cache hit rate {hits / (hits + misses):.0%} ({hits} hits, {misses} misses)")
+        return "\n".join(lines)
+
+
+class MetricsReporter:
+    """Writes a metrics snapshot to ``path`` every ``interval`` seconds, and once more on stop()."""
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.metrics.write(self.path)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.metrics.write(self.path)
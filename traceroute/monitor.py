@@ -0,0 +1,263 @@
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .base import Probe
+from .dns import ReverseResolver
+from .metrics import Metrics
+from .results import HopResult, TraceResult
+from .runner import Backend, _probe_factories, run_batch, run_traceroute
+
+
+class RingBuffer:
+    """Last ``size`` RTT samples in a preallocated array; losses are stored as NaN."""
+
+    __slots__ = ("_data", "_next", "_len")
+
+    def __init__(self, size: int):
+        self._data = array("d", bytes(8 * size))
+        self._next = 0
+        self._len = 0
+
+    def append(self, value: float) -> None:
+        self._data[self._next] = value
+        self._next = (self._next + 1) % len(self._data)
+        self._len = min(self._len + 1, len(self._data))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def values(self) -> List[float]:
+        """Samples oldest first."""
+        if self._len < len(self._data):
+            return self._data[:self._len].tolist()
+        return self._data[self._next:].tolist() + self._data[:self._next].tolist()
+
+
+class HopStats:
+    """mtr-style running statistics of one TTL: totals since the start plus a window of recent samples."""
+
+    __slots__ = ("ip", "hostname", "sent", "received", "last", "best", "worst", "_mean", "_m2", "recent")
+
+    def __init__(self, history: int = 100):
+        self.ip = "*"
+        self.hostname: Optional[str] = None
+        self.sent = 0
+        self.received = 0
+        self.last = 0.0
+        self.best = math.inf
+        self.worst = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.recent = RingBuffer(history)
+
+    def add(self, hop: HopResult) -> None:
+        self.sent += 1
+        if hop.loss:
+            self.recent.append(math.nan)
+            return
+        rtt = hop.rtt
+        self.ip = hop.ip
+        self.hostname = hop.hostname
+        self.received += 1
+        self.last = rtt
+        self.best = min(self.best, rtt)
+        self.worst = max(self.worst, rtt)
+        # Welford's online mean and variance
+        delta = rtt - self._mean
+        self._mean += delta / self.received
+        self._m2 += delta * (rtt - self._mean)
+        self.recent.append(rtt)
+
+    @property
+    def loss(self) -> float:
+        """Lost probes in percent."""
+        return 100.0 * (self.sent - self.received) / self.sent if self.sent else 0.0
+
+    @property
+    def avg(self) -> float:
+        return self._mean
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self._m2 / (self.received - 1)) if self.received > 1 else 0.0
+
+
+class PathStats:
+    """Per-TTL statistics of one destination and a bounded log of path changes."""
+
+    def __init__(self, destination: str, history: int = 100):
+        self.destination = destination
+        self.history = history
+        self.hops: Dict[int, HopStats] = {}
+        self.path: Dict[int, str] = {}
+        self.changes: Deque[Tuple[float, int, str, str]] = deque(maxlen=history)
+        self.n_changes = 0
+        self.cycles = 0
+
+    def update(self, trace: TraceResult, now: Optional[float] = None) -> List[Tuple[int, str, str]]:
+        """Fold one trace in; returns the (ttl, old ip, new ip) changes it revealed."""
+        now = time.time() if now is None else now
+        answered: Dict[int, str] = {}
+        for hop in trace.hops:
+            stats = self.hops.get(hop.ttl)
+            if stats is None:
+                stats = self.hops[hop.ttl] = HopStats(self.history)
+            stats.add(hop)
+            if not hop.loss:
+                answered.setdefault(hop.ttl, hop.ip)
+
+        # Only TTLs that answered in both cycles can reveal a change; silence is loss, not a new path
+        changed = [(ttl, self.path[ttl], ip) for ttl, ip in sorted(answered.items()) if self.path.get(ttl, ip) != ip]
+        for ttl, old, new in changed:
+            self.changes.append((now, ttl, old, new))
+        self.n_changes += len(changed)
+        self.path.update(answered)
+        self.cycles += 1
+        return changed
+
+    def report(self) -> str:
+        lines = [
+            f"{self.destination}  ({self.cycles} cycles, {self.n_changes} path changes)",
+            f"{'TTL':>4}  {'Host':<40} {'Loss%':>6} {'Snt':>5} {'Last':>7} {'Avg':>7} {'Best':>7} {'Wrst':>7} {'StDev':>7}",
+        ]
+        for ttl in sorted(self.hops):
+            s = self.hops[ttl]
+            host = f"{s.hostname} ({s.ip})" if s.hostname else s.ip
+            if not s.received:
+                lines.append(f"{ttl:>4}  {host:<40} {s.loss:>5.1f}% {s.sent:>5}")
+                continue
+            lines.append(f"{ttl:>4}  {host:<40} {s.loss:>5.1f}% {s.sent:>5} {s.last:>7.1f} {s.avg:>7.1f} {s.best:>7.1f} {s.worst:>7.1f} {s.stddev:>7.1f}")
+        return "\n".join(lines)
+
+
+class ReusedProbes(Mapping):
+    """Probe factories that hand each thread the same probe instances on every call.
+
+    Probes (and the raw backend's packet templates) are built once per
+    worker thread instead of once per trace. With the scapy backend each
+    worker thread also opens one L3 socket that its probes send and receive
+    through, instead of a socket per probe; ``close()`` closes them.
+    """
+
+    def __init__(self, backend: Backend):
+        self._factories = _probe_factories(backend)
+        self._scapy = backend == "scapy"
+        self._local = threading.local()
+        self._sockets: List = []
+        self._lock = threading.Lock()
+
+    def _socket(self):
+        sock = getattr(self._local, "socket", None)
+        if sock is None:
+            from scapy.all import conf
+            sock = self._local.socket = conf.L3socket()
+            with self._lock:
+                self._sockets.append(sock)
+        return sock
+
+    def _probe(self, proto: str) -> Probe:
+        probes = getattr(self._local, "probes", None)
+        if probes is None:
+            probes = self._local.probes = {}
+        probe = probes.get(proto)
+        if probe is None:
+            probe = probes[proto] = self._factories[proto]()
+            if self._scapy:
+                probe.l3socket = self._socket()
+        return probe
+
+    def __getitem__(self, proto: str) -> Callable[[], Probe]:
+        if proto not in self._factories:
+            raise KeyError(proto)
+        return lambda: self._probe(proto)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def close(self) -> None:
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            sock.close()
+
+
+def reuse_probes(backend: Backend) -> ReusedProbes:
+    return ReusedProbes(backend)
+
+
+class Monitor:
+    """Cycles over ``targets`` forever (or ``cycles`` times), keeping constant-size statistics per path.
+
+    One worker pool serves every cycle, so the probes and sockets its
+    threads hold, and the reverse-DNS cache, are reused across cycles;
+    ``close()`` releases them. The latest trace of every
+    target is handed to ``on_snapshot`` at most every ``snapshot_interval``
+    seconds.
+    """
+
+    def __init__(self, targets: Iterable[str], trace_fn: Callable[..., TraceResult] = run_traceroute, history: int = 100, concurrency: int = 1, resolver: Optional[ReverseResolver] = None, on_snapshot: Optional[Callable[[TraceResult], None]] = None, snapshot_interval: float = 300.0, metrics: Optional[Metrics] = None, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep, **trace_kwargs):
+        self.targets = list(dict.fromkeys(targets))
+        self.trace_fn = trace_fn
+        self.concurrency = concurrency
+        self.resolver = resolver
+        self.on_snapshot = on_snapshot
+        self.snapshot_interval = snapshot_interval
+        self.metrics = metrics
+        self._clock = clock
+        self._sleep = sleep
+        self._probes: Optional[ReusedProbes] = None
+        if "backend" in trace_kwargs:
+            self._probes = trace_kwargs["backend"] = reuse_probes(trace_kwargs["backend"])
+        self.trace_kwargs = trace_kwargs
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        self.paths = {target: PathStats(target, history) for target in self.targets}
+        self.latest: Dict[str, TraceResult] = {}
+        self.cycles = 0
+        self._last_snapshot: Optional[float] = None
+
+    def cycle(self) -> List[TraceResult]:
+        traces = list(run_batch(self.targets, trace_fn=self.trace_fn, concurrency=self.concurrency, metrics=self.metrics, executor=self._executor, **self.trace_kwargs))
+        for trace in traces:
+            if self.resolver is not None:
+                self.resolver.annotate(trace)
+            self.paths[trace.destination].update(trace)
+            self.latest[trace.destination] = trace
+        self.cycles += 1
+
+        now = self._clock()
+        if self._last_snapshot is None or now - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+        return traces
+
+    def snapshot(self) -> None:
+        if self.on_snapshot is not None:
+            for trace in self.latest.values():
+                self.on_snapshot(trace)
+        self._last_snapshot = self._clock()
+
+    def run(self, cycles: int = 0, interval: float = 10.0, on_cycle: Optional[Callable[["Monitor"], None]] = None) -> None:
+        """Run cycles that start ``interval`` seconds apart; ``cycles`` = 0 runs until interrupted."""
+        while not cycles or self.cycles < cycles:
+            start = self._clock()
+            self.cycle()
+            if on_cycle is not None:
+                on_cycle(self)
+            remaining = interval - (self._clock() - start)
+            if remaining > 0 and (not cycles or self.cycles < cycles):
+                self._sleep(remaining)
+
+    def report(self) -> str:
+        return "\n\n".join(self.paths[target].report() for target in self.targets)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        if self._probes is not None:
+            self._probes.close()
@@ -0,0 +1,169 @@
+import random
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from scapy.all import IP, ICMP, TCP, UDP, AsyncSniffer, conf
+from scapy.layers.inet import ICMPerror, IPerror, TCPerror, UDPerror
+
+from .base import RTT_PACKET
+from .icmp import ICMPProbe
+from .udp import UDPProbe
+from .tcp import TCPProbe
+from .dns import ReverseResolver, get_default_resolver
+from .metrics import Metrics
+from .ratelimit import ProbeThrottle
+from .results import HopResult, TraceResult
+from .runner import PROTOCOLS
+
+# Source ports used to tag UDP/TCP probes; probe N goes out from BASE_SPORT + N.
+BASE_SPORT = 33000
+
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACH = 3
+ICMP_TIME_EXCEEDED = 11
+
+
+class BurstTransport:
+    """Sends a whole burst of probes and collects replies on one listener."""
+
+    def __init__(self, iface: Optional[str] = None):
+        self.iface = iface
+
+    def exchange(self, pkts: Sequence[IP], dst_ip: str, timeout: float, pace: Optional[Callable[[], None]] = None) -> List[IP]:
+        """Replies to ``pkts`` that arrive until ``timeout`` after the last one is sent."""
+        ready = threading.Event()
+        # No sniffer timeout: a paced burst can take longer than ``timeout`` to send
+        sniffer = AsyncSniffer(
+            iface=self.iface,
+            filter=f"icmp or (tcp and src host {dst_ip})",
+            store=True,
+            started_callback=ready.set,
+        )
+        sniffer.start()
+        ready.wait(timeout)
+        # Sending on one L3 socket stamps each probe with its own sent_time
+        sock = conf.L3socket(iface=self.iface)
+        try:
+            for pkt in pkts:
+                if pace is not None:
+                    pace()
+                sock.send(pkt)
+        finally:
+            sock.close()
+            # The sniffer thread only ends when stopped, so this waits out the reply window
+            sniffer.join(timeout)
+            sniffer.stop()
+        return [p[IP] for p in sniffer.results or [] if IP in p]
+
+
+def tag_probe(pkt: IP, tag: int, ident: int) -> IP:
+    pkt[IP].id = (ident + tag) & 0xFFFF
+    if ICMP in pkt:
+        pkt[ICMP].id = ident
+        pkt[ICMP].seq = tag
+    elif UDP in pkt:
+        pkt[UDP].sport = BASE_SPORT + tag
+    elif TCP in pkt:
+        pkt[TCP].sport = BASE_SPORT + tag
+    return pkt
+
+
+def reply_key(resp: IP, ident: int, base_sport: int = BASE_SPORT) -> Optional[Tuple[str, int]]:
+    """Return (probed destination, tag) of the probe that triggered ``resp``, or None."""
+    if ICMP in resp and resp[ICMP].type in (ICMP_TIME_EXCEEDED, ICMP_DEST_UNREACH):
+        if IPerror not in resp:
+            return None
+        dst = resp[IPerror].dst
+        if ICMPerror in resp:
+            return (dst, resp[ICMPerror].seq) if resp[ICMPerror].id == ident else None
+        if UDPerror in resp:
+            return dst, resp[UDPerror].sport - base_sport
+        if TCPerror in resp:
+            return dst, resp[TCPerror].sport - base_sport
+        # Router quoted only the IP header: fall back to the IP id
+        return dst, (resp[IPerror].id - ident) & 0xFFFF
+
+    if ICMP in resp and resp[ICMP].type == ICMP_ECHO_REPLY:
+        return (resp.src, resp[ICMP].seq) if resp[ICMP].id == ident else None
+    if TCP in resp:
+        return resp.src, resp[TCP].dport - base_sport
+    return None
+
+
+def match_reply(resp: IP, dst_ip: str, ident: int) -> Optional[int]:
+    """Return the tag of the probe that triggered ``resp``, or None."""
+    key = reply_key(resp, ident)
+    if key is None or key[0] != dst_ip:
+        return None
+    return key[1]
+
+
+def _resolve(dst: str) -> str:
+    try:
+        return socket.gethostbyname(dst)
+    except OSError:
+        return dst
+
+
+def run_parallel_traceroute(dst_ip: str, max_ttl: int = 30, init_ttl: int = 1, series: int = 3, dport: int = 33434, timeout: float = 2.0, resolve_host: bool = False, transport: Optional[BurstTransport] = None, throttle: Optional[ProbeThrottle] = None, resolver: Optional[ReverseResolver] = None, protocols: Sequence[str] = PROTOCOLS, metrics: Optional[Metrics] = None) -> TraceResult:
+    factories = {'ICMP': ICMPProbe, 'UDP': UDPProbe, 'TCP': TCPProbe}
+    probes = [factories[p]() for p in protocols]
+    transport = transport or BurstTransport()
+
+    target = _resolve(dst_ip)
+    ident = random.randint(1, 0xFFFF)
+
+    # Same ordering as the sequential runner: TTL x series x protocol
+    sent: List[Tuple[int, str, IP]] = []
+    for ttl in range(init_ttl, max_ttl + 1):
+        for _ in range(series):
+            for probe, proto in zip(probes, protocols):
+                pkt = probe.send(target, ttl, dport=dport)
+                sent.append((ttl, proto, tag_probe(pkt, len(sent), ident)))
+
+    pace = None
+    if throttle is not None:
+        # The whole burst is outstanding until the listener closes; sends are paced one by one
+        throttle.reserve(len(sent))
+        pace = lambda: throttle.pace(dst_ip)
+    start = time.monotonic()
+    try:
+        replies = transport.exchange([pkt for _, _, pkt in sent], target, timeout, pace=pace)
+    finally:
+        if throttle is not None:
+            throttle.release(dst_ip, len(sent))
+    if metrics is not None:
+        metrics.observe("receive", time.monotonic() - start)
+
+    answers: Dict[int, IP] = {}
+    for resp in replies:
+        tag = match_reply(resp, target, ident)
+        if tag is not None and 0 <= tag < len(sent) and tag not in answers:
+            answers[tag] = resp
+    if metrics is not None:
+        metrics.inc("probes_sent", len(sent))
+        metrics.inc("probe_replies", len(answers))
+        metrics.inc("probe_timeouts", len(sent) - len(answers))
+
+    # Probes past the first TTL that reached the destination are discarded
+    last_ttl = max_ttl
+    for tag, resp in answers.items():
+        if resp.src == target:
+            last_ttl = min(last_ttl, sent[tag][0])
+
+    trace = TraceResult(destination=dst_ip)
+    for tag, (ttl, proto, pkt) in enumerate(sent):
+        if ttl > last_ttl:
+            break
+        resp = answers.get(tag)
+        if resp is None:
+            trace.hops.append(HopResult(ttl=ttl, ip='*', rtt=0, protocol=proto, loss=True))
+            continue
+        rtt = max(0.0, (float(resp.time) - float(pkt.sent_time or resp.time)) * 1000)  # ms
+        trace.hops.append(HopResult(ttl=ttl, ip=resp.src, rtt=rtt, protocol=proto, loss=False, rtt_source=RTT_PACKET))
+
+    if resolve_host:
+        (resolver or get_default_resolver()).annotate(trace)
+    return trace
@@ -1,16 +1,53 @@
 import argparse
 
+from .sharding import SHARD_METHODS, parse_shard
+
 def get_arg_parser():
     parser = argparse.ArgumentParser(description="Internet Topology Explorer")
     
     parser.add_argument("-i", "--input", required=True, help="Input file with IP addresses")
+    parser.add_argument("-o", "--output", help="Output file (default: <input>_trace_results.txt)")
+    parser.add_argument("--format", choices=["text", "jsonl"], help="Output format (default: jsonl for *.jsonl outputs, text otherwise)")
+    parser.add_argument("--resume", action="store_true", help="Append to an existing output, skipping destinations already traced")
+    parser.add_argument("--store", help="Also write results to a binary columnar trace store in this directory")
     parser.add_argument("-n", action="store_true", help="Do not resolve hostnames")
     parser.add_argument("-m", type=int, default=30, help="Max TTL")
     parser.add_argument("-M", type=int, default=1, help="Initial TTL")
-    parser.add_argument("-P", choices=["ICMP", "UDP", "TCP"], help="Protocol")
+    parser.add_argument("-P", choices=["ICMP", "UDP", "TCP"], help="Probe only with this protocol (default: ICMP, UDP and TCP)")
     parser.add_argument("-p", type=int, help="Destination port (UDP/TCP)")
     parser.add_argument("--series", type=int, default=3, help="Number of probe series per hop")
+    parser.add_argument("--adaptive", action="store_true", help="Stop probing a hop once its replies agree; retry only lost probes (up to --series rounds)")
     parser.add_argument("--wait", type=float, default=1.0, help="Wait time between probes (s)")
     parser.add_argument("--size", type=int, default=60, help="Packet size in bytes")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Reply timeout per probe (s); the upper bound with --adaptive-timeout")
+    parser.add_argument("--adaptive-timeout", action="store_true", help="Derive per-hop timeouts from observed RTTs (SRTT/RTTVAR)")
+    parser.add_argument("--gap-limit", type=int, default=0, help="Stop a trace after this many consecutive silent TTLs, e.g. 5 (default: 0, probe up to --max-ttl)")
+    parser.add_argument("--engine", choices=["sequential", "parallel"], default="sequential", help="Probing engine: one TTL at a time, or every TTL in a single burst")
+    parser.add_argument("--backend", choices=["scapy", "raw", "sim"], default="scapy", help="Probe backend of the sequential engine: scapy packets, precompiled templates on raw sockets, or a simulated network (no root needed)")
+
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of destinations traced at once")
+    parser.add_argument("--pps", type=float, default=0, help="Global probe rate limit in packets/s (0 = unlimited)")
+    parser.add_argument("--per-dest-pps", type=float, default=0, help="Per-destination probe rate limit in packets/s (0 = unlimited)")
+    parser.add_argument("--max-outstanding", type=int, default=0, help="Maximum probes awaiting a reply at once (0 = unlimited)")
+    parser.add_argument("--sweep", action="store_true", help="Randomized bulk sweep of every (target, TTL) pair at --pps (ICMP or TCP)")
+    parser.add_argument("--doubletree", action="store_true", help="Skip path segments already seen in this batch (Doubletree stop sets)")
+    parser.add_argument("--start-ttl", type=int, default=5, help="Mid-path TTL where --doubletree starts probing")
+    parser.add_argument("--dns-cache", help="JSON file that persists reverse-DNS answers between runs")
+    parser.add_argument("--dns-workers", type=int, default=16, help="Concurrent reverse-DNS lookups")
+    parser.add_argument("--dns-timeout", type=float, default=2.0, help="Reverse-DNS lookup timeout (s)")
+    parser.add_argument("--monitor", action="store_true", help="Keep tracing the targets in cycles (mtr-style) and print running per-hop statistics")
+    parser.add_argument("--cycles", type=int, default=0, help="Number of --monitor cycles (0 = until interrupted)")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between the starts of --monitor cycles")
+    parser.add_argument("--history", type=int, default=100, help="RTT samples kept per hop in --monitor mode")
+    parser.add_argument("--snapshot-interval", type=float, default=300.0, help="Seconds between --monitor snapshots of the latest traces to the output and --store")
+    parser.add_argument("--retrace-changed", metavar="PREVIOUS", help="Spot-check destinations already in this earlier result set and fully re-trace only those whose path changed")
+    parser.add_argument("--spot-checks", type=int, default=3, help="TTLs probed per destination by --retrace-changed")
+    parser.add_argument("--processes", type=int, default=1, help="Split the targets into this many shards, trace them in separate processes and merge the results")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N", help="Trace only shard K of N of the targets (e.g. one vantage host of several)")
+    parser.add_argument("--shard-by", choices=SHARD_METHODS, default="hash", help="Assign targets to shards by hash of the destination or as contiguous ranges")
+    parser.add_argument("--vantage", help="Name of this vantage point, recorded in JSON Lines output")
+    parser.add_argument("--metrics-file", help="Periodically write probe counters and stage latencies here (Prometheus text format)")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between --metrics-file snapshots")
+    parser.add_argument("--profile", nargs="?", const="trace.prof", help="Run under cProfile and dump the stats to this file (default: trace.prof)")
 
     return parser
@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket; a rate <= 0 means unlimited."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> float:
+        if self.rate <= 0:
+            return 0.0
+        # Reserve the tokens now and sleep off any debt outside the lock,
+        # so concurrent callers queue up in arrival order.
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+
+class ProbeThrottle:
+    """Global pps budget, per-destination pps budget and a cap on outstanding probes."""
+
+    def __init__(self, pps: float = 0, per_dest_pps: float = 0, max_outstanding: int = 0):
+        self.pps = pps
+        self.per_dest_pps = per_dest_pps
+        self.max_outstanding = max_outstanding
+        self._global = TokenBucket(pps)
+        self._per_dest: Dict[str, TokenBucket] = {}
+        self._outstanding = 0
+        self._cond = threading.Condition()
+
+    @property
+    def outstanding(self) -> int:
+        return self._outstanding
+
+    def _bucket(self, dst: str) -> TokenBucket:
+        with self._cond:
+            bucket = self._per_dest.get(dst)
+            if bucket is None:
+                bucket = self._per_dest[dst] = TokenBucket(self.per_dest_pps)
+            return bucket
+
+    def reserve(self, n: int = 1) -> None:
+        if self.max_outstanding <= 0:
+            return
+        with self._cond:
+            # A burst larger than the cap is let through once nothing else is in flight
+            self._cond.wait_for(lambda: self._outstanding == 0 or self._outstanding + n <= self.max_outstanding)
+            self._outstanding += n
+
+    def pace(self, dst: str, n: int = 1) -> None:
+        self._bucket(dst).acquire(n)
+        self._global.acquire(n)
+
+    def acquire(self, dst: str, n: int = 1) -> None:
+        self.reserve(n)
+        self.pace(dst, n)
+
+    def release(self, dst: str, n: int = 1) -> None:
+        if self.max_outstanding > 0:
+            with self._cond:
+                self._outstanding = max(0, self._outstanding - n)
+                self._cond.notify_all()
+
+    def forget(self, dst: str) -> None:
+        with self._cond:
+            self._per_dest.pop(dst, None)
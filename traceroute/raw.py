@@ -0,0 +1,271 @@
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from abc import abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from scapy.all import IP, ICMP, TCP, UDP
+
+from .base import RTT_KERNEL, RTT_PACKET, Probe
+from .parallel import ICMP_DEST_UNREACH, ICMP_ECHO_REPLY, ICMP_TIME_EXCEEDED, _resolve, reply_key
+
+# Source ports used to tag UDP/TCP probes of the raw backend; tag N goes out from RAW_BASE_SPORT + N
+RAW_BASE_SPORT = 45000
+RAW_TAGS = 16384
+
+IP_PROTO_ICMP = 1
+IP_PROTO_TCP = 6
+IP_PROTO_UDP = 17
+
+# Kernel receive timestamps (Linux, where older Pythons lack the constant); elsewhere replies are stamped when read
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35 if sys.platform.startswith("linux") else None)
+TIMESPEC = struct.Struct("@ll")
+
+
+def checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def adjust_checksum(csum: int, old: int, new: int) -> int:
+    """Incrementally update a checksum after one 16-bit word changed (RFC 1624)."""
+    total = (~csum & 0xFFFF) + (~old & 0xFFFF) + new
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+class RawPacket(NamedTuple):
+    dst: str
+    tag: int
+    data: bytes
+
+
+class PacketTemplate:
+    """A probe serialized once; each send patches TTL, IDs and checksums in place."""
+
+    __slots__ = ("data", "ihl", "proto", "_l4_csum", "_tag_word")
+
+    def __init__(self, pkt: IP):
+        self.data = bytearray(bytes(pkt))
+        self.ihl = (self.data[0] & 0x0F) * 4
+        self.proto = self.data[9]
+        self._l4_csum = struct.unpack_from("!H", self.data, self._csum_offset())[0]
+        self._tag_word = struct.unpack_from("!H", self.data, self._tag_offset())[0]
+
+    def _csum_offset(self) -> int:
+        return self.ihl + {IP_PROTO_ICMP: 2, IP_PROTO_UDP: 6, IP_PROTO_TCP: 16}[self.proto]
+
+    def _tag_offset(self) -> int:
+        # ICMP echo sequence number, or the UDP/TCP source port
+        return self.ihl + (6 if self.proto == IP_PROTO_ICMP else 0)
+
+    def render(self, ttl: int, tag: int, ident: int) -> bytes:
+        buf = self.data
+        buf[8] = ttl
+        struct.pack_into("!H", buf, 4, (ident + tag) & 0xFFFF)
+        struct.pack_into("!H", buf, 10, 0)
+        struct.pack_into("!H", buf, 10, checksum(bytes(buf[:self.ihl])))
+
+        # The ICMP echo identifier is fixed per channel and already in the template
+        word = tag if self.proto == IP_PROTO_ICMP else RAW_BASE_SPORT + tag
+        csum = adjust_checksum(self._l4_csum, self._tag_word, word)
+        if self.proto == IP_PROTO_UDP and csum == 0:
+            csum = 0xFFFF
+        struct.pack_into("!H", buf, self._tag_offset(), word)
+        struct.pack_into("!H", buf, self._csum_offset(), csum)
+        return bytes(buf)
+
+
+def kernel_timestamp(ancdata: List[Tuple[int, int, bytes]]) -> Optional[float]:
+    """Receive time from an SCM_TIMESTAMPNS control message, if there is one."""
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(payload) >= TIMESPEC.size:
+            sec, nsec = TIMESPEC.unpack_from(payload)
+            return sec + nsec / 1e9
+    return None
+
+
+class RawChannel:
+    """Persistent raw sockets shared by every raw probe of the process.
+
+    One IPPROTO_RAW socket sends the rendered templates; a reader thread
+    listens for ICMP and TCP replies, dissects candidates with scapy and
+    hands each to the probe waiting for its (destination, tag).
+    """
+
+    def __init__(self, ident: Optional[int] = None, sockets: Optional[Tuple[socket.socket, Sequence[socket.socket]]] = None):
+        self.ident = ident if ident is not None else os.getpid() & 0xFFFF
+        if sockets is None:
+            send_sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_RAW)
+            send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_HDRINCL, 1)
+            recv_socks = [
+                socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP),
+                socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP),
+            ]
+            if SO_TIMESTAMPNS is not None:
+                for sock in recv_socks:
+                    sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+            sockets = (send_sock, recv_socks)
+        self.send_sock, self.recv_socks = sockets
+        self._lock = threading.Lock()
+        self._next_tag = 0
+        self._waiters: Dict[Tuple[str, int], list] = {}
+        self._closed = False
+        if self.recv_socks:
+            threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def next_tag(self) -> int:
+        with self._lock:
+            tag = self._next_tag
+            self._next_tag = (tag + 1) % RAW_TAGS
+        return tag
+
+    def exchange(self, pkt: RawPacket, timeout: float) -> Optional[IP]:
+        key = (pkt.dst, pkt.tag)
+        waiter = [threading.Event(), None]
+        with self._lock:
+            self._waiters[key] = waiter
+        try:
+            # Same clock as the kernel receive timestamps (CLOCK_REALTIME)
+            sent = time.time()
+            self.send_sock.sendto(pkt.data, (pkt.dst, 0))
+            waiter[0].wait(timeout)
+        finally:
+            with self._lock:
+                self._waiters.pop(key, None)
+        resp = waiter[1]
+        if resp is not None:
+            resp.sent_time = sent
+        return resp
+
+    def _interesting(self, data: bytes) -> bool:
+        # Cheap byte-level filter so scapy only dissects possible replies
+        if len(data) < 20:
+            return False
+        ihl = (data[0] & 0x0F) * 4
+        if data[9] == IP_PROTO_ICMP:
+            return len(data) > ihl and data[ihl] in (ICMP_ECHO_REPLY, ICMP_DEST_UNREACH, ICMP_TIME_EXCEEDED)
+        if data[9] == IP_PROTO_TCP and len(data) >= ihl + 4:
+            dport = struct.unpack_from("!H", data, ihl + 2)[0]
+            return RAW_BASE_SPORT <= dport < RAW_BASE_SPORT + RAW_TAGS
+        return False
+
+    def dispatch(self, data: bytes, recv_time: Optional[float] = None, time_source: str = RTT_PACKET) -> bool:
+        """Hand a received datagram to the probe waiting for it."""
+        if not self._interesting(data):
+            return False
+        resp = IP(data)
+        resp.time = recv_time if recv_time is not None else time.time()
+        resp.time_source = time_source
+        key = reply_key(resp, self.ident, RAW_BASE_SPORT)
+        if key is None:
+            return False
+        with self._lock:
+            waiter = self._waiters.get(key)
+            if waiter is None or waiter[1] is not None:
+                return False
+            waiter[1] = resp
+        waiter[0].set()
+        return True
+
+    def _read_loop(self) -> None:
+        while not self._closed:
+            try:
+                ready, _, _ = select.select(self.recv_socks, [], [], 0.5)
+            except (OSError, ValueError):
+                return
+            for sock in ready:
+                try:
+                    data, ancdata, _, _ = sock.recvmsg(65535, 1024)
+                except OSError:
+                    continue
+                stamp = kernel_timestamp(ancdata)
+                if stamp is None:
+                    self.dispatch(data, time.time(), RTT_PACKET)
+                else:
+                    self.dispatch(data, stamp, RTT_KERNEL)
+
+    def close(self) -> None:
+        self._closed = True
+        for sock in [self.send_sock, *self.recv_socks]:
+            sock.close()
+
+
+_channel: Optional[RawChannel] = None
+_channel_lock = threading.Lock()
+
+
+def get_channel() -> RawChannel:
+    global _channel
+    with _channel_lock:
+        if _channel is None:
+            _channel = RawChannel()
+        return _channel
+
+
+class RawProbe(Probe):
+    """Probe backend that sends byte templates over the shared raw channel."""
+
+    default_dport = 0
+
+    def __init__(self, channel: Optional[RawChannel] = None):
+        self._channel = channel
+        self._templates: Dict[Tuple[str, int], PacketTemplate] = {}
+        self._addresses: Dict[str, str] = {}
+
+    @property
+    def channel(self) -> RawChannel:
+        if self._channel is None:
+            self._channel = get_channel()
+        return self._channel
+
+    @abstractmethod
+    def build(self, dst_ip: str, dport: int) -> IP:
+        pass
+
+    def send(self, dst_ip: str, ttl: int, dport: Optional[int] = None, **kwargs) -> RawPacket:
+        dport = self.default_dport if dport is None else dport
+        # Replies quote the numeric address, so templates and waiters are keyed on it
+        address = self._addresses.get(dst_ip)
+        if address is None:
+            address = self._addresses[dst_ip] = _resolve(dst_ip)
+        dst_ip = address
+        template = self._templates.get((dst_ip, dport))
+        if template is None:
+            template = self._templates[(dst_ip, dport)] = PacketTemplate(self.build(dst_ip, dport))
+        tag = self.channel.next_tag()
+        return RawPacket(dst_ip, tag, template.render(ttl, tag, self.channel.ident))
+
+    def receive(self, pkt: RawPacket, timeout: float = 2) -> Optional[IP]:
+        return self.channel.exchange(pkt, timeout)
+
+
+class RawICMPProbe(RawProbe):
+    def build(self, dst_ip: str, dport: int) -> IP:
+        return IP(dst=dst_ip) / ICMP(id=self.channel.ident, seq=0)
+
+
+class RawUDPProbe(RawProbe):
+    default_dport = 33434
+
+    def build(self, dst_ip: str, dport: int) -> IP:
+        return IP(dst=dst_ip) / UDP(sport=RAW_BASE_SPORT, dport=dport)
+
+
+class RawTCPProbe(RawProbe):
+    default_dport = 80
+
+    def build(self, dst_ip: str, dport: int) -> IP:
+        return IP(dst=dst_ip) / TCP(sport=RAW_BASE_SPORT, dport=dport, flags='S')
+
+
+RAW_PROBES = {'ICMP': RawICMPProbe, 'UDP': RawUDPProbe, 'TCP': RawTCPProbe}
@@ -1,7 +1,13 @@
-from dataclasses import dataclass, field
-from typing import List, Optional
+import socket
+import sys
+import threading
+from array import array
+from collections.abc import MutableSequence
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-@dataclass
+@dataclass(slots=True)
 class HopResult:
     ttl: int
     ip: str
@@ -9,9 +15,333 @@ class HopResult:
     hostname: Optional[str] = None
     protocol: str = "ICMP"
     loss: bool = False
+    inferred: bool = False
+    rtt_source: Optional[str] = None  # see traceroute.base.RTT_SOURCES
 
-@dataclass
+HOP_FIELDS = tuple(f.name for f in fields(HopResult))
+
+
+class _Pool:
+    """Interned values behind small integer ids; id 0 is None."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self.ids: Dict[Optional[str], int] = {None: 0}
+        self._lock = threading.Lock()
+
+    def id(self, value: Optional[str]) -> int:
+        i = self.ids.get(value)
+        if i is None:
+            with self._lock:
+                i = self.ids.get(value)
+                if i is None:
+                    if type(value) is str:
+                        value = sys.intern(value)
+                    i = len(self.values)
+                    self.values.append(value)
+                    self.ids[value] = i
+        return i
+
+# Protocols, hostnames and RTT sources repeat over every hop of a result set
+_protocols = _Pool()
+_hostnames = _Pool()
+_sources = _Pool()
+
+# Hops flag bits; the address kind says where a hop's IP lives
+FLAG_LOSS = 1
+FLAG_INFERRED = 2
+IP_V4 = 0      # packed in the ip column
+IP_NONE = 4    # "*", no reply
+IP_V6 = 8      # packed integer in the side table
+IP_TEXT = 12   # not a canonical address, kept as given in the side table
+IP_KIND = 12
+
+
+@lru_cache(maxsize=1 << 16)
+def pack_ip(ip: str) -> Tuple[int, Union[int, str]]:
+    """(address kind, packed integer) of an IP string; anything that would not round-trip stays text."""
+    if ip == "*":
+        return IP_NONE, 0
+    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    try:
+        packed = socket.inet_pton(family, ip)
+    except (OSError, TypeError, ValueError):
+        return IP_TEXT, ip
+    if socket.inet_ntop(family, packed) != ip:
+        return IP_TEXT, ip
+    return (IP_V4 if family == socket.AF_INET else IP_V6), int.from_bytes(packed, "big")
+
+
+@lru_cache(maxsize=1 << 16)
+def _ipv4(value: int) -> str:
+    return socket.inet_ntoa(value.to_bytes(4, "big"))
+
+
+def _ipv6(value: int) -> str:
+    return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, "big"))
+
+
+class _Row(HopResult):
+    __slots__ = ("_hops", "_index")
+
+
+class HopView(_Row):
+    """A row of a Hops container that reads like a HopResult.
+
+    Fields are decoded when the view is made, so reads cost no more than a
+    plain HopResult's; assignments also write through to the container.
+    Like list positions, views should not be held across inserts or
+    deletes before their row.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        # dataclasses.replace() and copy build a new hop through the class
+        return HopResult(*args, **kwargs)
+
+    def __setattr__(self, name: str, value) -> None:
+        if name not in _FIELD_SLOTS:
+            raise AttributeError(f"'HopView' object has no attribute '{name}'")
+        _FIELD_SLOTS[name].__set__(self, value)
+        self._hops._write(self._index, name, value)
+
+    def detach(self) -> HopResult:
+        """A standalone copy of this row."""
+        return HopResult(*self._hops._row(self._index))
+
+    def __eq__(self, other):
+        if not isinstance(other, HopResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in HOP_FIELDS)
+
+    def __reduce__(self):
+        return HopResult, self._hops._row(self._index)
+
+_FIELD_SLOTS = {name: HopResult.__dict__[name] for name in HOP_FIELDS}
+
+
+def _view(hops: "Hops", i: int, row: tuple) -> HopView:
+    # Filled in as a _Row, whose plain slot writes skip HopView.__setattr__, then
+    # given the write-through class; both share one layout
+    view = _Row(*row)
+    view._hops = hops
+    view._index = i
+    view.__class__ = HopView
+    return view
+
+
+def _detach(hop: HopResult) -> HopResult:
+    return hop.detach() if isinstance(hop, HopView) else hop
+
+
+class Hops(MutableSequence):
+    """List of hops stored as typed columns, about 23 bytes a hop instead of a few hundred.
+
+    Indexing and iteration yield HopView rows, so code written against a
+    list of HopResult keeps working. Protocols, hostnames and RTT sources are
+    pooled ids; IPv4 addresses are packed into a uint32 column, IPv6
+    addresses (and anything that is not a canonical address) sit in a
+    sparse side table.
+    """
+
+    __slots__ = ("_ttl", "_ip", "_rtt", "_flags", "_proto", "_host", "_source", "_other")
+
+    def __init__(self, hops: Iterable[HopResult] = ()):
+        self._reset()
+        self.extend(hops)
+
+    def _reset(self) -> None:
+        self._ttl = array("H")
+        self._ip = array("I")
+        self._rtt = array("d")
+        self._flags = array("B")
+        self._proto = array("H")
+        self._host = array("I")
+        self._source = array("H")
+        self._other: Dict[int, Union[int, str]] = {}
+
+    def _columns(self) -> Tuple[array, ...]:
+        return self._ttl, self._ip, self._rtt, self._flags, self._proto, self._host, self._source
+
+    def __len__(self) -> int:
+        return len(self._ttl)
+
+    def _position(self, i: int) -> int:
+        n = len(self._ttl)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("hop index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            # Like a list slice: a new list of the same hops
+            return [_view(self, j, self._row(j)) for j in range(*i.indices(len(self)))]
+        i = self._position(i)
+        return _view(self, i, self._row(i))
+
+    def __iter__(self) -> Iterator[HopView]:
+        # Decode straight from the columns rather than row by row
+        protocols, hostnames, sources = _protocols.values, _hostnames.values, _sources.values
+        for i, (ttl, ip, rtt, flags, proto, host, source) in enumerate(zip(*self._columns())):
+            ip = _ipv4(ip) if flags & IP_KIND == IP_V4 else self._wide_ip(i, flags)
+            yield _view(self, i, (ttl, ip, rtt, hostnames[host], protocols[proto], bool(flags & FLAG_LOSS), bool(flags & FLAG_INFERRED), sources[source]))
+
+    def _wide_ip(self, i: int, flags: int) -> str:
+        kind = flags & IP_KIND
+        if kind == IP_NONE:
+            return "*"
+        return _ipv6(self._other[i]) if kind == IP_V6 else self._other[i]
+
+    def _row(self, i: int) -> tuple:
+        """Field values of row i, in HOP_FIELDS order."""
+        flags = self._flags[i]
+        ip = _ipv4(self._ip[i]) if flags & IP_KIND == IP_V4 else self._wide_ip(i, flags)
+        return (
+            self._ttl[i], ip, self._rtt[i], _hostnames.values[self._host[i]], _protocols.values[self._proto[i]],
+            bool(flags & FLAG_LOSS), bool(flags & FLAG_INFERRED), _sources.values[self._source[i]],
+        )
+
+    def _write(self, i: int, name: str, value) -> None:
+        if name == "ip":
+            kind, packed = pack_ip(value)
+            self._flags[i] = (self._flags[i] & ~IP_KIND) | kind
+            self._ip[i] = packed if kind == IP_V4 else 0
+            if kind & IP_V6:
+                self._other[i] = packed
+            else:
+                self._other.pop(i, None)
+        elif name in ("loss", "inferred"):
+            flag = FLAG_LOSS if name == "loss" else FLAG_INFERRED
+            self._flags[i] = self._flags[i] | flag if value else self._flags[i] & ~flag
+        elif name == "ttl":
+            self._ttl[i] = value
+        elif name == "rtt":
+            self._rtt[i] = value
+        elif name == "hostname":
+            self._host[i] = _hostnames.id(value)
+        elif name == "protocol":
+            self._proto[i] = _protocols.id(value)
+        else:
+            self._source[i] = _sources.id(value)
+
+    def append(self, hop: HopResult) -> None:
+        self.add(hop.ttl, hop.ip, hop.rtt, hop.hostname, hop.protocol, hop.loss, hop.inferred, hop.rtt_source)
+
+    def add(self, ttl: int, ip: str, rtt: float, hostname: Optional[str] = None, protocol: str = "ICMP", loss: bool = False, inferred: bool = False, rtt_source: Optional[str] = None) -> None:
+        """Append a hop from its field values, without building a HopResult first."""
+        kind, packed = pack_ip(ip)
+        if kind & IP_V6:
+            self._other[len(self._ttl)] = packed
+        proto = _protocols.ids.get(protocol)
+        host = _hostnames.ids.get(hostname)
+        source = _sources.ids.get(rtt_source)
+        self._ttl.append(ttl)
+        self._ip.append(packed if kind == IP_V4 else 0)
+        self._rtt.append(rtt)
+        self._flags.append(kind | (FLAG_LOSS if loss else 0) | (FLAG_INFERRED if inferred else 0))
+        self._proto.append(_protocols.id(protocol) if proto is None else proto)
+        self._host.append(_hostnames.id(hostname) if host is None else host)
+        self._source.append(_sources.id(rtt_source) if source is None else source)
+
+    def extend(self, hops: Iterable[HopResult]) -> None:
+        if isinstance(hops, Hops):
+            # Column copies; also right for hops.extend(hops)
+            offset = len(self)
+            other = {offset + i: value for i, value in hops._other.items()}
+            for column, source in zip(self._columns(), hops._columns()):
+                column.extend(source[:])
+            self._other.update(other)
+            return
+        for hop in hops:
+            self.append(hop)
+
+    def __setitem__(self, i, value) -> None:
+        if isinstance(i, slice):
+            hops = self._detached()
+            hops[i] = [_detach(hop) for hop in value]
+            self._load(hops)
+            return
+        i = self._position(i)
+        for name, field_value in zip(HOP_FIELDS, [getattr(value, name) for name in HOP_FIELDS]):
+            self._write(i, name, field_value)
+
+    def __delitem__(self, i) -> None:
+        if not isinstance(i, slice) and self._position(i) == len(self) - 1:
+            for column in self._columns():
+                column.pop()
+            self._other.pop(len(self._ttl), None)
+            return
+        hops = self._detached()
+        del hops[i]
+        self._load(hops)
+
+    def insert(self, i: int, hop: HopResult) -> None:
+        if i >= len(self):
+            self.append(hop)
+            return
+        hops = self._detached()
+        hops.insert(i, _detach(hop))
+        self._load(hops)
+
+    def clear(self) -> None:
+        self._reset()
+
+    def sort(self, key=None, reverse: bool = False) -> None:
+        self._load(sorted(self._detached(), key=key, reverse=reverse))
+
+    def _detached(self) -> List[HopResult]:
+        return [HopResult(*self._row(i)) for i in range(len(self))]
+
+    def _load(self, hops: List[HopResult]) -> None:
+        self._reset()
+        self.extend(hops)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Hops, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def __reduce__(self):
+        # Pool ids are per process, so pickles carry the pooled values themselves
+        strings = (
+            [_protocols.values[i] for i in self._proto],
+            [_hostnames.values[i] for i in self._host],
+            [_sources.values[i] for i in self._source],
+        )
+        return _restore_hops, (self._ttl, self._ip, self._rtt, self._flags, self._other, strings)
+
+
+def _restore_hops(ttl, ip, rtt, flags, other, strings) -> Hops:
+    hops = Hops()
+    hops._ttl, hops._ip, hops._rtt, hops._flags, hops._other = ttl, ip, rtt, flags, other
+    protocols, hostnames, sources = strings
+    hops._proto = array("H", map(_protocols.id, protocols))
+    hops._host = array("I", map(_hostnames.id, hostnames))
+    hops._source = array("H", map(_sources.id, sources))
+    return hops
+
+
+@dataclass(slots=True)
 class TraceResult:
     destination: str
-    hops: List[HopResult] = field(default_factory=list)
+    hops: Hops = field(default_factory=Hops)
     raw: str = ""
+
+    def __setattr__(self, name, value):
+        # Hops given as any iterable are stored compactly; an existing container is shared, not copied
+        if name == "hops" and not isinstance(value, Hops):
+            value = Hops(value)
+        object.__setattr__(self, name, value)
+
+    def fingerprint(self) -> Dict[str, int]:
+        """Per-protocol hash of the hop-IP sequence (see traceroute.fingerprint)."""
+        from .fingerprint import fingerprints
+        return fingerprints(self)
@@ -1,45 +1,233 @@
+import sys
 import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
+from typing import Callable, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+from .base import Probe
 from .icmp import ICMPProbe
 from .udp import UDPProbe
 from .tcp import TCPProbe
+from .dns import ReverseResolver, get_default_resolver
+from .metrics import Metrics
+from .ratelimit import ProbeThrottle
 from .results import HopResult, TraceResult
+from .stopsets import StopSets
+from .timing import TimingController
 
-def run_traceroute(dst_ip: str, max_ttl: int = 30, init_ttl: int = 1, series: int = 3, dport: int = 33434, wait: float = 1.0, resolve_host: bool = False) -> TraceResult:
-    probes = [ICMPProbe(), UDPProbe(), TCPProbe()]
-    protocols = ['ICMP', 'UDP', 'TCP']
-    
-    trace = TraceResult(destination=dst_ip)
-    
-    for ttl in range(init_ttl, max_ttl + 1):
-        for _ in range(series):
-            for probe, proto in zip(probes, protocols):
-                pkt = probe.send(dst_ip, ttl, dport=dport)
-                
-                start = time.time()
-                resp = probe.receive(pkt)
-                rtt = (time.time() - start) * 1000  # ms
-                
-                if resp is None:
-                    hop = HopResult(ttl=ttl, ip='*', rtt=0, protocol=proto, loss=True)
-                else:
-                    ip = resp.src
-                    hostname = None
-                    
-                    if resolve_host and ip != '*':
-                        try:
-                            import socket
-                            hostname = socket.gethostbyaddr(ip)[0]
-                        except Exception:
-                            hostname = None
-                    
-                    hop = HopResult(ttl=ttl, ip=ip, rtt=rtt, protocol=proto, hostname=hostname, loss=False)
-                
-                trace.hops.append(hop)
-                
+PROTOCOLS = ('ICMP', 'UDP', 'TCP')
+# Replies within this many ms of each other count as a stable RTT
+RTT_TOLERANCE_MS = 5.0
+
+
+BACKENDS = ('scapy', 'raw', 'sim')
+
+# A backend is one of BACKENDS or a mapping of protocol -> probe factory
+Backend = Union[str, Mapping[str, Callable[[], Probe]]]
+
+
+def _probe_factories(backend: Backend) -> Mapping[str, Callable[[], Probe]]:
+    if isinstance(backend, Mapping):
+        return backend
+    if backend == 'scapy':
+        return {'ICMP': ICMPProbe, 'UDP': UDPProbe, 'TCP': TCPProbe}
+    if backend == 'raw':
+        from .raw import RAW_PROBES
+        return RAW_PROBES
+    if backend == 'sim':
+        from .simnet import get_default_network
+        return get_default_network().backend()
+    raise ValueError(f"Unknown probe backend: {backend}")
+
+
+def _make_probes(protocols: Sequence[str], backend: Backend = 'scapy') -> list:
+    factories = _probe_factories(backend)
+    unknown = [p for p in protocols if p not in factories]
+    if unknown:
+        raise ValueError(f"Unsupported protocol(s): {', '.join(unknown)}")
+    return [factories[p]() for p in protocols]
+
+
+def _settled(hops: List[HopResult], settle_after: int) -> bool:
+    """True once a hop has answered consistently: same interface, similar RTTs."""
+    replies = [hop for hop in hops if not hop.loss]
+    if len(replies) < settle_after or len({hop.ip for hop in replies}) != 1:
+        return False
+    rtts = [hop.rtt for hop in replies]
+    return max(rtts) - min(rtts) <= max(RTT_TOLERANCE_MS, 0.5 * min(rtts))
+
+
+def _probe_ttl(probes, protocols, dst_ip: str, ttl: int, series: int, dport: int, wait: float, throttle: Optional[ProbeThrottle], resolver: Optional[ReverseResolver], timeout: float = 2.0, adaptive: bool = False, settle_after: int = 2, metrics: Optional[Metrics] = None) -> List[HopResult]:
+    hops = []
+    pending = list(zip(probes, protocols))
+    for _ in range(series):
+        lost = []
+        for probe, proto in pending:
+            built = time.monotonic()
+            pkt = probe.send(dst_ip, ttl, dport=dport)
+            queued = time.monotonic()
+
+            if throttle is not None:
+                throttle.acquire(dst_ip)
+            start = time.monotonic()
+            try:
+                resp = probe.receive(pkt, timeout=timeout)
+            finally:
+                if throttle is not None:
+                    throttle.release(dst_ip)
+            end = time.monotonic()
+
+            if metrics is not None:
+                metrics.observe("send", queued - built)
+                metrics.observe("throttle", start - queued)
+                metrics.observe("receive", end - start)
+                metrics.inc("probes_sent")
+                metrics.inc("probe_timeouts" if resp is None else "probe_replies")
+
+            if resp is None:
+                hop = HopResult(ttl=ttl, ip='*', rtt=0, protocol=proto, loss=True)
+                lost.append((probe, proto))
+            else:
+                rtt, source = Probe.rtt(resp, start, end)  # ms
+                hop = HopResult(ttl=ttl, ip=resp.src, rtt=rtt, protocol=proto, loss=False, rtt_source=source)
+
+            hops.append(hop)
+
+            if wait:
                 time.sleep(wait)
+                if metrics is not None:
+                    metrics.observe("wait", wait)
+
+        if adaptive:
+            if _settled(hops, settle_after):
+                break
+            # Retry only what was lost; if nothing was, the answers disagree and every protocol goes again
+            pending = lost or list(zip(probes, protocols))
+
+    # Names are looked up in the background and attached once the trace is done
+    if resolver is not None:
+        resolver.prefetch(hop.ip for hop in hops)
+    return hops
+
 
-        # Stop if destination is reached
-        if any(hop.ip == dst_ip for hop in trace.hops[-3*series:]):
+def _run_doubletree(probe_ttl: Callable[[int], List[HopResult]], dst_ip: str, max_ttl: int, init_ttl: int, start_ttl: int, stop_sets: StopSets, timing: Optional[TimingController] = None) -> List[HopResult]:
+    start_ttl = min(max(start_ttl, init_ttl), max_ttl)
+    hops: List[HopResult] = []
+
+    # Forward from the mid-path TTL until the destination; a known (interface, prefix)
+    # pair fills in the shared segment and probing resumes past it
+    ttl = start_ttl
+    while ttl <= max_ttl:
+        current = probe_ttl(ttl)
+        hops.extend(current)
+        if any(hop.ip == dst_ip for hop in current):
+            break
+        known = stop_sets.hits_global(current, dst_ip)
+        if known is not None:
+            shared = [h for h in stop_sets.after(known, dst_ip) if h.ttl <= max_ttl]
+            hops.extend(shared)
+            ttl = max((h.ttl for h in shared), default=ttl) + 1
+            continue
+        if timing is not None and timing.gap_reached:
             break
+        ttl += 1
+
+    # Backward towards the source until an interface this vantage point already knows
+    for ttl in range(start_ttl - 1, init_ttl - 1, -1):
+        current = probe_ttl(ttl)
+        hops.extend(current)
+        known = stop_sets.hits_local(current)
+        if known is not None:
+            hops.extend(h for h in stop_sets.before(known) if h.ttl >= init_ttl)
+            break
+
+    hops.sort(key=lambda hop: hop.ttl)
+    return hops
+
+
+def run_traceroute(dst_ip: str, max_ttl: int = 30, init_ttl: int = 1, series: int = 3, dport: int = 33434, wait: float = 1.0, resolve_host: bool = False, throttle: Optional[ProbeThrottle] = None, stop_sets: Optional[StopSets] = None, start_ttl: Optional[int] = None, resolver: Optional[ReverseResolver] = None, timeout: float = 2.0, adaptive_timeout: bool = False, gap_limit: int = 0, protocols: Sequence[str] = PROTOCOLS, adaptive_series: bool = False, settle_after: int = 2, backend: Backend = 'scapy', metrics: Optional[Metrics] = None) -> TraceResult:
+    probes = _make_probes(protocols, backend)
+
+    trace = TraceResult(destination=dst_ip)
+    if resolve_host and resolver is None:
+        resolver = get_default_resolver()
+
+    timing = TimingController(timeout=timeout, adaptive=adaptive_timeout, gap_limit=gap_limit)
 
+    def probe_ttl(ttl: int) -> List[HopResult]:
+        hops = _probe_ttl(probes, protocols, dst_ip, ttl, series, dport, wait, throttle, resolver, timing.timeout, adaptive_series, settle_after, metrics)
+        retry = timing.retry_timeout
+        if retry is not None and all(hop.loss for hop in hops):
+            # The hop may just be further away than the earlier ones predicted
+            hops = _probe_ttl(probes, protocols, dst_ip, ttl, series, dport, wait, throttle, resolver, retry, adaptive_series, settle_after, metrics)
+        timing.observe(hops)
+        return hops
+
+    if stop_sets is not None:
+        trace.hops = _run_doubletree(probe_ttl, dst_ip, max_ttl, init_ttl, start_ttl or stop_sets.start_ttl, stop_sets, timing)
+        stop_sets.learn(trace, dst_ip)
+    else:
+        for ttl in range(init_ttl, max_ttl + 1):
+            current = probe_ttl(ttl)
+            trace.hops.extend(current)
+
+            # Stop if destination is reached
+            if any(hop.ip == dst_ip for hop in current):
+                break
+            # Give up after a run of TTLs where nothing answered
+            if timing.gap_reached:
+                break
+
+    if resolve_host:
+        resolver.annotate(trace)
     return trace
+
+
+def run_batch(targets: Iterable[str], trace_fn: Callable[..., TraceResult] = run_traceroute, concurrency: int = 8, pps: float = 0, per_dest_pps: float = 0, max_outstanding: int = 0, metrics: Optional[Metrics] = None, executor: Optional[ThreadPoolExecutor] = None, **trace_kwargs) -> Iterator[TraceResult]:
+    """Trace many destinations at once and yield results in completion order.
+
+    Workers pull the next target as soon as they finish, so a slow or
+    unresponsive destination only ever occupies one worker. Given
+    ``metrics``, trace counts and durations are recorded and the registry
+    is passed on to ``trace_fn`` for its probe-level numbers. An
+    ``executor`` is used (and left running) instead of a pool of
+    ``concurrency`` threads made for this batch.
+    """
+    throttle = ProbeThrottle(pps=pps, per_dest_pps=per_dest_pps, max_outstanding=max_outstanding)
+    concurrency = max(1, concurrency)
+    pending = {}
+    targets = iter(targets)
+
+    def timed_trace(target, **kwargs):
+        with metrics.time("trace"):
+            return trace_fn(target, metrics=metrics, **kwargs)
+
+    fn = trace_fn if metrics is None else timed_trace
+
+    def submit_next(pool) -> bool:
+        for target in targets:
+            future = pool.submit(fn, target, throttle=throttle, **trace_kwargs)
+            pending[future] = target
+            return True
+        return False
+
+    with nullcontext(executor) if executor is not None else ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Keep a small backlog queued so workers never idle, without materialising the whole list
+        for _ in range(concurrency * 2):
+            if not submit_next(pool):
+                break
+        while pending:
+            done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                target = pending.pop(future)
+                throttle.forget(target)
+                submit_next(pool)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if metrics is not None:
+                        metrics.inc("trace_errors")
+                    print(f"Error tracing {target}: {e}", file=sys.stderr)
+                    continue
+                if metrics is not None:
+                    metrics.inc("traces_completed")
+                yield result
@@ -0,0 +1,126 @@
+"""Sharded batch runs and merging of their outputs.
+
+Each shard is an ordinary ``cli.py`` run over part of the targets
+(``--shard K/N``), on local cores (``--processes N``) or on several vantage
+hosts (``--vantage NAME``). Merge the per-shard JSON Lines outputs with
+
+    python -m traceroute.sharding -o merged.jsonl host-a.jsonl host-b.jsonl
+"""
+import argparse
+import sys
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .writer import JsonlResultWriter, open_writer, read_records, trace_from_record
+
+SHARD_METHODS = ("hash", "range")
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'K/N' -> (K, N), with shards numbered from 1."""
+    try:
+        k, n = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {spec!r}")
+    if not 1 <= k <= n:
+        raise argparse.ArgumentTypeError(f"shard {k} out of range 1..{n}")
+    return k, n
+
+
+def shard_of(destination: str, n: int) -> int:
+    """Shard (1..n) of a destination; stable across processes and hosts, unlike hash()."""
+    return zlib.crc32(destination.encode()) % n + 1
+
+
+def split(targets: Sequence[str], n: int, method: str = "hash") -> List[List[str]]:
+    """Split targets into n shards, by hash of the destination or as contiguous ranges."""
+    if method not in SHARD_METHODS:
+        raise ValueError(f"Unknown shard method: {method}")
+    if method == "range":
+        size, extra = divmod(len(targets), n)
+        shards, start = [], 0
+        for i in range(n):
+            end = start + size + (i < extra)
+            shards.append(list(targets[start:end]))
+            start = end
+        return shards
+    shards = [[] for _ in range(n)]
+    for target in targets:
+        shards[shard_of(target, n) - 1].append(target)
+    return shards
+
+
+def select(targets: Sequence[str], k: int, n: int, method: str = "hash") -> List[str]:
+    """The targets of shard k of n."""
+    if method == "hash":
+        return [target for target in targets if shard_of(target, n) == k]
+    return split(targets, n, method)[k - 1]
+
+
+def shard_path(output: str, k: int) -> str:
+    base = output[:-len(".jsonl")] if output.endswith(".jsonl") else output
+    return f"{base}.shard{k}.jsonl"
+
+
+def _tagged_records(paths: Iterable[str]) -> Iterator[Tuple[dict, Optional[str], Optional[str]]]:
+    for path in paths:
+        shard = vantage = None
+        for record in read_records(path):
+            if record.get("type") == "header":
+                shard, vantage = record.get("shard"), record.get("vantage")
+            elif record.get("type") == "trace":
+                # Records of an earlier merge already carry their own tags
+                yield record, record.get("shard", shard), record.get("vantage", vantage)
+
+
+def merge(paths: Iterable[str], output: str, fmt: Optional[str] = None) -> Dict[str, int]:
+    """Combine shard outputs into one result file, keeping the first trace per (destination, vantage point).
+
+    JSON Lines output records the shard and vantage point of every trace.
+    Returns counts of traces written and duplicates dropped.
+    """
+    paths = list(paths)
+    seen = set()
+    counts = {"traces": 0, "duplicates": 0}
+    # The merge can be re-run, so per-write fsync is not worth its cost here
+    with open_writer(output, fmt=fmt, meta={"merged_from": paths}, fsync=False) as writer:
+        for record, shard, vantage in _tagged_records(paths):
+            key = (record["destination"], vantage)
+            if key in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(key)
+            if isinstance(writer, JsonlResultWriter):
+                writer.write_record({**record, "shard": shard, "vantage": vantage})
+            else:
+                writer.write(trace_from_record(record))
+            counts["traces"] += 1
+    return counts
+
+
+def merge_stores(paths: Iterable[str], output: str) -> int:
+    """Concatenate shard trace stores into the store directory ``output``; returns the traces written."""
+    from .store import load_store, write_store
+    n_traces = 0
+    write_store(output, [])
+    for path in paths:
+        shard = load_store(path)
+        write_store(output, shard.iter_traces(), append=True)
+        n_traces += shard.n_traces
+    return n_traces
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge per-shard JSON Lines results into one deduplicated result set")
+    parser.add_argument("inputs", nargs="+", help="Shard result files (.jsonl)")
+    parser.add_argument("-o", "--output", required=True, help="Merged output file")
+    parser.add_argument("--format", choices=["text", "jsonl"], help="Output format (default: from the file extension)")
+    args = parser.parse_args(argv)
+
+    counts = merge(args.inputs, args.output, fmt=args.format)
+    print(f"Merged {counts['traces']} traces from {len(args.inputs)} files into {args.output} ({counts['duplicates']} duplicates dropped)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .base import RTT_SIMULATED, Probe
+from .results import HopResult, TraceResult
+
+# Reply kinds, named after the ICMP/TCP message a real network would send
+TIME_EXCEEDED = "time-exceeded"
+ECHO_REPLY = "echo-reply"
+PORT_UNREACHABLE = "port-unreachable"
+SYN_ACK = "syn-ack"
+
+DESTINATION_REPLY = {"ICMP": ECHO_REPLY, "UDP": PORT_UNREACHABLE, "TCP": SYN_ACK}
+
+
+class SimPacket(NamedTuple):
+    dst: str
+    ttl: int
+    protocol: str
+    dport: Optional[int]
+
+
+class SimReply:
+    """Stand-in for a scapy reply: the attributes the runners read."""
+
+    __slots__ = ("src", "kind", "sent_time", "time", "time_source")
+
+    def __init__(self, src: str, kind: str, sent_time: float, rtt: float):
+        self.src = src
+        self.kind = kind
+        self.sent_time = sent_time
+        self.time = sent_time + rtt / 1000
+        self.time_source = RTT_SIMULATED
+
+
+class SimNetwork:
+    """Synthetic, deterministic topology that answers probes in-process.
+
+    Every destination gets a path of ``depth`` routers: ``core`` routers shared
+    by all paths, a middle section drawn from ``fanout`` parallel routers per
+    TTL (so paths partly overlap) and a tail unique to the destination.
+    Routers in ``silent`` proportion never answer, ``unreachable`` destinations
+    never reply past their last router, and each probe is lost with
+    probability ``loss``. RTTs grow by ``hop_delay`` ms per hop plus jitter;
+    with ``time_scale`` > 0 probes actually wait that long (scaled), and a lost
+    probe waits for its timeout.
+    """
+
+    def __init__(self, seed: int = 0, depth: Tuple[int, int] = (8, 16), core: int = 2, fanout: int = 8, loss: float = 0.0, silent: float = 0.0, unreachable: float = 0.0, hop_delay: float = 1.0, jitter: float = 0.2, time_scale: float = 0.0):
+        self.seed = seed
+        self.depth = depth
+        self.core = core
+        self.fanout = fanout
+        self.loss = loss
+        self.silent = silent
+        self.unreachable = unreachable
+        self.hop_delay = hop_delay
+        self.jitter = jitter
+        self.time_scale = time_scale
+        self._paths: Dict[str, Tuple[List[Optional[str]], bool]] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.probes_sent = 0
+
+    def _hash(self, *parts) -> int:
+        return zlib.crc32(":".join(map(str, (self.seed, *parts))).encode())
+
+    def _is_silent(self, router: str) -> bool:
+        return self._hash("silent", router) % 10_000 < self.silent * 10_000
+
+    def path(self, dst: str) -> Tuple[List[Optional[str]], bool]:
+        """Routers before ``dst`` (None where silent) and whether ``dst`` answers."""
+        cached = self._paths.get(dst)
+        if cached is not None:
+            return cached
+        h = self._hash("path", dst)
+        rng = random.Random(h)
+        depth = rng.randint(*self.depth)
+        routers = []
+        for ttl in range(1, depth):
+            if ttl <= self.core:
+                router = f"10.0.{ttl}.1"
+            elif ttl <= depth // 2 + 1:
+                router = f"10.1.{ttl}.{rng.randrange(self.fanout) + 1}"
+            else:
+                router = f"10.{2 + (h >> 16) % 200}.{(h >> 8) & 255}.{ttl}"
+            routers.append(None if self._is_silent(router) else router)
+        reachable = self._hash("unreachable", dst) % 10_000 >= self.unreachable * 10_000
+        with self._lock:
+            self._paths[dst] = (routers, reachable)
+        return routers, reachable
+
+    def respond(self, pkt: SimPacket) -> Tuple[Optional[str], Optional[str], float]:
+        """(replying address, reply kind, RTT in ms) for one probe; address None if nothing answers."""
+        routers, reachable = self.path(pkt.dst)
+        with self._lock:
+            self.probes_sent += 1
+            lost = self._rng.random() < self.loss
+            noise = self._rng.random() * self.jitter
+        rtt = pkt.ttl * self.hop_delay * (1 + noise)
+        if lost:
+            return None, None, rtt
+        if pkt.ttl <= len(routers):
+            return routers[pkt.ttl - 1], TIME_EXCEEDED, rtt
+        if reachable:
+            return pkt.dst, DESTINATION_REPLY[pkt.protocol], (len(routers) + 1) * self.hop_delay * (1 + noise)
+        return None, None, rtt
+
+    def exchange(self, pkt: SimPacket, timeout: float) -> Optional[SimReply]:
+        sent = time.time()
+        src, kind, rtt = self.respond(pkt)
+        if src is None or rtt / 1000 > timeout:
+            if self.time_scale:
+                time.sleep(timeout * self.time_scale)
+            return None
+        if self.time_scale:
+            time.sleep(rtt / 1000 * self.time_scale)
+        return SimReply(src, kind, sent, rtt)
+
+    def trace(self, dst: str, max_ttl: int = 30, series: int = 3, protocols: Sequence[str] = ("ICMP", "UDP", "TCP"), gap_limit: int = 5) -> TraceResult:
+        """What run_traceroute would record against this network, without the probing machinery."""
+        trace = TraceResult(destination=dst)
+        silent = 0
+        for ttl in range(1, max_ttl + 1):
+            reached = answered = False
+            for _ in range(series):
+                for proto in protocols:
+                    src, _, rtt = self.respond(SimPacket(dst, ttl, proto, None))
+                    if src is None:
+                        trace.hops.append(HopResult(ttl, '*', 0, None, proto, True))
+                    else:
+                        trace.hops.append(HopResult(ttl, src, rtt, None, proto, False, rtt_source=RTT_SIMULATED))
+                        answered = True
+                        reached = reached or src == dst
+            silent = 0 if answered else silent + 1
+            if reached or (gap_limit and silent >= gap_limit):
+                break
+        return trace
+
+    def backend(self) -> Dict[str, Callable[[], Probe]]:
+        """Probe factories for ``run_traceroute(backend=...)``."""
+        return {proto: (lambda proto=proto: SimProbe(self, proto)) for proto in DESTINATION_REPLY}
+
+
+class SimProbe(Probe):
+    def __init__(self, network: SimNetwork, protocol: str):
+        self.network = network
+        self.protocol = protocol
+
+    def send(self, dst_ip: str, ttl: int, dport: Optional[int] = None, **kwargs) -> SimPacket:
+        return SimPacket(dst_ip, ttl, self.protocol, dport)
+
+    def receive(self, pkt: SimPacket, timeout: float = 2) -> Optional[SimReply]:
+        return self.network.exchange(pkt, timeout)
+
+
+_default_network: Optional[SimNetwork] = None
+
+
+def get_default_network() -> SimNetwork:
+    global _default_network
+    if _default_network is None:
+        _default_network = SimNetwork()
+    return _default_network
@@ -0,0 +1,65 @@
+import ipaddress
+import threading
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from .results import HopResult, TraceResult
+
+
+class StopSets:
+    """Doubletree stop sets shared by every trace of a batch.
+
+    ``local`` maps an interface seen near the source to the hops that led up
+    to it; backward probing stops there. ``global_`` maps an (interface,
+    destination prefix) pair to the hops that followed it; forward probing
+    stops there. Each entry keeps a reference to the hops of the trace that
+    taught it, the TTL at which the interface was seen and that trace's
+    destination.
+    """
+
+    def __init__(self, prefix_len: int = 24, start_ttl: int = 5):
+        self.prefix_len = prefix_len
+        self.start_ttl = start_ttl
+        self.local: Dict[str, Tuple[List[HopResult], int, str]] = {}
+        self.global_: Dict[Tuple[str, str], Tuple[List[HopResult], int, str]] = {}
+        self._lock = threading.Lock()
+
+    def prefix(self, dst: str) -> str:
+        try:
+            return str(ipaddress.ip_network(f"{dst}/{self.prefix_len}", strict=False))
+        except ValueError:
+            return dst
+
+    def hits_local(self, hops: List[HopResult]) -> Optional[HopResult]:
+        return next((h for h in hops if not h.loss and h.ip in self.local), None)
+
+    def hits_global(self, hops: List[HopResult], dst: str) -> Optional[HopResult]:
+        prefix = self.prefix(dst)
+        return next((h for h in hops if not h.loss and (h.ip, prefix) in self.global_), None)
+
+    def before(self, hop: HopResult) -> List[HopResult]:
+        """Known hops in front of ``hop``, renumbered to its TTL."""
+        hops, ttl, _ = self.local[hop.ip]
+        shift = hop.ttl - ttl
+        return [replace(h, ttl=h.ttl + shift, inferred=True) for h in hops if h.ttl < ttl and h.ttl + shift >= 1]
+
+    def after(self, hop: HopResult, dst: str) -> List[HopResult]:
+        """Known hops behind ``hop`` towards ``dst``'s prefix, renumbered to its TTL.
+
+        The copy ends before the teaching trace reached its own destination,
+        another host of the prefix; the rest of the path is left to probing.
+        """
+        hops, ttl, destination = self.global_[(hop.ip, self.prefix(dst))]
+        end = min((h.ttl for h in hops if h.ip == destination), default=None)
+        shift = hop.ttl - ttl
+        return [replace(h, ttl=h.ttl + shift, inferred=True) for h in hops if h.ttl > ttl and (end is None or h.ttl < end)]
+
+    def learn(self, trace: TraceResult, dst: Optional[str] = None) -> None:
+        destination = dst or trace.destination
+        prefix = self.prefix(destination)
+        with self._lock:
+            for hop in trace.hops:
+                if hop.loss or hop.ip == '*':
+                    continue
+                self.local.setdefault(hop.ip, (trace.hops, hop.ttl, destination))
+                self.global_.setdefault((hop.ip, prefix), (trace.hops, hop.ttl, destination))
@@ -0,0 +1,288 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .base import RTT_SOURCES
+from .results import IP_NONE, IP_V4, TraceResult, _ipv4, pack_ip
+
+STORE_FORMAT = "topologyanalyzer-store"
+STORE_VERSION = 1
+
+# One fixed-width file per column, hop i at row i of every column
+HOP_COLUMNS = {
+    "dest": np.dtype("<u4"),   # string table id of the destination
+    "ttl": np.dtype("u1"),
+    "ip": np.dtype("<u4"),     # IPv4 as integer, string table id with FLAG_IP_TEXT, 0 for a lost probe
+    "rtt": np.dtype("<f4"),    # ms
+    "proto": np.dtype("u1"),   # index into PROTOCOLS
+    "flags": np.dtype("u1"),   # FLAG_LOSS | FLAG_INFERRED | RTT source << RTT_SOURCE_SHIFT | FLAG_IP_TEXT
+    "host": np.dtype("<i4"),   # string table id of the hostname, -1 if none
+}
+# offsets[i]:offsets[i + 1] is the hop range of trace i, trace_dest[i] its destination
+OFFSETS_DTYPE = np.dtype("<u8")
+TRACE_DEST_DTYPE = np.dtype("<u4")
+
+PROTOCOLS = ("ICMP", "UDP", "TCP")
+PROTOCOL_IDS = {name: i for i, name in enumerate(PROTOCOLS)}
+
+FLAG_LOSS = 1
+FLAG_INFERRED = 2
+# Bits 2-4 of flags: 0 for unknown, else 1 + index into RTT_SOURCES
+RTT_SOURCE_SHIFT = 2
+RTT_SOURCE_MASK = 0b111 << RTT_SOURCE_SHIFT
+RTT_SOURCE_IDS = {name: i for i, name in enumerate(RTT_SOURCES, 1)}
+# The ip column holds the string table id of an address that is not plain IPv4
+FLAG_IP_TEXT = 1 << 5
+
+NO_IP = 0
+NO_HOST = -1
+
+
+def _rtt_source(flags: int) -> Optional[str]:
+    idx = (flags & RTT_SOURCE_MASK) >> RTT_SOURCE_SHIFT
+    return RTT_SOURCES[idx - 1] if idx else None
+
+
+class StringTable:
+    def __init__(self, strings: Optional[List[str]] = None):
+        self.strings: List[str] = list(strings or [])
+        self._ids: Dict[str, int] = {s: i for i, s in enumerate(self.strings)}
+
+    def intern(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+    def __getitem__(self, idx: int) -> str:
+        return self.strings[idx]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+def encode_ip(ip: str, loss: bool, strings: StringTable) -> Tuple[int, int]:
+    """(ip column value, flag bits) of a hop address.
+
+    A lost probe's "*" is NO_IP; IPv6 and anything else that is not plain
+    IPv4, including "0.0.0.0" on a lost probe, goes to the string table.
+    """
+    kind, value = pack_ip(ip)
+    if kind == IP_NONE and loss:
+        return NO_IP, 0
+    if kind == IP_V4 and not (loss and value == NO_IP):
+        return value, 0
+    return strings.intern(ip), FLAG_IP_TEXT
+
+
+def decode_ip(value: int, flags: int, strings: StringTable) -> str:
+    if flags & FLAG_IP_TEXT:
+        return strings[value]
+    if flags & FLAG_LOSS and value == NO_IP:
+        return '*'
+    return _ipv4(value)
+
+
+class TraceStore:
+    """Columnar hop table plus a string table for destinations, hostnames and non-IPv4 addresses.
+
+    Columns are NumPy arrays; a store opened with ``load_store(mmap=True)``
+    maps them straight from disk without reading them into memory.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], offsets: np.ndarray, trace_dest: np.ndarray, strings: StringTable):
+        self.columns = columns
+        self.offsets = offsets
+        self.trace_dest = trace_dest
+        self.strings = strings
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def __len__(self) -> int:
+        return len(self.columns["ttl"])
+
+    @property
+    def n_traces(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def empty(cls) -> "TraceStore":
+        columns = {name: np.zeros(0, dtype) for name, dtype in HOP_COLUMNS.items()}
+        return cls(columns, np.zeros(1, OFFSETS_DTYPE), np.zeros(0, TRACE_DEST_DTYPE), StringTable())
+
+    @classmethod
+    def from_traces(cls, traces: Iterable[TraceResult], strings: Optional[StringTable] = None) -> "TraceStore":
+        if strings is None:
+            strings = StringTable()
+        rows = {name: [] for name in HOP_COLUMNS}
+        offsets = [0]
+        trace_dest = []
+        for trace in traces:
+            dest = strings.intern(trace.destination)
+            trace_dest.append(dest)
+            for hop in trace.hops:
+                rows["dest"].append(dest)
+                rows["ttl"].append(hop.ttl)
+                ip, ip_flags = encode_ip(hop.ip, hop.loss, strings)
+                rows["ip"].append(ip)
+                rows["rtt"].append(hop.rtt)
+                rows["proto"].append(PROTOCOL_IDS[hop.protocol])
+                rows["flags"].append(
+                    ip_flags
+                    | (FLAG_LOSS if hop.loss else 0)
+                    | (FLAG_INFERRED if hop.inferred else 0)
+                    | (RTT_SOURCE_IDS.get(hop.rtt_source, 0) << RTT_SOURCE_SHIFT)
+                )
+                rows["host"].append(strings.intern(hop.hostname) if hop.hostname else NO_HOST)
+            offsets.append(len(rows["ttl"]))
+        columns = {name: np.asarray(rows[name], dtype) for name, dtype in HOP_COLUMNS.items()}
+        return cls(columns, np.asarray(offsets, OFFSETS_DTYPE), np.asarray(trace_dest, TRACE_DEST_DTYPE), strings)
+
+    def trace(self, i: int) -> TraceResult:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        cols = {name: self.columns[name][start:end].tolist() for name in HOP_COLUMNS}
+        trace = TraceResult(destination=self.strings[int(self.trace_dest[i])])
+        add_hop = trace.hops.add
+        for ttl, ip, rtt, proto, flags, host in zip(cols["ttl"], cols["ip"], cols["rtt"], cols["proto"], cols["flags"], cols["host"]):
+            add_hop(
+                ttl,
+                decode_ip(ip, flags, self.strings),
+                rtt,
+                self.strings[host] if host != NO_HOST else None,
+                PROTOCOLS[proto],
+                bool(flags & FLAG_LOSS),
+                bool(flags & FLAG_INFERRED),
+                _rtt_source(flags),
+            )
+        return trace
+
+    def iter_traces(self) -> Iterator[TraceResult]:
+        for i in range(self.n_traces):
+            yield self.trace(i)
+
+    def to_traces(self) -> List[TraceResult]:
+        return list(self.iter_traces())
+
+
+def _column_path(path: str, name: str) -> str:
+    return os.path.join(path, f"{name}.bin")
+
+
+def _write_meta(path: str, n_hops: int, n_traces: int) -> None:
+    meta = {
+        "format": STORE_FORMAT,
+        "version": STORE_VERSION,
+        "hops": n_hops,
+        "traces": n_traces,
+        "columns": {name: dtype.str for name, dtype in HOP_COLUMNS.items()},
+    }
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+
+
+def _read_meta(path: str) -> dict:
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("format") != STORE_FORMAT:
+        raise ValueError(f"{path} is not a trace store")
+    if meta.get("version") != STORE_VERSION:
+        raise ValueError(f"Unsupported trace store version: {meta.get('version')}")
+    return meta
+
+
+def _read_strings(path: str) -> StringTable:
+    with open(os.path.join(path, "strings.json")) as f:
+        return StringTable(json.load(f))
+
+
+def _write_strings(path: str, strings: StringTable) -> None:
+    tmp = os.path.join(path, "strings.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(strings.strings, f)
+    os.replace(tmp, os.path.join(path, "strings.json"))
+
+
+def write_store(path: str, traces: Iterable[TraceResult], append: bool = False) -> TraceStore:
+    """Write ``traces`` to the store directory ``path``; ``append`` adds to an existing store."""
+    os.makedirs(path, exist_ok=True)
+    existing = append and os.path.exists(os.path.join(path, "meta.json"))
+    if existing:
+        meta = _read_meta(path)
+        strings = _read_strings(path)
+        n_hops, n_traces = meta["hops"], meta["traces"]
+    else:
+        strings = StringTable()
+        n_hops, n_traces = 0, 0
+
+    if existing:
+        # Drop rows an interrupted append left behind the committed metadata
+        for name, dtype in HOP_COLUMNS.items():
+            with open(_column_path(path, name), "r+b") as f:
+                f.truncate(n_hops * dtype.itemsize)
+        with open(_column_path(path, "offsets"), "r+b") as f:
+            f.truncate((n_traces + 1) * OFFSETS_DTYPE.itemsize)
+        with open(_column_path(path, "trace_dest"), "r+b") as f:
+            f.truncate(n_traces * TRACE_DEST_DTYPE.itemsize)
+
+    store = TraceStore.from_traces(traces, strings)
+    mode = "ab" if existing else "wb"
+    for name in HOP_COLUMNS:
+        with open(_column_path(path, name), mode) as f:
+            f.write(store.columns[name].tobytes())
+    offsets = store.offsets[1:] + n_hops if existing else store.offsets
+    with open(_column_path(path, "offsets"), mode) as f:
+        f.write(offsets.astype(OFFSETS_DTYPE).tobytes())
+    with open(_column_path(path, "trace_dest"), mode) as f:
+        f.write(store.trace_dest.tobytes())
+
+    # Metadata goes last so a reader never sees rows it cannot account for
+    _write_strings(path, strings)
+    _write_meta(path, n_hops + len(store), n_traces + store.n_traces)
+    return store
+
+
+def load_store(path: str, mmap: bool = True) -> TraceStore:
+    meta = _read_meta(path)
+    n_hops, n_traces = meta["hops"], meta["traces"]
+
+    def column(name: str, dtype: np.dtype, count: int) -> np.ndarray:
+        if count == 0:
+            return np.zeros(0, dtype)
+        if mmap:
+            return np.memmap(_column_path(path, name), dtype=dtype, mode="r", shape=(count,))
+        return np.fromfile(_column_path(path, name), dtype=dtype, count=count)
+
+    columns = {name: column(name, dtype, n_hops) for name, dtype in HOP_COLUMNS.items()}
+    offsets = column("offsets", OFFSETS_DTYPE, n_traces + 1)
+    trace_dest = column("trace_dest", TRACE_DEST_DTYPE, n_traces)
+    return TraceStore(columns, offsets, trace_dest, _read_strings(path))
+
+
+class StoreWriter:
+    """Buffers finished traces and appends them to a store every ``batch`` traces."""
+
+    def __init__(self, path: str, batch: int = 100, append: bool = False):
+        self.path = path
+        self.batch = batch
+        self._buffer: List[TraceResult] = []
+        if not append:
+            write_store(path, [])
+
+    def write(self, trace: TraceResult) -> None:
+        self._buffer.append(trace)
+        if len(self._buffer) >= self.batch:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            write_store(self.path, self._buffer, append=True)
+            self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
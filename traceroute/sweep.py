@@ -0,0 +1,188 @@
+import random
+import socket
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from scapy.all import IP, ICMP, TCP, AsyncSniffer, Raw, conf
+from scapy.layers.inet import ICMPerror, IPerror, TCPerror
+
+from .base import RTT_PACKET
+from .metrics import Metrics
+from .ratelimit import TokenBucket
+from .results import HopResult, TraceResult
+
+# High byte of the IP id marks our probes; the low byte carries the TTL.
+SWEEP_MARK = 0xA5
+BASE_SPORT = 40000
+
+SWEEP_PROTOCOLS = ('ICMP', 'TCP')
+
+
+class SweepReply(NamedTuple):
+    target: str
+    ttl: int
+    ip: str
+    rtt: float
+
+
+def permutation(n: int, seed: Optional[int] = None) -> Iterator[int]:
+    """Yield range(n) in a pseudo-random order using O(1) memory.
+
+    An affine map i -> (a*i + c) mod 2**k with odd a is a bijection on
+    range(2**k); values >= n are skipped (cycle walking).
+    """
+    if n <= 0:
+        return
+    rng = random.Random(seed)
+    m = 1 << max(1, (n - 1).bit_length())
+    a = rng.randrange(1, m, 2)
+    c = rng.randrange(m)
+    for i in range(m):
+        v = (a * i + c) % m
+        if v < n:
+            yield v
+
+
+def build_probe(target: str, ttl: int, sent_ms: int, protocol: str = 'ICMP', dport: int = 80) -> IP:
+    ip = IP(dst=target, ttl=ttl, id=(SWEEP_MARK << 8) | ttl)
+    if protocol == 'ICMP':
+        # The 32-bit send time rides in id/seq, which every router quotes back
+        return ip / ICMP(id=sent_ms >> 16, seq=sent_ms & 0xFFFF) / Raw(bytes([ttl]))
+    if protocol == 'TCP':
+        return ip / TCP(sport=BASE_SPORT + ttl, dport=dport, flags='S', seq=sent_ms)
+    raise ValueError(f"Unsupported sweep protocol: {protocol}")
+
+
+def decode_reply(resp: IP, recv_ms: int) -> Optional[SweepReply]:
+    """Recover target, TTL and RTT from a reply alone, without per-probe state."""
+    if ICMP in resp and resp[ICMP].type in (3, 11) and IPerror in resp:
+        quoted = resp[IPerror]
+        if quoted.id >> 8 != SWEEP_MARK:
+            return None
+        ttl = quoted.id & 0xFF
+        if ICMPerror in resp:
+            sent_ms = (resp[ICMPerror].id << 16) | resp[ICMPerror].seq
+        elif TCPerror in resp:
+            sent_ms = resp[TCPerror].seq
+        else:
+            return None
+        target = quoted.dst
+    elif ICMP in resp and resp[ICMP].type == 0 and Raw in resp:
+        ttl = resp[Raw].load[0]
+        sent_ms = (resp[ICMP].id << 16) | resp[ICMP].seq
+        target = resp.src
+    elif TCP in resp and ICMP not in resp and BASE_SPORT < resp[TCP].dport <= BASE_SPORT + 255:
+        ttl = resp[TCP].dport - BASE_SPORT
+        sent_ms = (resp[TCP].ack - 1) & 0xFFFFFFFF
+        target = resp.src
+    else:
+        return None
+    rtt = float((recv_ms - sent_ms) & 0xFFFFFFFF)
+    return SweepReply(target=target, ttl=ttl, ip=resp.src, rtt=rtt)
+
+
+class SweepTransport:
+    """One raw send socket plus one listener for the whole sweep."""
+
+    def __init__(self, iface: Optional[str] = None):
+        self.iface = iface
+        self._sock = None
+        self._sniffer = None
+
+    def start(self) -> None:
+        ready = threading.Event()
+        self._sniffer = AsyncSniffer(iface=self.iface, filter="icmp or tcp", store=True, started_callback=ready.set)
+        self._sniffer.start()
+        ready.wait(2)
+        self._sock = conf.L3socket(iface=self.iface)
+
+    def send(self, pkt: IP) -> None:
+        self._sock.send(pkt)
+
+    def stop(self, timeout: float) -> List[IP]:
+        # start() may have failed part way; close whatever it opened
+        if self._sock is not None:
+            self._sock.close()
+            time.sleep(timeout)
+        if self._sniffer is None:
+            return []
+        self._sniffer.stop()
+        return [p[IP] for p in self._sniffer.results or [] if IP in p]
+
+
+def _resolve(target: str) -> str:
+    try:
+        return socket.gethostbyname(target)
+    except OSError:
+        return target
+
+
+def rebuild_traces(replies: Sequence[SweepReply], targets: Dict[str, List[str]], init_ttl: int, protocol: str) -> List[TraceResult]:
+    by_target: Dict[str, Dict[int, SweepReply]] = defaultdict(dict)
+    for reply in replies:
+        if reply.target in targets:
+            by_target[reply.target].setdefault(reply.ttl, reply)
+
+    traces = []
+    for ip, names in targets.items():
+        hops = by_target.get(ip, {})
+        reached = [ttl for ttl, r in hops.items() if r.ip == ip]
+        last_ttl = min(reached) if reached else max(hops, default=init_ttl - 1)
+        for name in names:
+            trace = TraceResult(destination=name)
+            for ttl in range(init_ttl, last_ttl + 1):
+                reply = hops.get(ttl)
+                if reply is None:
+                    trace.hops.append(HopResult(ttl=ttl, ip='*', rtt=0, protocol=protocol, loss=True))
+                else:
+                    trace.hops.append(HopResult(ttl=ttl, ip=reply.ip, rtt=reply.rtt, protocol=protocol, loss=False, rtt_source=RTT_PACKET))
+            traces.append(trace)
+    return traces
+
+
+def run_sweep(targets: Sequence[str], max_ttl: int = 30, init_ttl: int = 1, pps: float = 1000, protocol: str = 'ICMP', dport: int = 80, timeout: float = 2.0, seed: Optional[int] = None, transport: Optional[SweepTransport] = None, metrics: Optional[Metrics] = None) -> List[TraceResult]:
+    """Probe every (target, TTL) pair once in random order at a fixed rate.
+
+    Given ``metrics``, probes are counted as they are sent and as answered
+    or timed out once the replies are in.
+    """
+    if protocol not in SWEEP_PROTOCOLS:
+        raise ValueError(f"Unsupported sweep protocol: {protocol}")
+    transport = transport or SweepTransport()
+
+    # Names sharing an address are probed once and each get the rebuilt trace
+    resolved: Dict[str, List[str]] = defaultdict(list)
+    for name in targets:
+        resolved[_resolve(name)].append(name)
+    addrs: List[str] = list(resolved)
+    n_ttl = max_ttl - init_ttl + 1
+
+    bucket = TokenBucket(pps)
+    start = time.time()
+    try:
+        transport.start()
+        for idx in permutation(len(addrs) * n_ttl, seed):
+            bucket.acquire()
+            target, ttl = addrs[idx // n_ttl], init_ttl + idx % n_ttl
+            sent_ms = int((time.time() - start) * 1000) & 0xFFFFFFFF
+            transport.send(build_probe(target, ttl, sent_ms, protocol=protocol, dport=dport))
+            if metrics is not None:
+                metrics.inc("probes_sent")
+    finally:
+        raw_replies = transport.stop(timeout)
+
+    replies = []
+    for resp in raw_replies:
+        recv_ms = int((float(resp.time) - start) * 1000) & 0xFFFFFFFF
+        reply = decode_reply(resp, recv_ms)
+        if reply is not None:
+            replies.append(reply)
+
+    if metrics is not None:
+        answered = len({(reply.target, reply.ttl) for reply in replies})
+        metrics.inc("probe_replies", answered)
+        metrics.inc("probe_timeouts", len(addrs) * n_ttl - answered)
+
+    return rebuild_traces(replies, resolved, init_ttl, protocol)
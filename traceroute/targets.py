@@ -0,0 +1,100 @@
+import csv
+import ipaddress
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dns import ForwardResolver
+from .results import TraceResult
+
+
+def iter_names(path: str) -> Iterator[str]:
+    """Stream target names from a plain list or a ``rank,domain`` CSV (such as cisco_top_3k.csv)."""
+    with open(path, newline="") as f:
+        lines = (line for line in f if line.strip() and not line.startswith("#"))
+        for i, row in enumerate(csv.reader(lines)):
+            if len(row) > 1:
+                if not row[0].strip().isdigit():
+                    # A header row, or a list with trailing columns
+                    if i == 0:
+                        continue
+                    name = row[0]
+                else:
+                    name = row[1]
+            else:
+                name = row[0]
+            name = name.strip()
+            if name:
+                yield name
+
+
+def is_address(name: str) -> bool:
+    try:
+        ipaddress.ip_address(name)
+    except ValueError:
+        return False
+    return True
+
+
+def resolve_names(names: Iterable[str], resolver: ForwardResolver, window: int = 1024) -> Iterator[Tuple[str, Optional[str]]]:
+    """(name, address) in input order; lookups run ``window`` names ahead of the consumer."""
+    names = iter(names)
+    while True:
+        chunk = list(islice(names, window))
+        if not chunk:
+            return
+        resolver.prefetch(name for name in chunk if not is_address(name))
+        for name in chunk:
+            yield name, name if is_address(name) else resolver.resolve(name)
+
+
+class TargetSet:
+    """Unique addresses to trace, each mapped back to every input name that resolved to it."""
+
+    def __init__(self):
+        self.ips: List[str] = []
+        self.names: Dict[str, List[str]] = {}
+        self.address: Dict[str, str] = {}
+        self.unresolved: List[str] = []
+
+    def add(self, name: str, ip: Optional[str]) -> None:
+        if ip is None:
+            self.unresolved.append(name)
+            return
+        if name in self.address:
+            return
+        self.address[name] = ip
+        names = self.names.get(ip)
+        if names is None:
+            names = self.names[ip] = []
+            self.ips.append(ip)
+        names.append(name)
+
+    def __len__(self) -> int:
+        return len(self.ips)
+
+    @property
+    def n_names(self) -> int:
+        return len(self.address)
+
+    def names_for(self, ip: str) -> List[str]:
+        return self.names.get(ip, [ip])
+
+    def expand(self, trace: TraceResult) -> Iterator[TraceResult]:
+        """One copy of ``trace`` per name its destination address stands for."""
+        for name in self.names_for(trace.destination):
+            yield trace if name == trace.destination else TraceResult(destination=name, hops=trace.hops, raw=trace.raw)
+
+
+def load_targets(names: Iterable[str], resolver: Optional[ForwardResolver] = None, window: int = 1024) -> TargetSet:
+    """Resolve and deduplicate target names, e.g. ``load_targets(iter_names(path))``."""
+    targets = TargetSet()
+    own = resolver is None
+    if own:
+        resolver = ForwardResolver()
+    try:
+        for name, ip in resolve_names(names, resolver, window):
+            targets.add(name, ip)
+    finally:
+        if own:
+            resolver.close()
+    return targets
@@ -0,0 +1,74 @@
+from typing import Iterable, Optional
+
+from .results import HopResult
+
+
+class TimingController:
+    """Per-destination probe timeouts and silent-hop accounting.
+
+    With ``adaptive`` the reply timeout follows the observed RTTs the way
+    TCP's retransmission timer does (RFC 6298): ``srtt + k * rttvar``,
+    clamped to ``[min_timeout, timeout]`` and never below ``max_rtt_factor``
+    times the largest RTT of the trace so far. Nearby hops answer fast, so
+    early TTLs wait far less than the fixed ``timeout``; every fully silent
+    TTL doubles the wait for the next one. As the RTT can still jump past
+    that, a TTL silent at the adaptive timeout gets one ``retry_timeout``
+    try before it counts as silent. ``gap_limit`` consecutive silent TTLs
+    end the trace (0 never stops early).
+    """
+
+    def __init__(self, timeout: float = 2.0, adaptive: bool = False, min_timeout: float = 0.1, gap_limit: int = 0, alpha: float = 1 / 8, beta: float = 1 / 4, k: float = 4, max_rtt_factor: float = 2):
+        self.max_timeout = timeout
+        self.adaptive = adaptive
+        self.min_timeout = min(min_timeout, timeout)
+        self.gap_limit = gap_limit
+        self.alpha = alpha
+        self.beta = beta
+        self.k = k
+        self.max_rtt_factor = max_rtt_factor
+        self.max_rtt = 0.0
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.backoff = 1
+        self.silent = 0
+
+    def sample(self, rtt: float) -> None:
+        """Feed one measured RTT in seconds."""
+        self.max_rtt = max(self.max_rtt, rtt)
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self.alpha) * self.srtt + self.alpha * rtt
+
+    @property
+    def timeout(self) -> float:
+        if not self.adaptive or self.srtt is None:
+            return self.max_timeout
+        rto = (self.srtt + self.k * self.rttvar) * self.backoff
+        return min(self.max_timeout, max(self.min_timeout, rto, self.max_rtt_factor * self.max_rtt))
+
+    @property
+    def retry_timeout(self) -> Optional[float]:
+        """Wait of the one retry of a TTL whose probes all timed out, or None if they already waited the full timeout."""
+        if self.timeout >= self.max_timeout:
+            return None
+        return self.max_timeout
+
+    def observe(self, hops: Iterable[HopResult]) -> None:
+        """Account for the probes of one TTL."""
+        answered = False
+        for hop in hops:
+            if not hop.loss:
+                answered = True
+                self.sample(hop.rtt / 1000)
+        if answered:
+            self.silent, self.backoff = 0, 1
+        else:
+            self.silent += 1
+            # Karn-style backoff: the next hop may simply be further away
+            self.backoff = min(self.backoff * 2, 64)
+
+    @property
+    def gap_reached(self) -> bool:
+        return bool(self.gap_limit) and self.silent >= self.gap_limit
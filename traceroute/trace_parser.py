@@ -0,0 +1,205 @@
+"""Parsers for trace output: the text results written by cli.py (streaming or
+chunk-parallel) and the output of the system traceroute/tracert."""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .results import HopResult, TraceResult
+
+TRACE_HEADER = "Trace to "
+HOP_RE = re.compile(r"TTL (\d+): (\S+) \((.*?)\) \[(\w+)\] RTT=([\d.]+)ms ?([A-Z ]*)")
+
+# tracert (test_tracert.py) output
+TRACERT_URL_RE = re.compile(r"URL #\d+: (.+)$")
+TRACERT_HOP_RE = re.compile(r"^\s*(\d+)\s+((?:(?:<?\d+ ms|\*)\s+){3})(.*)$")
+TRACERT_RTT_RE = re.compile(r"<?(\d+) ms|\*")
+TRACERT_HOST_RE = re.compile(r"(\S+) \[([\d.]+)\]$")
+
+# Linux/BSD traceroute output
+TRACEROUTE_HEADER_RE = re.compile(r"traceroute to (\S+)")
+TRACEROUTE_HOP_RE = re.compile(r"^\s*(\d+)\s+(.*)$")
+TRACEROUTE_ADDR_RE = re.compile(r"^[\d.]+$|^[0-9a-fA-F:]+:[0-9a-fA-F:.]*$")
+
+Source = Union[str, IO[str], Iterable[str]]
+
+
+def _lines(source: Source) -> Iterator[str]:
+    if isinstance(source, str):
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+    else:
+        yield from source
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[TraceResult]:
+    """Turn result-file lines into TraceResults, one trace at a time."""
+    trace: Optional[TraceResult] = None
+    add_hop = None
+    match = HOP_RE.match
+    for raw in lines:
+        if raw.startswith("TTL "):
+            m = match(raw)
+            if m is None or trace is None:
+                continue
+            ttl, ip, name, proto, rtt, flags = m.groups()
+            # Field values straight into the hop columns: this loop runs once per line of multi-GB files
+            add_hop(int(ttl), ip, float(rtt), name or None, proto, "LOSS" in flags, "INFERRED" in flags)
+        elif raw.startswith(TRACE_HEADER):
+            if trace is not None:
+                yield trace
+            trace = TraceResult(destination=raw.strip()[len(TRACE_HEADER):-1])
+            add_hop = trace.hops.add
+    if trace is not None:
+        yield trace
+
+
+def iter_traces(source: Source) -> Iterator[TraceResult]:
+    """Stream TraceResults from a results file (path, open file or lines)."""
+    return parse_lines(_lines(source))
+
+
+def find_chunks(path: str, n_chunks: int) -> List[Tuple[int, int]]:
+    """Split ``path`` into byte ranges that each start at a "Trace to" line."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    n_chunks = max(1, n_chunks)
+    header = TRACE_HEADER.encode()
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n_chunks):
+            f.seek(max(bounds[-1], size * i // n_chunks))
+            f.readline()  # finish the current line
+            while True:
+                pos = f.tell()
+                line = f.readline()
+                if not line:
+                    pos = size
+                    break
+                if line.startswith(header):
+                    break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+            if pos >= size:
+                break
+    if bounds[-1] != size:
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_chunk(path: str, start: int, end: int) -> List[TraceResult]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return list(parse_lines(data.decode("utf-8", "replace").splitlines(True)))
+
+
+def _parse_chunk(args: Tuple[str, int, int]) -> List[TraceResult]:
+    return parse_chunk(*args)
+
+
+def parse_parallel(path: str, workers: Optional[int] = None, chunk_size: int = 64 << 20) -> Iterator[TraceResult]:
+    """Parse a large results file on a process pool, yielding traces in file order."""
+    n_chunks = max(1, os.path.getsize(path) // chunk_size + 1)
+    chunks = [(path, start, end) for start, end in find_chunks(path, n_chunks)]
+    if len(chunks) <= 1 or workers == 1:
+        yield from iter_traces(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for traces in pool.map(_parse_chunk, chunks):
+            yield from traces
+
+
+def tracert_hops(line: str, protocol: str = "ICMP") -> List[HopResult]:
+    """Hops of one Windows tracert output line (empty if it is not a hop line)."""
+    hop = TRACERT_HOP_RE.match(line)
+    if hop is None:
+        return []
+    ttl, rtts, host = hop.groups()
+    host = host.strip()
+    named = TRACERT_HOST_RE.match(host)
+    if named:
+        hostname, ip = named.groups()
+    elif re.fullmatch(r"[\d.]+", host):
+        hostname, ip = None, host
+    else:
+        hostname, ip = None, "*"
+    hops = []
+    for m in TRACERT_RTT_RE.finditer(rtts):
+        if m.group(1) is None or ip == "*":
+            hops.append(HopResult(ttl=int(ttl), ip="*", rtt=0, protocol=protocol, loss=True))
+        else:
+            hops.append(HopResult(ttl=int(ttl), ip=ip, rtt=float(m.group(1)), hostname=hostname, protocol=protocol))
+    return hops
+
+
+def traceroute_hops(line: str, protocol: str = "UDP") -> List[HopResult]:
+    """Hops of one Linux/BSD traceroute output line, with or without -n (empty if it is not a hop line)."""
+    hop = TRACEROUTE_HOP_RE.match(line)
+    if hop is None:
+        return []
+    ttl = int(hop.group(1))
+    tokens = hop.group(2).split()
+    hops: List[HopResult] = []
+    ip, hostname = "*", None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        following = tokens[i + 1] if i + 1 < len(tokens) else ""
+        if token == "*":
+            hops.append(HopResult(ttl=ttl, ip="*", rtt=0, protocol=protocol, loss=True))
+        elif following == "ms":
+            try:
+                rtt = float(token)
+            except ValueError:
+                return []
+            hops.append(HopResult(ttl=ttl, ip=ip, rtt=rtt, hostname=hostname, protocol=protocol))
+            i += 1
+        elif following.startswith("(") and following.endswith(")"):
+            hostname, ip = token, following[1:-1]
+            if hostname == ip:
+                hostname = None
+            i += 1
+        elif TRACEROUTE_ADDR_RE.match(token):
+            hostname, ip = None, token
+        elif not token.startswith("!"):
+            # ICMP annotations (!H, !N, ...) are skipped; anything else means this is not a hop line
+            return []
+        i += 1
+    return hops
+
+
+def parse_system_trace(text: str, destination: Optional[str] = None) -> TraceResult:
+    """TraceResult from the output of one tracert or traceroute run."""
+    trace = TraceResult(destination=destination or "", raw=text)
+    for line in text.splitlines():
+        if not trace.destination:
+            header = TRACEROUTE_HEADER_RE.match(line)
+            if header:
+                trace.destination = header.group(1)
+                continue
+        trace.hops.extend(tracert_hops(line) or traceroute_hops(line))
+    return trace
+
+
+def iter_tracert(source: Source) -> Iterator[TraceResult]:
+    """Stream TraceResults from the tracert/traceroute output written by test_tracert.py."""
+    trace: Optional[TraceResult] = None
+    for raw in _lines(source):
+        line = raw.rstrip("\r\n")
+        url = TRACERT_URL_RE.match(line)
+        if url:
+            if trace is not None:
+                yield trace
+            trace = TraceResult(destination=url.group(1).strip())
+            continue
+        if trace is None:
+            continue
+        hops = tracert_hops(line) or traceroute_hops(line)
+        if not hops:
+            continue
+        trace.hops.extend(hops)
+        trace.raw += line + "\n"
+    if trace is not None:
+        yield trace
@@ -0,0 +1,179 @@
+"""Cross-check our traces against the operating system's traceroute/tracert."""
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .results import TraceResult
+from .trace_parser import parse_system_trace
+
+# traceroute flags for our protocol names; UDP is its default
+TRACEROUTE_PROTOCOL_FLAGS = {"UDP": [], "ICMP": ["-I"], "TCP": ["-T"]}
+
+
+def system_command(target: str, max_hops: int = 30, timeout: float = 4.0, resolve_names: bool = False, protocol: str = "UDP", platform: str = sys.platform) -> List[str]:
+    """tracert on Windows (always ICMP), traceroute everywhere else."""
+    if platform.startswith("win"):
+        cmd = ["tracert"]
+        if not resolve_names:
+            cmd.append("-d")
+        return cmd + ["-h", str(max_hops), "-w", str(int(timeout * 1000)), target]
+    cmd = ["traceroute", *TRACEROUTE_PROTOCOL_FLAGS[protocol]]
+    if not resolve_names:
+        cmd.append("-n")
+    return cmd + ["-m", str(max_hops), "-w", str(timeout), "-q", "3", target]
+
+
+def run_system_trace(target: str, **kwargs) -> str:
+    """Output of one system traceroute run, or an "ERROR: ..." line if it could not run."""
+    cmd = system_command(target, **kwargs)
+    max_hops = kwargs.get("max_hops", 30)
+    timeout = kwargs.get("timeout", 4.0)
+    try:
+        # Worst case every hop times out on every probe
+        result = subprocess.run(cmd, capture_output=True, text=True, check=False, timeout=max_hops * 3 * timeout + 10)
+        return result.stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        return f"ERROR: {e}"
+
+
+def run_system_traces(targets: Iterable[str], workers: int = 16, protocol: str = "UDP", **kwargs) -> Iterator[Tuple[str, TraceResult]]:
+    """(target, parsed trace) in input order, with at most ``workers`` traceroute processes at once."""
+    targets = list(targets)
+    if sys.platform.startswith("win"):
+        protocol = "ICMP"
+
+    def trace(target: str) -> TraceResult:
+        result = parse_system_trace(run_system_trace(target, protocol=protocol, **kwargs), target)
+        for hop in result.hops:
+            hop.protocol = protocol
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        yield from zip(targets, pool.map(trace, targets))
+
+
+class HopComparison(NamedTuple):
+    """One row per (destination, TTL) probed by either side."""
+
+    destination: np.ndarray  # index into ``destinations``
+    destinations: List[str]
+    ttl: np.ndarray
+    ours_answered: np.ndarray
+    theirs_answered: np.ndarray
+    agree: np.ndarray  # their address is among ours at that TTL
+    ours_rtt: np.ndarray  # fastest reply, NaN if none
+    theirs_rtt: np.ndarray
+
+    @property
+    def both_answered(self) -> np.ndarray:
+        return self.ours_answered & self.theirs_answered
+
+    @property
+    def agreement(self) -> float:
+        both = self.both_answered
+        return float(self.agree[both].mean()) if both.any() else float("nan")
+
+    @property
+    def rtt_delta(self) -> np.ndarray:
+        """Our RTT minus theirs (ms) where both answered."""
+        both = self.both_answered
+        return self.ours_rtt[both] - self.theirs_rtt[both]
+
+    def agreement_by_ttl(self) -> Dict[int, float]:
+        both = self.both_answered
+        ttls = self.ttl[both]
+        totals = np.bincount(ttls)
+        agreed = np.bincount(ttls, weights=self.agree[both])
+        return {ttl: float(agreed[ttl] / totals[ttl]) for ttl in np.nonzero(totals)[0].tolist()}
+
+    def agreement_by_destination(self) -> Dict[str, float]:
+        both = self.both_answered
+        dests = self.destination[both]
+        totals = np.bincount(dests, minlength=len(self.destinations))
+        agreed = np.bincount(dests, weights=self.agree[both], minlength=len(self.destinations))
+        return {self.destinations[i]: float(agreed[i] / totals[i]) for i in np.nonzero(totals)[0].tolist()}
+
+    def summary(self, worst: int = 10) -> str:
+        both = self.both_answered
+        lines = [
+            f"{len(self.destinations)} destinations, {len(self.ttl)} hops compared, {int(both.sum())} answered by both",
+            f"Hop agreement: {self.agreement:.1%}",
+            f"Answered only by us: {int((self.ours_answered & ~self.theirs_answered).sum())}, only by the system traceroute: {int((~self.ours_answered & self.theirs_answered).sum())}",
+        ]
+        delta = self.rtt_delta
+        if len(delta):
+            lines.append(f"RTT delta (ours - theirs): mean {delta.mean():+.2f}ms, median {np.median(delta):+.2f}ms, p95 |delta| {np.percentile(np.abs(delta), 95):.2f}ms")
+        by_dest = sorted(self.agreement_by_destination().items(), key=lambda item: item[1])[:worst]
+        disagreeing = [f"  {dest}: {share:.0%}" for dest, share in by_dest if share < 1]
+        if disagreeing:
+            lines.append("Lowest agreement:")
+            lines.extend(disagreeing)
+        return "\n".join(lines)
+
+
+def _rows(traces: Dict[str, TraceResult], dest_ids: Dict[str, int], protocol: Optional[str]) -> Tuple[np.ndarray, np.ndarray, List[str], np.ndarray]:
+    """(destination id, ttl, ip, rtt) of every answered hop, as flat arrays."""
+    dest, ttl, ips, rtt = [], [], [], []
+    for name, trace in traces.items():
+        i = dest_ids[name]
+        for hop in trace.hops:
+            if hop.loss or (protocol is not None and hop.protocol != protocol):
+                continue
+            dest.append(i)
+            ttl.append(hop.ttl)
+            ips.append(hop.ip)
+            rtt.append(hop.rtt)
+    return np.array(dest, dtype=np.int64), np.array(ttl, dtype=np.int64), ips, np.array(rtt, dtype=float)
+
+
+def compare(ours: Iterable[TraceResult], theirs: Iterable[TraceResult], protocol: Optional[str] = None) -> HopComparison:
+    """Per-hop agreement and RTT deltas for the destinations traced by both sides.
+
+    A hop agrees when the system traceroute's address is one of the
+    addresses we saw at that TTL (load-balanced paths can answer from
+    several). ``protocol`` restricts our side to probes of that protocol.
+    """
+    ours_by_dest = {trace.destination: trace for trace in ours}
+    theirs_by_dest = {trace.destination: trace for trace in theirs if trace.destination in ours_by_dest}
+    ours_by_dest = {dest: ours_by_dest[dest] for dest in theirs_by_dest}
+    destinations = list(theirs_by_dest)
+    dest_ids = {dest: i for i, dest in enumerate(destinations)}
+    max_ttl = max((hop.ttl for t in (*ours_by_dest.values(), *theirs_by_dest.values()) for hop in t.hops), default=0) + 1
+
+    o_dest, o_ttl, o_ips, o_rtt = _rows(ours_by_dest, dest_ids, protocol)
+    t_dest, t_ttl, t_ips, t_rtt = _rows(theirs_by_dest, dest_ids, None)
+    ip_ids = {ip: i for i, ip in enumerate(dict.fromkeys(o_ips + t_ips))}
+    o_ip = np.array([ip_ids[ip] for ip in o_ips], dtype=np.int64)
+    t_ip = np.array([ip_ids[ip] for ip in t_ips], dtype=np.int64)
+
+    # Every (destination, TTL) probed by either side is one row
+    probed = {(dest_ids[name], hop.ttl) for traces in (ours_by_dest, theirs_by_dest) for name, trace in traces.items() for hop in trace.hops}
+    row_keys = np.array(sorted(d * max_ttl + t for d, t in probed), dtype=np.int64)
+    o_row = np.searchsorted(row_keys, o_dest * max_ttl + o_ttl)
+    t_row = np.searchsorted(row_keys, t_dest * max_ttl + t_ttl)
+    n = len(row_keys)
+
+    ours_rtt = np.full(n, np.nan)
+    theirs_rtt = np.full(n, np.nan)
+    np.fmin.at(ours_rtt, o_row, o_rtt)
+    np.fmin.at(theirs_rtt, t_row, t_rtt)
+
+    # A row agrees if any of their (row, ip) pairs is among ours
+    n_ips = max(len(ip_ids), 1)
+    matched = np.isin(t_row * n_ips + t_ip, o_row * n_ips + o_ip)
+    agree = np.zeros(n, dtype=bool)
+    agree[t_row[matched]] = True
+
+    return HopComparison(
+        destination=row_keys // max_ttl,
+        destinations=destinations,
+        ttl=row_keys % max_ttl,
+        ours_answered=~np.isnan(ours_rtt),
+        theirs_answered=~np.isnan(theirs_rtt),
+        agree=agree,
+        ours_rtt=ours_rtt,
+        theirs_rtt=theirs_rtt,
+    )
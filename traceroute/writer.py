@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Set
+
+from .results import HopResult, TraceResult
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+JSONL_FORMAT = "topologyanalyzer-traces"
+JSONL_VERSION = 1
+
+
+def trace_to_record(trace: TraceResult) -> Dict[str, Any]:
+    return {"type": "trace", "destination": trace.destination, "hops": [asdict(hop) for hop in trace.hops], "raw": trace.raw}
+
+
+def trace_from_record(record: Dict[str, Any]) -> TraceResult:
+    return TraceResult(
+        destination=record["destination"],
+        hops=[HopResult(**hop) for hop in record.get("hops", [])],
+        raw=record.get("raw", ""),
+    )
+
+
+def format_text(trace: TraceResult) -> str:
+    lines = [f"Trace to {trace.destination}:\n"]
+    for hop in trace.hops:
+        lines.append(f"TTL {hop.ttl}: {hop.ip} ({hop.hostname or ''}) [{hop.protocol}] RTT={hop.rtt:.2f}ms {'LOSS' if hop.loss else ''}{' INFERRED' if hop.inferred else ''}\n")
+    lines.append("\n")
+    return "".join(lines)
+
+
+def _truncate_partial_tail(path: str, complete_at: int) -> None:
+    if os.path.getsize(path) > complete_at:
+        with open(path, "r+b") as f:
+            f.truncate(complete_at)
+
+
+def _scan_jsonl(path: str) -> Iterator[tuple]:
+    """Yield (end_offset, record) for every complete, valid line."""
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            offset += len(line)
+            yield offset, record
+
+
+def _scan_text(path: str) -> Iterator[tuple]:
+    """Yield (end_offset, destination) for every trace block closed by a blank line."""
+    offset = 0
+    current = None
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            text = line.decode("utf-8", "replace").strip()
+            if text.startswith("Trace to ") and text.endswith(":"):
+                current = text[len("Trace to "):-1]
+            elif not text and current is not None:
+                yield offset, current
+                current = None
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    for _, record in _scan_jsonl(path):
+        yield record
+
+
+def read_traces(path: str) -> Iterator[TraceResult]:
+    for record in read_records(path):
+        if record.get("type") == "trace":
+            yield trace_from_record(record)
+
+
+class ResultWriter(ABC):
+    """Append-only, crash-safe result file.
+
+    Every trace is written with a single ``write`` on an ``O_APPEND``
+    descriptor under a thread lock and, where available, an exclusive
+    ``flock``, so concurrent writers never interleave. With ``resume`` the
+    destinations already in the file are collected in ``completed`` and a
+    partially written tail left by a killed run is cut off.
+    """
+
+    def __init__(self, path: str, resume: bool = False, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self.completed: Set[str] = set()
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            end = 0
+            for end, destination in self._scan():
+                if destination is not None:
+                    self.completed.add(destination)
+            _truncate_partial_tail(path, end)
+        else:
+            open(path, "w").close()
+
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if os.path.getsize(path) == 0:
+            self._write(self._header())
+
+    @abstractmethod
+    def _scan(self) -> Iterator[tuple]:
+        """(end offset, destination or None) of each complete record, for --resume."""
+
+    def _header(self) -> str:
+        return ""
+
+    @abstractmethod
+    def _format(self, trace: TraceResult) -> str:
+        pass
+
+    def _write(self, text: str) -> None:
+        if not text:
+            return
+        data = text.encode("utf-8")
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                os.write(self._fd, data)
+                if self.fsync:
+                    os.fsync(self._fd)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def write(self, trace: TraceResult) -> None:
+        self._write(self._format(trace))
+        self.completed.add(trace.destination)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TextResultWriter(ResultWriter):
+    def _scan(self) -> Iterator[tuple]:
+        return _scan_text(self.path)
+
+    def _format(self, trace: TraceResult) -> str:
+        return format_text(trace)
+
+
+class JsonlResultWriter(ResultWriter):
+    def __init__(self, path: str, resume: bool = False, fsync: bool = True, meta: Optional[Dict[str, Any]] = None):
+        self.meta = meta or {}
+        super().__init__(path, resume=resume, fsync=fsync)
+
+    def _scan(self) -> Iterator[tuple]:
+        for end, record in _scan_jsonl(self.path):
+            yield end, record.get("destination") if record.get("type") == "trace" else None
+
+    def _header(self) -> str:
+        header = {"type": "header", "format": JSONL_FORMAT, "version": JSONL_VERSION, "created": datetime.now().isoformat(), **self.meta}
+        return json.dumps(header) + "\n"
+
+    def _format(self, trace: TraceResult) -> str:
+        return json.dumps(trace_to_record(trace)) + "\n"
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        """Append an already serialized trace record as is, e.g. one read from another result file."""
+        self._write(json.dumps(record) + "\n")
+        self.completed.add(record["destination"])
+
+
+def open_writer(path: str, fmt: Optional[str] = None, resume: bool = False, meta: Optional[Dict[str, Any]] = None, fsync: bool = True) -> ResultWriter:
+    fmt = fmt or ("jsonl" if path.endswith(".jsonl") else "text")
+    if fmt == "jsonl":
+        return JsonlResultWriter(path, resume=resume, fsync=fsync, meta=meta)
+    return TextResultWriter(path, resume=resume, fsync=fsync)
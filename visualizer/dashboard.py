@@ -0,0 +1,97 @@
+"""Interactive topology dashboard.
+
+    streamlit run visualizer/dashboard.py -- results.jsonl
+
+Loading the results, building graphs and computing layouts are cached and
+keyed on the results' signature (mtime and size), so widget interactions
+reuse them and only a changed file triggers a reload. Only the selected
+view is computed.
+"""
+import os
+import sys
+from typing import Optional, Sequence, Tuple
+
+import streamlit as st
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from traceroute.store import PROTOCOLS
+from visualizer.dataset import HopIndex, load, signature
+
+DEFAULT_INPUT = sys.argv[1] if len(sys.argv) > 1 else "results.jsonl"
+VIEWS = ("Destinations", "Destination path", "Filtered subgraph", "Full topology")
+
+# Filters as a hashable key: (destinations, protocols, rtt range)
+Filters = Tuple[Tuple[str, ...], Tuple[str, ...], Optional[Tuple[float, float]]]
+
+
+@st.cache_resource(max_entries=4, show_spinner="Loading results...")
+def get_index(path: str, sig: Tuple[int, int]) -> HopIndex:
+    return HopIndex(load(path))
+
+
+@st.cache_resource(max_entries=16, show_spinner="Building graph...")
+def get_graph(path: str, sig: Tuple[int, int], filters: Filters):
+    index = get_index(path, sig)
+    destinations, protocols, rtt_range = filters
+    if not (destinations or protocols or rtt_range):
+        return index.topology()
+    return index.topology(index.mask(destinations, protocols, rtt_range))
+
+
+@st.cache_data(max_entries=16, show_spinner="Computing layout...")
+def get_layout(path: str, sig: Tuple[int, int], filters: Filters, method: str = "layered"):
+    from visualizer.layout import compute_layout
+    return compute_layout(get_graph(path, sig, filters), method=method)
+
+
+def show_graph(path: str, sig: Tuple[int, int], filters: Filters, title: str, group_by: str = "protocol") -> None:
+    from visualizer.render import build_figure
+    G = get_graph(path, sig, filters)
+    if not G.number_of_nodes():
+        st.info("No hops match these filters.")
+        return
+    st.caption(f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+    fig = build_figure(G, get_layout(path, sig, filters), title=title, group_by=group_by)
+    st.plotly_chart(fig, width="stretch")
+
+
+def rtt_filter(index: HopIndex) -> Optional[Tuple[float, float]]:
+    lo, hi = index.rtt_bounds()
+    if hi <= lo:
+        return None
+    selected = st.sidebar.slider("RTT (ms)", min_value=lo, max_value=hi, value=(lo, hi))
+    return None if selected == (lo, hi) else (float(selected[0]), float(selected[1]))
+
+
+def main() -> None:
+    st.set_page_config(page_title="Traceroute topology", layout="wide")
+    path = st.sidebar.text_input("Results (text, .jsonl or store directory)", DEFAULT_INPUT)
+    if not os.path.exists(path):
+        st.error(f"{path} not found")
+        return
+    sig = signature(path)
+    index = get_index(path, sig)
+    st.sidebar.caption(f"{index.store.n_traces} traces, {len(index)} hops, {len(index.destinations)} destinations")
+
+    view = st.sidebar.radio("View", VIEWS)
+    if view == "Destinations":
+        protocols: Sequence[str] = st.sidebar.multiselect("Protocols", PROTOCOLS)
+        mask = index.mask(protocols=protocols, rtt_range=rtt_filter(index))
+        st.dataframe(index.destination_summary(mask), width="stretch")
+    elif view == "Destination path":
+        if not index.destinations:
+            st.info("No traces in this result set.")
+            return
+        destination = st.sidebar.selectbox("Destination", index.destinations)
+        show_graph(path, sig, ((destination,), (), None), f"Paths to {destination}", group_by="destination")
+    elif view == "Filtered subgraph":
+        destinations = st.sidebar.multiselect("Destinations", index.destinations)
+        protocols = st.sidebar.multiselect("Protocols", PROTOCOLS)
+        filters = (tuple(destinations), tuple(protocols), rtt_filter(index))
+        show_graph(path, sig, filters, "Filtered topology")
+    else:
+        show_graph(path, sig, ((), (), None), "Traceroute Topology Visualization")
+
+
+main()
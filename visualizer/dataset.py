@@ -0,0 +1,114 @@
+"""Column indexes over a result set, so dashboard filters are NumPy masks instead of Python loops."""
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from traceroute.results import TraceResult
+from traceroute.store import FLAG_LOSS, PROTOCOL_IDS, TraceStore, load_store
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+def signature(path: str) -> Tuple[int, int]:
+    """(newest mtime in ns, total size) of a results file or store directory; changes whenever its data does."""
+    if os.path.isdir(path):
+        stats = [os.stat(os.path.join(path, name)) for name in os.listdir(path)]
+    else:
+        stats = [os.stat(path)]
+    return max((s.st_mtime_ns for s in stats), default=0), sum(s.st_size for s in stats)
+
+
+def load(path: str) -> TraceStore:
+    """A trace store directory (memory-mapped), or a text/JSON Lines results file converted to one."""
+    if os.path.isdir(path):
+        return load_store(path)
+    from traceroute.fingerprint import load_traces
+    return TraceStore.from_traces(load_traces(path))
+
+
+class HopIndex:
+    """Per-hop columns of a TraceStore plus the lookups the dashboard filters on."""
+
+    def __init__(self, store: TraceStore):
+        self.store = store
+        self.dest = np.asarray(store["dest"])
+        self.proto = np.asarray(store["proto"])
+        self.rtt = np.asarray(store["rtt"])
+        self.loss = (np.asarray(store["flags"]) & FLAG_LOSS) != 0
+        self.trace_of_hop = np.repeat(np.arange(store.n_traces), np.diff(store.offsets).astype(np.int64))
+
+        # Destination name <-> string table id, and the traces of each destination
+        ids = np.unique(store.trace_dest)
+        self.destinations: List[str] = sorted(store.strings[int(i)] for i in ids)
+        self._dest_ids: Dict[str, int] = {store.strings[int(i)]: int(i) for i in ids}
+        order = np.argsort(store.trace_dest, kind="stable")
+        bounds = np.searchsorted(store.trace_dest[order], ids)
+        self._traces_by_dest = dict(zip(ids.tolist(), np.split(order, bounds[1:])))
+
+    def __len__(self) -> int:
+        return len(self.rtt)
+
+    def rtt_bounds(self) -> Tuple[float, float]:
+        answered = self.rtt[~self.loss]
+        return (float(answered.min()), float(answered.max())) if len(answered) else (0.0, 0.0)
+
+    def trace_ids(self, destination: str) -> np.ndarray:
+        return self._traces_by_dest.get(self._dest_ids.get(destination, -1), np.zeros(0, np.int64))
+
+    def mask(self, destinations: Optional[Sequence[str]] = None, protocols: Optional[Sequence[str]] = None, rtt_range: Optional[Tuple[float, float]] = None) -> np.ndarray:
+        """Boolean mask of the hops that pass every given filter; lost probes pass the RTT filter."""
+        keep = np.ones(len(self), dtype=bool)
+        if destinations:
+            ids = [self._dest_ids[d] for d in destinations if d in self._dest_ids]
+            keep &= np.isin(self.dest, ids)
+        if protocols:
+            keep &= np.isin(self.proto, [PROTOCOL_IDS[p] for p in protocols])
+        if rtt_range is not None:
+            lo, hi = rtt_range
+            keep &= self.loss | ((self.rtt >= lo) & (self.rtt <= hi))
+        return keep
+
+    def selected_traces(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Ids of the traces with at least one selected hop."""
+        return np.arange(self.store.n_traces) if mask is None else np.unique(self.trace_of_hop[mask])
+
+    def traces(self, mask: Optional[np.ndarray] = None, trace_ids: Optional[np.ndarray] = None) -> List[TraceResult]:
+        """Materialize only the selected traces, each complete."""
+        if trace_ids is None:
+            trace_ids = self.selected_traces(mask)
+        return [self.store.trace(i) for i in trace_ids.tolist()]
+
+    def topology(self, mask: Optional[np.ndarray] = None) -> "nx.DiGraph":
+        """Topology of the edges into the selected hops, linked along their complete traces."""
+        from visualizer.graph import TopologyBuilder
+        builder = TopologyBuilder()
+        offsets = self.store.offsets
+        for i in self.selected_traces(mask).tolist():
+            keep = None if mask is None else mask[int(offsets[i]):int(offsets[i + 1])].tolist()
+            builder.add_trace(self.store.trace(i), keep)
+        return builder.graph
+
+    def destination_summary(self, mask: Optional[np.ndarray] = None) -> Dict[str, list]:
+        """Hops, loss rate, mean RTT and deepest TTL per destination, as table columns."""
+        keep = np.ones(len(self), dtype=bool) if mask is None else mask
+        size = len(self.store.strings)
+        dest = self.dest[keep]
+        loss = self.loss[keep]
+        hops = np.bincount(dest, minlength=size)
+        losses = np.bincount(dest, weights=loss, minlength=size)
+        answered = np.bincount(dest[~loss], minlength=size)
+        rtt_sum = np.bincount(dest[~loss], weights=self.rtt[keep][~loss], minlength=size)
+        max_ttl = np.zeros(size, dtype=np.int64)
+        np.maximum.at(max_ttl, dest, np.asarray(self.store["ttl"])[keep])
+        ids = np.nonzero(hops)[0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_rtt = rtt_sum[ids] / answered[ids]
+        return {
+            "destination": [self.store.strings[int(i)] for i in ids],
+            "hops": hops[ids].tolist(),
+            "loss %": np.round(100 * losses[ids] / hops[ids], 1).tolist(),
+            "mean RTT (ms)": np.round(mean_rtt, 2).tolist(),
+            "max TTL": max_ttl[ids].tolist(),
+        }
@@ -0,0 +1,166 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import networkx as nx
+
+from traceroute.results import HopResult, TraceResult
+
+
+class RunningStats:
+    """Constant-memory RTT/loss statistics (Welford's algorithm)."""
+
+    __slots__ = ("count", "losses", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.losses = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, rtt: float, loss: bool = False) -> None:
+        self.count += 1
+        if loss:
+            self.losses += 1
+            return
+        n = self.count - self.losses
+        delta = rtt - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (rtt - self.mean)
+        self.min = min(self.min, rtt)
+        self.max = max(self.max, rtt)
+
+    def merge(self, other: "RunningStats") -> None:
+        n_a, n_b = self.count - self.losses, other.count - other.losses
+        if n_b:
+            n = n_a + n_b
+            delta = other.mean - self.mean
+            self._m2 += other._m2 + delta * delta * n_a * n_b / n
+            self.mean += delta * n_b / n
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.losses += other.losses
+
+    @property
+    def variance(self) -> float:
+        n = self.count - self.losses
+        return self._m2 / (n - 1) if n > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def loss_rate(self) -> float:
+        return self.losses / self.count if self.count else 0.0
+
+
+class TopologyBuilder:
+    """Builds a topology graph from traces and keeps merging new ones into it.
+
+    A hop is linked to the previous responsive hop of the same probe lane:
+    the same protocol and the same series number within the TTL. When that
+    lane has nothing yet (e.g. the protocol changed), the hop at the same
+    position of the previous TTL is used, so every trace is added in
+    O(hops). Lost probes count against the edge their lane crosses next,
+    from the last answered hop to the next one.
+
+    ``add_trace(trace, keep)`` adds only the edges into the hops selected by
+    ``keep``, but still links them along the complete trace, so filtering
+    hops never joins routers that were not adjacent.
+    """
+
+    def __init__(self, graph: Optional[nx.DiGraph] = None):
+        self.graph = graph if graph is not None else nx.DiGraph()
+
+    def _add_node(self, hop: HopResult) -> None:
+        G = self.graph
+        if hop.ip in G:
+            attrs = G.nodes[hop.ip]
+            if hop.hostname and not attrs.get("hostname"):
+                attrs["hostname"] = hop.hostname
+                attrs["label"] = f"{hop.ip}\n{hop.hostname}"
+            attrs["ttl"] = min(attrs["ttl"], hop.ttl)
+        else:
+            label = f"{hop.ip}\n{hop.hostname}" if hop.hostname else hop.ip
+            G.add_node(hop.ip, hostname=hop.hostname, label=label, ttl=hop.ttl)
+
+    def _add_edge(self, u: str, v: str, hop: HopResult, destination: str, losses: int = 0) -> None:
+        G = self.graph
+        if G.has_edge(u, v):
+            data = G[u][v]
+        else:
+            G.add_edge(u, v, stats=RunningStats(), protocols=set(), destinations=set())
+            data = G[u][v]
+        for _ in range(losses):
+            data["stats"].update(0.0, loss=True)
+        data["stats"].update(hop.rtt, hop.loss)
+        data["protocols"].add(hop.protocol)
+        data["destinations"].add(destination)
+        # Most recent probe over this edge
+        data["protocol"] = hop.protocol
+        data["rtt"] = hop.rtt
+        data["loss"] = hop.loss
+
+    def add_trace(self, trace: TraceResult, keep: Optional[Sequence[bool]] = None) -> nx.DiGraph:
+        # Decode each stored hop once
+        hops = list(trace.hops)
+        if any(a.ttl > b.ttl for a, b in zip(hops, hops[1:])):
+            order = sorted(range(len(hops)), key=lambda i: hops[i].ttl)
+            hops = [hops[i] for i in order]
+            if keep is not None:
+                keep = [keep[i] for i in order]
+        # Answered hops by address, for tails of edges into selected hops
+        answered: Dict[str, HopResult] = {}
+        # Lost probes per lane since its last answered hop
+        pending: Dict[Tuple[str, int], int] = {}
+
+        lanes: Dict[Tuple[str, int], str] = {}
+        prev_row: List[Optional[str]] = []
+        row: List[Optional[str]] = []
+        seen: Dict[str, int] = {}
+        ttl = None
+
+        for i, hop in enumerate(hops):
+            if hop.ttl != ttl:
+                if any(row):
+                    prev_row = row
+                row, seen, ttl = [], {}, hop.ttl
+            k = seen.get(hop.protocol, 0)
+            seen[hop.protocol] = k + 1
+            key = (hop.protocol, k)
+            if hop.ip == '*':
+                row.append(None)
+                if keep is None or keep[i]:
+                    pending[key] = pending.get(key, 0) + 1
+                continue
+
+            losses = pending.pop(key, 0)
+            prev = lanes.get(key)
+            if prev is None and prev_row:
+                pos = len(row)
+                prev = prev_row[pos] if pos < len(prev_row) and prev_row[pos] else next(ip for ip in reversed(prev_row) if ip)
+            if keep is None or keep[i]:
+                self._add_node(hop)
+                if prev is not None and prev != hop.ip:
+                    if keep is not None:
+                        self._add_node(answered[prev])
+                    self._add_edge(prev, hop.ip, hop, trace.destination, losses)
+            if keep is not None:
+                answered[hop.ip] = hop
+            lanes[key] = hop.ip
+            row.append(hop.ip)
+
+        return self.graph
+
+    def add_traces(self, traces: Iterable[TraceResult]) -> nx.DiGraph:
+        for trace in traces:
+            self.add_trace(trace)
+        return self.graph
+
+
+def build_topology(traces: Iterable[TraceResult], graph: Optional[nx.DiGraph] = None) -> nx.DiGraph:
+    """Build (or, given ``graph``, extend) the topology graph of ``traces``."""
+    return TopologyBuilder(graph).add_traces(traces)
@@ -0,0 +1,134 @@
+import json
+import os
+from typing import Dict, Hashable, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+Positions = Dict[Hashable, Tuple[float, float]]
+
+X_SPACING = 1.0
+Y_SPACING = 1.0
+
+
+def _layers(G: nx.DiGraph, nodes: list) -> np.ndarray:
+    return np.fromiter((G.nodes[n].get("ttl", 0) or 0 for n in nodes), dtype=np.int64, count=len(nodes))
+
+
+def _edge_index(G: nx.DiGraph, index: Dict[Hashable, int]) -> Tuple[np.ndarray, np.ndarray]:
+    m = G.number_of_edges()
+    src = np.fromiter((index[u] for u, _ in G.edges()), dtype=np.int64, count=m)
+    dst = np.fromiter((index[v] for _, v in G.edges()), dtype=np.int64, count=m)
+    return src, dst
+
+
+def layered_layout(G: nx.DiGraph, x_spacing: float = X_SPACING, y_spacing: float = Y_SPACING) -> Positions:
+    """TTL-layered layout: x is the hop distance, y orders each layer by the
+    mean position of its predecessors (one barycenter sweep).
+
+    Runs in O(E log E) with NumPy instead of spring_layout's O(n^2) per
+    iteration.
+    """
+    nodes = list(G.nodes())
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    ttl = _layers(G, nodes)
+    src, dst = _edge_index(G, index)
+
+    y = np.full(n, np.nan)
+    layers = np.unique(ttl)
+    node_order = np.argsort(ttl, kind="stable")
+    node_bounds = np.searchsorted(ttl[node_order], layers, side="left")
+    node_bounds = np.append(node_bounds, n)
+
+    edge_order = np.argsort(ttl[dst], kind="stable")
+    src, dst = src[edge_order], dst[edge_order]
+    edge_bounds = np.searchsorted(ttl[dst], layers, side="left")
+    edge_bounds = np.append(edge_bounds, len(dst))
+
+    for li in range(len(layers)):
+        members = node_order[node_bounds[li]:node_bounds[li + 1]]
+        s, d = src[edge_bounds[li]:edge_bounds[li + 1]], dst[edge_bounds[li]:edge_bounds[li + 1]]
+        placed = ~np.isnan(y[s])
+        sums = np.bincount(d[placed], weights=y[s[placed]], minlength=n)[members]
+        counts = np.bincount(d[placed], minlength=n)[members]
+        # Nodes without placed predecessors go after the rest, in insertion order
+        bary = np.where(counts > 0, sums / np.maximum(counts, 1), np.inf)
+        ordered = members[np.lexsort((members, bary))]
+        y[ordered] = (np.arange(len(ordered)) - len(ordered) // 2) * y_spacing
+
+    x = ttl * x_spacing
+    return {node: (float(x[i]), float(y[i])) for i, node in enumerate(nodes)}
+
+
+def incremental_layout(G: nx.DiGraph, positions: Optional[Positions] = None, x_spacing: float = X_SPACING, y_spacing: float = Y_SPACING) -> Positions:
+    """Place only the nodes of ``G`` missing from ``positions``; the rest stay put.
+
+    A new node goes in its TTL column at the free slot closest to the mean
+    position of its already placed neighbours.
+    """
+    positions = dict(positions or {})
+    missing = [n for n in G.nodes() if n not in positions]
+    if not missing:
+        return positions
+    if not positions:
+        positions.update(layered_layout(G, x_spacing, y_spacing))
+        return positions
+
+    occupied: Dict[float, set] = {}
+    for x, y in positions.values():
+        occupied.setdefault(x, set()).add(round(y / y_spacing))
+
+    # Parents first, so chains of new nodes follow each other
+    missing.sort(key=lambda n: G.nodes[n].get("ttl", 0) or 0)
+    for node in missing:
+        x = (G.nodes[node].get("ttl", 0) or 0) * x_spacing
+        neighbours = [positions[m] for m in nx.all_neighbors(G, node) if m in positions]
+        target = round(np.mean([p[1] for p in neighbours]) / y_spacing) if neighbours else 0
+        taken = occupied.setdefault(x, set())
+        offset = 0
+        while True:
+            if target + offset not in taken:
+                slot = target + offset
+                break
+            if target - offset not in taken:
+                slot = target - offset
+                break
+            offset += 1
+        taken.add(slot)
+        positions[node] = (x, slot * y_spacing)
+    return positions
+
+
+class LayoutCache:
+    """Node positions persisted to a JSON file, keyed by node ID."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.positions: Positions = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.positions = {node: tuple(xy) for node, xy in json.load(f).items()}
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({str(node): list(xy) for node, xy in self.positions.items()}, f)
+        os.replace(tmp, self.path)
+
+    def layout(self, G: nx.DiGraph) -> Positions:
+        before = len(self.positions)
+        self.positions = incremental_layout(G, self.positions)
+        if len(self.positions) != before:
+            self.save()
+        return self.positions
+
+
+def compute_layout(G: nx.DiGraph, method: str = "layered", cache_path: Optional[str] = None) -> Positions:
+    if method == "spring":
+        return nx.spring_layout(G, seed=42, k=0.5)
+    if cache_path:
+        return LayoutCache(cache_path).layout(G)
+    return layered_layout(G)
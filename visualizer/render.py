@@ -0,0 +1,245 @@
+import ipaddress
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+from visualizer.graph import RunningStats
+from visualizer.layout import Positions, compute_layout
+
+PROTOCOL_COLOR = {"ICMP": "blue", "UDP": "green", "TCP": "red"}
+
+LOD_MODES = ("prefix", "ttl", "chains")
+# (mode, prefix length) views tried by "auto" LOD, finest first
+AUTO_LOD = (("chains", 24), ("prefix", 24), ("prefix", 16))
+# Above this many nodes text labels are dropped and "auto" LOD kicks in
+MAX_NODES = 2000
+MAX_LABELLED_NODES = 300
+MAX_DESTINATION_TRACES = 50
+
+
+def edge_label(data: dict) -> str:
+    stats = data["stats"]
+    return (
+        f"RTT: {stats.mean:.2f}ms (±{stats.stddev:.2f}, {stats.min:.2f}-{stats.max:.2f})\n"
+        f"Loss: {stats.loss_rate:.0%}\nProtocols: {', '.join(sorted(data['protocols']))}"
+    )
+
+
+def _prefix_key(G: nx.DiGraph, node: Hashable, prefix_len: int = 24) -> str:
+    try:
+        return str(ipaddress.ip_network(f"{node}/{prefix_len}", strict=False))
+    except ValueError:
+        return str(node)
+
+
+def _ttl_key(G: nx.DiGraph, node: Hashable, band: int = 4) -> str:
+    ttl = G.nodes[node].get("ttl", 0) or 0
+    start = (ttl - 1) // band * band + 1
+    return f"TTL {start}-{start + band - 1}"
+
+
+def _chain_keys(G: nx.DiGraph) -> Dict[Hashable, str]:
+    """Group runs of pass-through nodes (one predecessor, one successor)."""
+    def passthrough(n):
+        return G.in_degree(n) == 1 and G.out_degree(n) == 1
+
+    keys: Dict[Hashable, str] = {}
+    for node in G.nodes():
+        if node in keys or not passthrough(node):
+            continue
+        # walk back to the head of the chain, then forward to its tail
+        head = node
+        while True:
+            (p,) = G.predecessors(head)
+            if not passthrough(p) or p == node:
+                break
+            head = p
+        key = f"chain {head}"
+        n = head
+        while n not in keys and passthrough(n):
+            keys[n] = key
+            (n,) = G.successors(n)
+    return keys
+
+
+def collapse(G: nx.DiGraph, mode: str, expand: Iterable[str] = (), prefix_len: int = 24) -> nx.DiGraph:
+    """Level-of-detail view of ``G`` with nodes merged into clusters.
+
+    ``mode`` is "prefix" (same /``prefix_len``), "ttl" (TTL bands) or "chains" (runs of
+    pass-through routers). Clusters named in ``expand`` keep their members.
+    Edge statistics of merged edges are combined.
+    """
+    if mode not in LOD_MODES:
+        raise ValueError(f"Unknown level-of-detail mode: {mode}")
+    expand = set(expand)
+    if mode == "chains":
+        chain = _chain_keys(G)
+        key_of: Callable[[Hashable], Hashable] = lambda n: chain.get(n, n)
+    elif mode == "prefix":
+        key_of = lambda n: _prefix_key(G, n, prefix_len)
+    else:
+        key_of = lambda n: _ttl_key(G, n)
+
+    cluster: Dict[Hashable, Hashable] = {}
+    members: Dict[Hashable, List[Hashable]] = defaultdict(list)
+    for node in G.nodes():
+        key = key_of(node)
+        if key in expand:
+            key = node
+        cluster[node] = key
+        members[key].append(node)
+
+    H = nx.DiGraph()
+    for key, nodes in members.items():
+        if len(nodes) == 1:
+            # A cluster of one is just the node
+            (node,) = nodes
+            cluster[node] = node
+            H.add_node(node, **G.nodes[node])
+            continue
+        ttl = min(G.nodes[n].get("ttl", 0) or 0 for n in nodes)
+        H.add_node(key, members=nodes, ttl=ttl, hostname=None, label=f"{key} ({len(nodes)})")
+
+    for u, v, data in G.edges(data=True):
+        cu, cv = cluster[u], cluster[v]
+        if cu == cv:
+            continue
+        if not H.has_edge(cu, cv):
+            H.add_edge(cu, cv, stats=RunningStats(), protocols=set(), destinations=set())
+        merged = H[cu][cv]
+        if "stats" in data:
+            merged["stats"].merge(data["stats"])
+        merged["protocols"] |= data.get("protocols", set())
+        merged["destinations"] |= data.get("destinations", set())
+    return H
+
+
+def auto_collapse(G: nx.DiGraph, max_nodes: int = MAX_NODES, expand: Iterable[str] = ()) -> nx.DiGraph:
+    """The finest AUTO_LOD view of ``G`` with at most ``max_nodes`` nodes, else the coarsest.
+
+    Every view is collapsed from ``G`` itself, so cluster members are always
+    routers of ``G`` and can be positioned and expanded.
+    """
+    if G.number_of_nodes() <= max_nodes:
+        return G
+    coarsest = G
+    for mode, prefix_len in AUTO_LOD:
+        H = collapse(G, mode, expand, prefix_len)
+        if H.number_of_nodes() <= max_nodes:
+            return H
+        if H.number_of_nodes() < coarsest.number_of_nodes():
+            coarsest = H
+    return coarsest
+
+
+def cluster_positions(H: nx.DiGraph, pos: Positions) -> Positions:
+    """Positions for a collapsed graph: clusters sit at the mean of their members."""
+    out = {}
+    for node, attrs in H.nodes(data=True):
+        if node in pos:
+            out[node] = pos[node]
+        else:
+            xy = np.array([pos[m] for m in attrs.get("members", ()) if m in pos])
+            out[node] = tuple(xy.mean(axis=0)) if len(xy) else (0.0, 0.0)
+    return out
+
+
+def coordinate_arrays(G: nx.DiGraph, pos: Positions) -> Tuple[List[Hashable], np.ndarray]:
+    nodes = list(G.nodes())
+    xy = np.array([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+    return nodes, xy
+
+
+def edge_segments(xy: np.ndarray, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """x/y arrays of line segments separated by NaN gaps, built in one pass."""
+    seg = np.full((len(src), 3, 2), np.nan)
+    seg[:, 0] = xy[src]
+    seg[:, 1] = xy[dst]
+    seg = seg.reshape(-1, 2)
+    return seg[:, 0], seg[:, 1]
+
+
+def build_figure(G: nx.DiGraph, pos: Optional[Positions] = None, title: str = "Traceroute Topology Visualization", group_by: str = "protocol", lod: Optional[str] = "auto", max_nodes: int = MAX_NODES, expand: Iterable[str] = ()) -> go.Figure:
+    """WebGL figure of ``G``; edges are grouped by protocol set or destination.
+
+    Graphs over ``max_nodes`` nodes are drawn collapsed (``lod="auto"``) unless
+    ``lod`` names a mode or is None; ``expand`` lists clusters to draw in full.
+    """
+    if lod == "auto":
+        H = auto_collapse(G, max_nodes, expand)
+    elif lod:
+        H = collapse(G, lod, expand)
+    else:
+        H = G
+    if pos is None:
+        pos = compute_layout(H)
+    elif H is not G:
+        pos = cluster_positions(H, pos)
+
+    nodes, xy = coordinate_arrays(H, pos)
+    index = {n: i for i, n in enumerate(nodes)}
+
+    if group_by == "destination":
+        dests = set().union(*(ds for _, _, ds in H.edges(data="destinations", default=())))
+        if len(dests) > MAX_DESTINATION_TRACES:
+            # One WebGL trace per destination stops scaling; draw a single layer
+            group_by = "all"
+
+    groups: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    labels: Dict[str, List[str]] = defaultdict(list)
+    for u, v, data in H.edges(data=True):
+        if group_by == "destination":
+            keys = data.get("destinations") or {""}
+        elif group_by == "all":
+            keys = ["all destinations"]
+        else:
+            keys = [", ".join(sorted(data.get("protocols", ()))) or ""]
+        label = data.get("label") or (edge_label(data) if "stats" in data else "")
+        for key in keys:
+            groups[key].append((index[u], index[v]))
+            labels[key].append(label)
+
+    palette = qualitative.Plotly
+    edge_traces = []
+    for i, (key, edges) in enumerate(sorted(groups.items())):
+        pairs = np.array(edges, dtype=np.int64).reshape(-1, 2)
+        xs, ys = edge_segments(xy, pairs[:, 0], pairs[:, 1])
+        if group_by == "destination":
+            color = palette[i % len(palette)]
+        elif group_by == "all":
+            color = "gray"
+        else:
+            color = PROTOCOL_COLOR.get(key, "gray")
+        # Every segment is three points (u, v, gap); repeat its label to match
+        text = np.repeat(np.array(labels[key], dtype=object), 3)
+        edge_traces.append(go.Scattergl(x=xs, y=ys, text=text, mode="lines", line=dict(width=2, color=color), hoverinfo="text", name=key, showlegend=True))
+
+    node_labels = [H.nodes[n].get("label", str(n)) for n in nodes]
+    sizes = np.array([len(H.nodes[n].get("members", ())) for n in nodes], dtype=float)
+    sizes = np.where(sizes > 0, 15 + 4 * np.log2(np.maximum(sizes, 1)), 12)
+    node_trace = go.Scattergl(
+        x=xy[:, 0],
+        y=xy[:, 1],
+        text=node_labels,
+        mode="markers+text" if len(nodes) <= MAX_LABELLED_NODES else "markers",
+        hoverinfo="text",
+        marker=dict(size=sizes, color="lightblue", line=dict(width=1)),
+        textposition="bottom center",
+        name="Nodes",
+    )
+
+    return go.Figure(
+        data=edge_traces + [node_trace],
+        layout=go.Layout(
+            title=title,
+            showlegend=True,
+            hovermode="closest",
+            margin=dict(b=20, l=5, r=5, t=40),
+            xaxis=dict(showgrid=False, zeroline=False),
+            yaxis=dict(showgrid=False, zeroline=False),
+        ),
+    )